@@ -0,0 +1,265 @@
+"""
+Async variants of the core viewset mixins for ASGI deployments.
+
+Reads go through Django's async ORM and the async cache API, so a request
+waiting on the database or Redis does not hold a worker thread. DRF itself
+is synchronous: authentication, permission checks, validation and saving
+still run through `sync_to_async`, as do actions without an async handler
+(export, bulk update, ...).
+
+Lists are serialized on the event loop, so serializers used here must not
+query the database lazily; related objects are loaded up front by the
+`select_related`/`prefetch_related` planning of the list mixin. A created or
+updated instance has no relations loaded, so it is serialized in a thread.
+"""
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+
+from core.cache import aget_model_versions, get_model_version_key
+from core.viewsets import (
+    AutocompleteViewSetMixin,
+    CreateViewSetMixin,
+    ListViewSetMixin,
+    UpdateViewSetMixin,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncViewSetMixin:
+    """
+    Makes a viewset dispatch asynchronously.
+
+    Handlers defined with `async def` are awaited directly; synchronous
+    handlers run in a thread through `sync_to_async`.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        # DRF wraps dispatch in a plain function; mark it so Django's handler
+        # awaits it instead of running it in a thread.
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and permission checks may query the database.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        await self.aafter_response()
+        return self.response
+
+    async def aafter_response(self):
+        """Hook for async work once the response is finalized."""
+
+    async def aget_object(self):
+        """Async counterpart of `get_object`, fetching the row with `aget`."""
+        queryset = self.filter_queryset(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+
+        await sync_to_async(self.check_object_permissions)(self.request, obj)
+        return obj
+
+
+class AsyncListViewSetMixin(AsyncViewSetMixin, ListViewSetMixin):
+    async def apaginate_queryset(self, queryset):
+        if (
+            self.paginator is None
+            or self.request.query_params.get("no_pagination", "false") == "true"
+        ):
+            return None
+        if not isinstance(self.paginator, LimitOffsetPagination):
+            return await sync_to_async(self.paginator.paginate_queryset)(
+                queryset, self.request, view=self
+            )
+
+        # Same steps as `LimitOffsetPagination.paginate_queryset`, with the
+        # count and the page fetched through the async ORM.
+        paginator = self.paginator
+        paginator.request = self.request
+        paginator.limit = paginator.get_limit(self.request)
+        if paginator.limit is None:
+            return None
+
+        paginator.count = await queryset.acount()
+        paginator.offset = paginator.get_offset(self.request)
+        if paginator.count > paginator.limit and paginator.template is not None:
+            paginator.display_page_controls = True
+
+        if paginator.count == 0 or paginator.offset > paginator.count:
+            return []
+        start, end = paginator.offset, paginator.offset + paginator.limit
+        return [obj async for obj in queryset[start:end]]
+
+    async def aget_cached_list_response(self, request):
+        """Async counterpart of `get_cached_list_response`."""
+        models = self.get_list_cache_models()
+        version_keys = [get_model_version_key(model) for model in models]
+        key = self.get_list_cache_key(request)
+        try:
+            values = await cache.aget_many([key, *version_keys])
+        except Exception as e:
+            logger.error(
+                f"Error retrieving cache for key {key}: {str(e)}", exc_info=True
+            )
+            values = {}
+        versions = {
+            version_key: values.get(version_key) for version_key in version_keys
+        }
+        if None in versions.values():
+            versions = await aget_model_versions(models)
+            if versions is None:
+                return None
+
+        cached = values.get(key)
+        if cached and cached["versions"] == versions:
+            return HttpResponse(
+                cached["content"],
+                content_type=cached["content_type"],
+                status=cached["status"],
+            )
+        self._list_cache_entry = (key, versions)
+        return None
+
+    def cache_list_response(self, key, value):
+        # Written in `aafter_response` with the async cache API.
+        self._list_cache_write = (key, value)
+
+    async def aafter_response(self):
+        await super().aafter_response()
+        write = getattr(self, "_list_cache_write", None)
+        if write is not None:
+            key, value = write
+            try:
+                await cache.aset(key, value, timeout=self.list_cache_timeout)
+            except Exception as e:
+                logger.error(
+                    f"Error setting cache for key {key}: {str(e)}", exc_info=True
+                )
+
+    async def list(self, request, *args, **kwargs):
+        if self.list_cache_timeout:
+            cached = await self.aget_cached_list_response(request)
+            if cached is not None:
+                return cached
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            data = self.get_paginated_response(serializer.data).data
+            return Response(
+                {
+                    "message": self.list_success_message,
+                    "count": data.get("count"),
+                    "next": data.get("next"),
+                    "previous": data.get("previous"),
+                    "data": data.get("results"),
+                },
+            )
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(
+            {
+                "message": self.list_success_message,
+                "data": serializer.data,
+            },
+        )
+
+
+class AsyncCreateViewSetMixin(AsyncViewSetMixin, CreateViewSetMixin):
+    async def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return await sync_to_async(self.bulk_create)(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        # Validators (e.g. unique checks) and `save()` use the sync ORM.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(self.perform_create)(serializer)
+        data = await sync_to_async(lambda: serializer.data)()
+        headers = self.get_success_headers(data)
+        return Response(
+            {"message": self.create_success_message, "data": data},
+            status=status.HTTP_201_CREATED,
+            headers=headers,
+        )
+
+
+class AsyncUpdateViewSetMixin(AsyncViewSetMixin, UpdateViewSetMixin):
+    async def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(
+            instance, data=self.get_request_data(request), partial=partial
+        )
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(self.perform_update)(serializer)
+
+        if getattr(instance, "_prefetched_objects_cache", None):
+            # If 'prefetch_related' has been applied to a queryset, we need to
+            # forcibly invalidate the prefetch cache on the instance.
+            instance._prefetched_objects_cache = {}
+
+        data = await sync_to_async(lambda: serializer.data)()
+        return Response({"message": self.update_success_message, "data": data})
+
+    async def partial_update(self, request, *args, **kwargs):
+        kwargs["partial"] = True
+        return await self.update(request, *args, **kwargs)
+
+
+class AsyncAutocompleteViewSetMixin(AsyncViewSetMixin, AutocompleteViewSetMixin):
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    async def autocomplete(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        results = [
+            {self.rename_dict.get(key, key): value for key, value in row.items()}
+            async for row in queryset.values(*self.autocomplete_fields)
+        ]
+        return Response({"results": results})
+
+
+class AsyncListAutoCompleteViewSetMixin(
+    AsyncListViewSetMixin, AsyncAutocompleteViewSetMixin
+):
+    pass
@@ -0,0 +1,186 @@
+"""
+JWT authentication that resolves the user without a query per request.
+
+`CachedJWTAuthentication` looks the user of a token up in two layers before
+falling back to the database:
+
+- a dict per process, whose entries live `AUTH_USER_LOCAL_CACHE_TTL` seconds
+- the shared cache (Redis), versioned per user (see
+  `core.cache.get_versioned_cache`)
+
+The cached users carry no password hash. Saving or deleting a user, which
+includes deactivating and archiving it, gives it a new version on commit
+and drops the local entry of the process it happened in (see
+`core.signals`). Other processes keep serving their local copy for at most
+the local TTL. `QuerySet.update()` sends no signals, so call
+`invalidate_cached_user` after bulk updates of users. Inactive and archived
+users are rejected.
+
+`TokenUserAuthentication` builds the user from the token claims with no
+lookup at all, for endpoints that only need the id.
+
+Both reject tokens revoked through `core.revocation`, which answers most
+checks from an in-memory Bloom filter.
+
+- get_cached_user: User by token user id, from the caches when possible
+- invalidate_cached_user: Drop the cached user everywhere
+"""
+
+import copy
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import bump_object_version, get_versioned_cache, set_versioned_cache
+from core.revocation import is_token_revoked
+
+# Entries per process; the whole dict is dropped when it is full.
+LOCAL_CACHE_SIZE = 10_000
+
+_local_users = {}
+
+
+def get_user_cache_key(user_id) -> str:
+    return f"auth-user:{user_id}"
+
+
+def _load_user(user_id):
+    # The password hash stays out of the caches: the field is deferred (and
+    # loaded on access), and only the digest carried by tokens is kept when
+    # `CHECK_REVOKE_TOKEN` needs it.
+    queryset = (
+        get_user_model()
+        .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .defer("password")
+    )
+    if not api_settings.CHECK_REVOKE_TOKEN:
+        return queryset.first()
+    user = queryset.annotate(password_value=F("password")).first()
+    if user is not None:
+        user.revoke_token_hash = get_md5_hash_password(
+            user.__dict__.pop("password_value")
+        )
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    Return the user whose `USER_ID_FIELD` is `user_id`, or None when there
+    is no such user. Every call gets its own copy of the cached instance,
+    with `password` deferred.
+    """
+    user_id = str(user_id)
+    now = time.monotonic()
+    entry = _local_users.get(user_id)
+    if entry is not None and entry[0] > now:
+        return copy.copy(entry[1])
+
+    user_model = get_user_model()
+    key = get_user_cache_key(user_id)
+    version, user = get_versioned_cache(key, user_model, user_id)
+    if user is None:
+        user = _load_user(user_id)
+        if user is None:
+            return None
+        set_versioned_cache(key, version, user, timeout=settings.AUTH_USER_CACHE_TTL)
+
+    if settings.AUTH_USER_LOCAL_CACHE_TTL > 0:
+        if len(_local_users) >= LOCAL_CACHE_SIZE:
+            _local_users.clear()
+        _local_users[user_id] = (now + settings.AUTH_USER_LOCAL_CACHE_TTL, user)
+    return copy.copy(user)
+
+
+def invalidate_cached_user(user_id) -> bool:
+    """Drop the cached user in this process and in the shared cache."""
+    _local_users.pop(str(user_id), None)
+    return bump_object_version(get_user_model(), user_id)
+
+
+class RevocationMixin:
+    """Reject tokens revoked with `core.revocation.revoke_token`."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_token_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked"))
+        return validated_token
+
+
+class CachedJWTAuthentication(RevocationMixin, JWTAuthentication):
+    """`JWTAuthentication` resolving the user through `get_cached_user`."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if getattr(user, "archive", False):
+            raise AuthenticationFailed(_("User is archived"), code="user_archived")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+                != user.revoke_token_hash
+            ):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+
+class ClaimsUser(TokenUser):
+    """
+    User backed by the claims of a token issued by
+    `CustomTokenObtainPairSerializer`. `pk` is the database id, so it can be
+    used in filters such as `created_by_id=request.user.pk`, but it cannot
+    be assigned to foreign keys or saved.
+    """
+
+    @cached_property
+    def id(self) -> Optional[int]:
+        return self.token.get("id")
+
+    @cached_property
+    def uuid(self) -> str:
+        return self.token[api_settings.USER_ID_CLAIM]
+
+    @cached_property
+    def is_admin(self) -> bool:
+        return self.token.get("is_admin", False)
+
+
+class TokenUserAuthentication(RevocationMixin, JWTStatelessUserAuthentication):
+    """
+    Authentication with no user lookup at all, returning a `ClaimsUser`.
+    The user is not checked for deactivation, so only use it for endpoints
+    where acting until the token expires is acceptable.
+    """
+
+    def get_user(self, validated_token):
+        if "id" not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
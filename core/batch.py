@@ -0,0 +1,156 @@
+"""
+In-process dispatch of batched API sub-requests.
+
+Each sub-request is resolved with the URL resolver and handed straight to
+its view, reusing the batch request's already authenticated user; it does
+not go through the middleware stack or authentication again. Only DRF views
+can be batched, as they take the user from DRF's forced authentication and
+turn permission errors into responses themselves; other views get a 400. Consecutive
+GET sub-requests run concurrently in a thread pool; any other method runs
+on its own, in order, so writes and the reads after them keep their order.
+"""
+
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the batch request body, not the sub-request's.
+EXCLUDED_META = {"CONTENT_TYPE", "CONTENT_LENGTH", "HTTP_CONTENT_LENGTH"}
+
+
+def build_sub_request(request, method, path, body=None):
+    """
+    Build a request for `path` that shares the batch request's headers and
+    authenticated user.
+    """
+    path, _, query_string = path.partition("?")
+    content = b"" if body is None else json.dumps(body).encode()
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if (key.startswith("HTTP_") or key in ("REMOTE_ADDR", "SERVER_NAME"))
+        and key not in EXCLUDED_META
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": query_string,
+            "SERVER_PORT": request.get_port(),
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    sub_request = WSGIRequest(environ)
+    # Picked up by DRF's `Request` in place of the configured authenticators.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def dispatch_sub_request(request, item, excluded_views=()):
+    """
+    Run one sub-request through its view.
+
+    Returns:
+        Dict with the sub-request's `status` and decoded `body`
+    """
+    path = item["path"]
+    try:
+        match = resolve(path.partition("?")[0])
+    except Resolver404:
+        return {"status": 404, "body": {"message": f"No route for '{path}'."}}
+    view_class = getattr(match.func, "cls", None)
+    if not (isinstance(view_class, type) and issubclass(view_class, APIView)):
+        return {
+            "status": 400,
+            "body": {"message": f"'{path}' is not an API endpoint."},
+        }
+    if view_class in excluded_views:
+        return {"status": 400, "body": {"message": "Batches cannot be nested."}}
+
+    sub_request = build_sub_request(request, item["method"], path, item.get("body"))
+    sub_request.resolver_match = match
+    try:
+        if iscoroutinefunction(match.func):
+            response = async_to_sync(match.func)(
+                sub_request, *match.args, **match.kwargs
+            )
+        else:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+    except Http404:
+        return {"status": 404, "body": {"message": "Not found."}}
+    except Exception as e:
+        logger.error(f"Batch sub-request to {path} failed: {str(e)}", exc_info=True)
+        return {"status": 500, "body": {"message": "Internal server error."}}
+
+    if hasattr(response, "render") and callable(response.render):
+        response.render()
+    if getattr(response, "streaming", False):
+        return {
+            "status": 400,
+            "body": {"message": "Streaming responses cannot be batched."},
+        }
+    content = response.content.decode(response.charset or "utf-8")
+    if response.get("Content-Type", "").startswith("application/json") and content:
+        content = json.loads(content)
+    return {"status": response.status_code, "body": content}
+
+
+def _dispatch_in_thread(request, item, excluded_views):
+    try:
+        return dispatch_sub_request(request, item, excluded_views)
+    finally:
+        # Worker threads open their own connections; don't leak them.
+        connections.close_all()
+
+
+def run_batch(request, items, excluded_views=()):
+    """
+    Dispatch `items` and return their results in the same order.
+
+    Consecutive GETs run concurrently on up to `BATCH_MAX_WORKERS` threads
+    (default 4); with one worker everything runs inline.
+    """
+    max_workers = getattr(settings, "BATCH_MAX_WORKERS", 4)
+    results = []
+    pending_gets = []
+
+    def flush_gets():
+        if len(pending_gets) > 1 and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results.extend(
+                    executor.map(
+                        lambda item: _dispatch_in_thread(request, item, excluded_views),
+                        pending_gets,
+                    )
+                )
+        else:
+            results.extend(
+                dispatch_sub_request(request, item, excluded_views)
+                for item in pending_gets
+            )
+        pending_gets.clear()
+
+    for item in items:
+        if item["method"] == "GET":
+            pending_gets.append(item)
+            continue
+        flush_gets()
+        results.append(dispatch_sub_request(request, item, excluded_views))
+    flush_gets()
+    return results
@@ -0,0 +1,39 @@
+"""
+Benchmarks run with `python manage.py benchmark [name ...]`.
+
+Each module in this package registers its benchmarks with `@register`. A
+benchmark receives the command's options and returns `(label, seconds)`
+rows; anything it writes to the database is rolled back afterwards.
+"""
+
+import importlib
+import pkgutil
+import time
+from typing import Callable, Dict
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def register(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def autodiscover():
+    for module in pkgutil.iter_modules(__path__):
+        importlib.import_module(f"{__name__}.{module.name}")
+    return BENCHMARKS
+
+
+def best_of(func, repeat=5, number=1):
+    """
+    Return the best time per call of `func` over `repeat` rounds of `number`
+    calls, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
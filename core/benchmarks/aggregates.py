@@ -0,0 +1,54 @@
+from django.db.models import OuterRef, Prefetch
+
+from core.benchmarks import best_of, register
+from core.benchmarks.serializers import create_users
+from core.models import ExportJob
+from core.utils.aggregates import subquery_json_array
+
+
+@register
+def embedded_collections(rows, repeat, **options):
+    """Listing `rows` users with their export jobs embedded."""
+    users = create_users(rows)
+    ExportJob.objects.bulk_create(
+        [
+            ExportJob(query=b"", serializer_class="", status=status, created_by=user)
+            for user in users
+            for status in ("pending", "completed")
+        ],
+        batch_size=1000,
+    )
+    jobs = ExportJob.objects.order_by().only("uuid", "status", "created_by")
+
+    def per_row():
+        return [
+            (user.email, list(jobs.filter(created_by=user).values("uuid", "status")))
+            for user in users.all()
+        ]
+
+    def prefetched():
+        queryset = users.prefetch_related(
+            Prefetch("core_exportjob_created", queryset=jobs)
+        )
+        return [
+            (
+                user.email,
+                [
+                    {"uuid": job.uuid, "status": job.status}
+                    for job in user.core_exportjob_created.all()
+                ],
+            )
+            for user in queryset
+        ]
+
+    def subquery():
+        embedded = subquery_json_array(
+            jobs.filter(created_by=OuterRef("pk")), "uuid", "status"
+        )
+        return list(users.values_list("email", embedded))
+
+    return [
+        ("query per row", best_of(per_row, repeat)),
+        ("prefetch_related", best_of(prefetched, repeat)),
+        ("subquery_json_array", best_of(subquery, repeat)),
+    ]
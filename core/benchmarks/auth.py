@@ -0,0 +1,255 @@
+import os
+import tempfile
+import time
+import uuid
+
+import jwt
+from django.conf import global_settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.authentication import CachedJWTAuthentication, TokenUserAuthentication
+from core.benchmarks import best_of, register
+from core.cache import get_cache
+from core.jwt_keys import get_jwks
+from core.revocation import get_revoked_key, is_token_revoked, revoke_token
+from users.api.v1.serializers.auth import CustomTokenObtainPairSerializer
+from users.api.v1.throttling import LoginEmailThrottle
+from users.api.v1.views.authentication import GetUserData, LoginView, RefreshView
+from users.models import CustomUser
+from users.services.profile import invalidate_user_profile
+
+
+class UnthrottledLoginView(LoginView):
+    throttle_classes = ()
+
+
+@register
+def login_attack(rows, repeat, **options):
+    """
+    CPU per wrong-password login from one client, with Django's default
+    password hasher: unthrottled vs once the throttle limit is reached.
+    """
+    attempts = min(rows, 20)
+    factory = APIRequestFactory()
+    data = {"email": "victim@example.com", "password": "wrong"}
+
+    def attack(view):
+        def run():
+            for _ in range(attempts):
+                response = view(factory.post("/", data, format="json"))
+            return response
+
+        return run
+
+    throttled = LoginView.as_view()
+    with override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS):
+        CustomUser.objects.create_user(data["email"], "password")
+        cache.clear()
+        for _ in range(LoginEmailThrottle().num_requests):
+            throttled(factory.post("/", data, format="json"))
+        results = [
+            (
+                "unthrottled",
+                best_of(attack(UnthrottledLoginView.as_view()), repeat) / attempts,
+            ),
+            ("throttled, limit reached", best_of(attack(throttled), repeat) / attempts),
+        ]
+        cache.clear()
+    return results
+
+
+@register
+def auth_me(rows, repeat, **options):
+    """
+    `/auth/me` requests for one user: every payload read from the database
+    (the user is invalidated before each request) vs served from the cache.
+    """
+    requests = min(rows, 500)
+    factory = APIRequestFactory()
+    view = GetUserData.as_view()
+    user = CustomUser.objects.create_user("me@example.com", "password")
+    data = {"token": CustomTokenObtainPairSerializer.get_token(user)}
+
+    def load(invalidate):
+        def run():
+            for _ in range(requests):
+                if invalidate:
+                    invalidate_user_profile(user.uuid)
+                response = view(factory.post("/", data, format="json"))
+            assert response.status_code == 200, response.data
+            return response
+
+        return run
+
+    cache.clear()
+    results = [
+        ("database", best_of(load(invalidate=True), repeat)),
+        ("cached", best_of(load(invalidate=False), repeat)),
+    ]
+    cache.clear()
+    return results
+
+
+class AuthenticatedView(APIView):
+    def get(self, request):
+        return Response({"pk": request.user.pk})
+
+
+@register
+def jwt_auth(rows, repeat, **options):
+    """
+    Authenticated requests of one user with the stock simplejwt class (one
+    query each), the cached class and the claims-only class.
+    """
+    requests = min(rows, 500)
+    factory = APIRequestFactory()
+    user = CustomUser.objects.create_user("bearer@example.com", "password")
+    token = CustomTokenObtainPairSerializer.get_token(user)
+
+    def load(authentication_class):
+        view = AuthenticatedView.as_view(authentication_classes=(authentication_class,))
+
+        def run():
+            for _ in range(requests):
+                response = view(factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+            assert response.status_code == 200, response.data
+            return response
+
+        return run
+
+    cache.clear()
+    results = [
+        ("database", best_of(load(JWTAuthentication), repeat)),
+        ("cached", best_of(load(CachedJWTAuthentication), repeat)),
+        ("token claims", best_of(load(TokenUserAuthentication), repeat)),
+    ]
+    cache.clear()
+    return results
+
+
+@register
+def revocation_check(rows, repeat, **options):
+    """
+    Revocation checks of tokens that are not revoked, with 1000 revoked
+    ones: a cache lookup per check vs the Bloom filter in front of it.
+    """
+    checks = min(rows, 10_000)
+    exp = time.time() + 60
+    cache.clear()
+    for _ in range(1000):
+        revoke_token(uuid.uuid4().hex, exp)
+    jtis = [uuid.uuid4().hex for _ in range(checks)]
+
+    results = [
+        (
+            "cache lookup",
+            best_of(lambda: [get_cache(get_revoked_key(jti)) for jti in jtis], repeat),
+        ),
+        (
+            "bloom filter",
+            best_of(lambda: [is_token_revoked(jti) for jti in jtis], repeat),
+        ),
+    ]
+    cache.clear()
+    return results
+
+
+def write_private_key(directory, name, private_key):
+    from cryptography.hazmat.primitives import serialization
+
+    path = os.path.join(directory, f"{name}.pem")
+    with open(path, "wb") as f:
+        f.write(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return path
+
+
+@register
+def jwt_verify(rows, repeat, **options):
+    """
+    Token checks by a peer service: calling `/auth/me` (in-process here, so
+    without the network hop) vs verifying locally with the JWKS keys.
+    Needs the cryptography package.
+    """
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    checks = min(rows, 500)
+    factory = APIRequestFactory()
+    view = GetUserData.as_view()
+    user = CustomUser.objects.create_user("peer@example.com", "password")
+    token = CustomTokenObtainPairSerializer.get_token(user)
+
+    def call_auth_me():
+        for _ in range(checks):
+            response = view(factory.post("/", {"token": token}, format="json"))
+        assert response.status_code == 200, response.data
+
+    cache.clear()
+    results = [("/auth/me, HS256", best_of(call_auth_me, repeat))]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, private_key in [
+            ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+            ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ]:
+            path = write_private_key(directory, name, private_key)
+            with override_settings(JWT_SIGNING_KEY_FILES=[path]):
+                signed = CustomTokenObtainPairSerializer.get_token(user)
+                (jwk,) = get_jwks()["keys"]
+            public_key = jwt.PyJWK(jwk).key
+
+            def verify_locally():
+                for _ in range(checks):
+                    jwt.decode(signed, public_key, algorithms=[jwk["alg"]])
+
+            results.append((f"local, {name}", best_of(verify_locally, repeat)))
+    cache.clear()
+    return results
+
+
+@register
+def session_renewal(rows, repeat, **options):
+    """
+    CPU per session renewal with Django's default password hasher: logging
+    in again with the password vs exchanging a refresh token.
+    """
+    renewals = min(rows, 20)
+    factory = APIRequestFactory()
+    credentials = {"email": "renew@example.com", "password": "password"}
+    login = UnthrottledLoginView.as_view()
+    refresh_view = RefreshView.as_view()
+
+    with override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS):
+        CustomUser.objects.create_user(**credentials)
+        cache.clear()
+        refresh = login(factory.post("/", credentials, format="json")).data["refresh"]
+
+        def log_in():
+            for _ in range(renewals):
+                response = login(factory.post("/", credentials, format="json"))
+            assert response.status_code == 200, response.data
+
+        def renew():
+            nonlocal refresh
+            for _ in range(renewals):
+                response = refresh_view(
+                    factory.post("/", {"refresh": refresh}, format="json")
+                )
+                refresh = response.data["refresh"]
+            assert response.status_code == 200, response.data
+
+        results = [
+            ("password login", best_of(log_in, repeat) / renewals),
+            ("refresh token", best_of(renew, repeat) / renewals),
+        ]
+        cache.clear()
+    return results
@@ -0,0 +1,59 @@
+import datetime
+import decimal
+import io
+import uuid
+
+from django.utils import timezone
+from rest_framework import renderers
+
+from core.benchmarks import best_of, register
+from core.parsers import JSONParser
+from core.renderers import JSONRenderer
+
+
+def build_payload(rows):
+    now = timezone.now()
+    return {
+        "message": "Fetched successfully",
+        "count": rows,
+        "data": [
+            {
+                "id": i,
+                "uuid": uuid.uuid4(),
+                "email": f"user{i}@example.com",
+                "first_name": f"First {i}",
+                "balance": decimal.Decimal(i) / 100,
+                "is_admin": i % 2 == 0,
+                "created_at": now - datetime.timedelta(minutes=i),
+                "tags": ["a", "b", "c"],
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+@register
+def json_renderer(rows, repeat, **options):
+    """Rendering a `rows` item list response: DRF's renderer vs core's."""
+    payload = build_payload(rows)
+    # What serializers actually hand over: dates, decimals and UUIDs as text.
+    serialized = renderers.JSONRenderer().render(payload)
+    serialized = JSONParser().parse(io.BytesIO(serialized))
+    return [
+        (
+            "rest_framework JSONRenderer, raw types",
+            best_of(lambda: renderers.JSONRenderer().render(payload), repeat),
+        ),
+        (
+            "core JSONRenderer, raw types",
+            best_of(lambda: JSONRenderer().render(payload), repeat),
+        ),
+        (
+            "rest_framework JSONRenderer, serialized",
+            best_of(lambda: renderers.JSONRenderer().render(serialized), repeat),
+        ),
+        (
+            "core JSONRenderer, serialized",
+            best_of(lambda: JSONRenderer().render(serialized), repeat),
+        ),
+    ]
@@ -0,0 +1,95 @@
+from rest_framework import serializers
+
+from core.benchmarks import best_of, register
+from core.serializers import DynamicFieldsReadOnlyModelSerializer
+from users.models import CustomUser
+
+USER_FIELDS = ["id", "uuid", "first_name", "last_name", "contact", "email", "is_admin"]
+
+
+class PlainUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = USER_FIELDS
+
+
+class ReadOnlyUserSerializer(DynamicFieldsReadOnlyModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = USER_FIELDS
+
+
+def create_users(rows):
+    CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                email=f"benchmark{i}@example.com",
+                first_name=f"First {i}",
+                last_name=f"Last {i}",
+                contact=f"98{i:08d}",
+            )
+            for i in range(rows)
+        ],
+        batch_size=1000,
+    )
+    return CustomUser.objects.filter(email__startswith="benchmark").order_by("id")
+
+
+@register
+def readonly_values(rows, repeat, **options):
+    """Listing `rows` users: DRF fields vs the compiled read-only paths."""
+    queryset = create_users(rows)
+    instances = list(queryset)
+    return [
+        (
+            "ModelSerializer, queryset",
+            best_of(
+                lambda: PlainUserSerializer(queryset.all(), many=True).data, repeat
+            ),
+        ),
+        (
+            "ReadOnly, page of instances",
+            best_of(lambda: ReadOnlyUserSerializer(instances, many=True).data, repeat),
+        ),
+        (
+            "ReadOnly, queryset (values_list)",
+            best_of(
+                lambda: ReadOnlyUserSerializer(queryset.all(), many=True).data, repeat
+            ),
+        ),
+    ]
+
+
+class CachedFieldsUserSerializer(ReadOnlyUserSerializer):
+    cache_fields = True
+
+
+@register
+def serializer_construction(repeat, **options):
+    """Building a `DynamicFields*` serializer's fields, as every request does."""
+    fields = ["id", "email", "first_name"]
+
+    def construct(serializer_class, **kwargs):
+        return lambda: serializer_class(**kwargs).fields
+
+    number = 1000
+    return [
+        (
+            "fields=[...], no field cache",
+            best_of(construct(ReadOnlyUserSerializer, fields=fields), repeat, number),
+        ),
+        (
+            "fields=[...], cached prototype",
+            best_of(
+                construct(CachedFieldsUserSerializer, fields=fields), repeat, number
+            ),
+        ),
+        (
+            "all fields, no field cache",
+            best_of(construct(ReadOnlyUserSerializer), repeat, number),
+        ),
+        (
+            "all fields, cached prototype",
+            best_of(construct(CachedFieldsUserSerializer), repeat, number),
+        ),
+    ]
@@ -3,16 +3,28 @@ Redis cache utility module for the PMS backend.
 
 Provides reusable methods for caching data with Redis:
 - get_cache: Retrieve cached data
+- get_many_cache: Retrieve several keys in one round trip
 - set_cache: Store data with TTL
+- set_many_cache: Store several keys in one round trip
 - delete_cache: Remove specific cache key
 - delete_pattern: Remove multiple keys matching a pattern
+- get_model_versions: Read (and initialize) per-model version tokens
+- aget_model_versions: Async variant of get_model_versions
+- bump_model_version: Invalidate everything cached against a model
+- get_versioned_cache: Read data cached against the version of one object
+- set_versioned_cache: Store data against the version of one object
+- bump_object_version: Invalidate everything cached against one object
+- get_redis: Raw Redis client behind the cache, for data structures the
+  cache API lacks
 """
 
 import json
 import logging
-from typing import Any, Optional
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from django.core.cache import cache
+from django_redis import get_redis_connection
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +54,26 @@ def get_cache(key: str) -> Optional[Any]:
         return None
 
 
+def get_many_cache(keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Retrieve several cached keys in a single round trip.
+
+    Args:
+        keys: Cache keys to retrieve
+
+    Returns:
+        Mapping of the keys that were found to their data
+    """
+    try:
+        return cache.get_many(list(keys))
+    except Exception as e:
+        logger.error(
+            f"Error retrieving cache for keys {keys}: {str(e)}",
+            exc_info=True,
+        )
+        return None
+
+
 def set_cache(key: str, value: Any, timeout: int = 7200) -> bool:
     """
     Store data in cache with TTL.
@@ -66,6 +98,29 @@ def set_cache(key: str, value: Any, timeout: int = 7200) -> bool:
         return False
 
 
+def set_many_cache(data: Dict[str, Any], timeout: int = 7200) -> bool:
+    """
+    Store several keys in a single round trip.
+
+    Args:
+        data: Mapping of cache key to data
+        timeout: TTL in seconds (default: 7200 = 2 hours)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        cache.set_many(data, timeout=timeout)
+        logger.debug(f"Cache set for {len(data)} keys with timeout: {timeout} seconds")
+        return True
+    except Exception as e:
+        logger.error(
+            f"Error setting cache for keys {list(data)}: {str(e)}",
+            exc_info=True,
+        )
+        return False
+
+
 def delete_cache(key: str) -> bool:
     """
     Remove cached data by key.
@@ -113,3 +168,154 @@ def delete_pattern(pattern: str) -> int:
             exc_info=True,
         )
         return -1
+
+
+def get_model_version_key(model) -> str:
+    return f"model-version:{model._meta.label_lower}"
+
+
+def get_model_versions(models: Iterable) -> Optional[Dict[str, str]]:
+    """
+    Return the current version token of each model, creating missing ones.
+
+    Args:
+        models: Model classes to read versions for
+
+    Returns:
+        Mapping of version key to version token, None on error
+    """
+    keys = [get_model_version_key(model) for model in models]
+    try:
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                cache.add(key, uuid.uuid4().hex, timeout=None)
+                versions[key] = cache.get(key)
+        return versions
+    except Exception as e:
+        logger.error(
+            f"Error reading model versions for {keys}: {str(e)}",
+            exc_info=True,
+        )
+        return None
+
+
+async def aget_model_versions(models: Iterable) -> Optional[Dict[str, str]]:
+    """Async variant of `get_model_versions`, using the async cache API."""
+    keys = [get_model_version_key(model) for model in models]
+    try:
+        versions = await cache.aget_many(keys)
+        for key in keys:
+            if key not in versions:
+                await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+                versions[key] = await cache.aget(key)
+        return versions
+    except Exception as e:
+        logger.error(
+            f"Error reading model versions for {keys}: {str(e)}",
+            exc_info=True,
+        )
+        return None
+
+
+def bump_model_version(model) -> bool:
+    """
+    Give `model` a new version token.
+
+    Anything cached against the previous token (see `get_model_versions`)
+    becomes unreachable, so invalidation needs no key scanning.
+
+    Args:
+        model: Model class whose data changed
+
+    Returns:
+        True if successful, False otherwise
+    """
+    return set_cache(get_model_version_key(model), uuid.uuid4().hex, timeout=None)
+
+
+def get_object_version_key(model, object_key) -> str:
+    return f"object-version:{model._meta.label_lower}:{object_key}"
+
+
+def get_versioned_cache(key: str, model, object_key) -> Tuple[Optional[str], Any]:
+    """
+    Read data cached against the version token of one object, reading the
+    token and the data in a single round trip.
+
+    Args:
+        key: Cache key of the data
+        model: Model class of the object
+        object_key: Value identifying the object, e.g. its pk or uuid
+
+    Returns:
+        The current version token (created if missing, None on error) and
+        the data, or None if it is missing or was cached against an older
+        version. Pass the token to `set_versioned_cache` after a miss.
+    """
+    version_key = get_object_version_key(model, object_key)
+    try:
+        cached = cache.get_many([version_key, key])
+        version = cached.get(version_key)
+        entry = cached.get(key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            return cache.get(version_key), None
+        if entry is not None and entry[0] == version:
+            return version, entry[1]
+        return version, None
+    except Exception as e:
+        logger.error(
+            f"Error retrieving versioned cache for key {key}: {str(e)}",
+            exc_info=True,
+        )
+        return None, None
+
+
+def set_versioned_cache(
+    key: str, version: Optional[str], value: Any, timeout: int = 7200
+) -> bool:
+    """
+    Store data against the version token returned by `get_versioned_cache`.
+
+    The token is the one read before the data was loaded, so data loaded
+    just before the object changed is stored against the old token and is
+    never served.
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if version is None:
+        return False
+    return set_cache(key, (version, value), timeout=timeout)
+
+
+def bump_object_version(model, object_key) -> bool:
+    """
+    Give one object a new version token, so everything cached against it
+    (see `get_versioned_cache`) becomes unreachable.
+
+    Args:
+        model: Model class of the object
+        object_key: Value identifying the object, e.g. its pk or uuid
+
+    Returns:
+        True if successful, False otherwise
+    """
+    return set_cache(
+        get_object_version_key(model, object_key), uuid.uuid4().hex, timeout=None
+    )
+
+
+def get_redis():
+    """
+    Return the raw Redis client of the default cache.
+
+    Returns:
+        Redis client, or None when the cache is not django-redis (e.g. the
+        locmem cache in tests)
+    """
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
@@ -18,3 +18,27 @@ class StatusChoice:
         (VERIFIED, VERIFIED),
         (REJECTED, REJECTED),
     )
+
+
+class ExportStatusChoice:
+    PENDING = "Pending"
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+    CHOICES = (
+        (PENDING, PENDING),
+        (RUNNING, RUNNING),
+        (COMPLETED, COMPLETED),
+        (FAILED, FAILED),
+    )
+
+
+class ExportFormatChoice:
+    CSV = "csv"
+    XLSX = "xlsx"
+
+    CHOICES = (
+        (CSV, "CSV"),
+        (XLSX, "XLSX"),
+    )
@@ -0,0 +1,186 @@
+"""
+Asymmetric JWT signing with key rotation.
+
+With `JWT_SIGNING_KEY_FILES` set, tokens are signed with the first private
+key of the list (RSA keys use RS256, Ed25519 keys EdDSA) and carry its `kid`
+in the header. The public keys of all the listed keys verify tokens and are
+published as a JWKS at `/.well-known/jwks.json`, so other services can
+verify tokens locally instead of calling `/auth/me`. Without it, tokens
+stay HS256-signed with `SIMPLE_JWT["SIGNING_KEY"]`.
+
+Rotating a key:
+
+1. Add the new key second, so it is published but does not sign yet
+2. Once peers have refreshed their JWKS (`JWKS_MAX_AGE`), move it first
+3. Drop the old key once the tokens it signed have expired
+
+- get_signing_keys: Configured keys, the signing one first
+- get_verifying_key: Key and algorithms to verify a token with
+- get_jwks: Public keys as a JSON Web Key Set
+- token_backend: simplejwt token backend signing with the configured keys
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import (
+    TokenBackendError,
+    TokenBackendExpiredToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+except ImportError:  # pragma: no cover
+    load_pem_private_key = None
+
+# Members of each key type hashed into the RFC 7638 thumbprint used as kid
+THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "OKP": ("crv", "kty", "x")}
+
+
+class SigningKey(NamedTuple):
+    kid: str
+    algorithm: str
+    private_key: Any
+    public_key: Any
+    jwk: Dict[str, str]
+
+
+def _load_signing_key(path) -> SigningKey:
+    if load_pem_private_key is None:
+        raise ImproperlyConfigured(
+            "JWT_SIGNING_KEY_FILES requires the cryptography package, "
+            "install the jwt-asymmetric extra"
+        )
+    with open(path, "rb") as f:
+        private_key = load_pem_private_key(f.read(), password=None)
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        algorithm = "RS256"
+        jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+        algorithm = "EdDSA"
+        jwk = OKPAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    else:
+        raise ImproperlyConfigured(
+            f"{path}: only RSA and Ed25519 keys can sign JWTs, "
+            f"got {type(private_key).__name__}"
+        )
+    thumbprint = json.dumps(
+        {member: jwk[member] for member in THUMBPRINT_MEMBERS[jwk["kty"]]},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    kid = (
+        base64.urlsafe_b64encode(hashlib.sha256(thumbprint.encode()).digest())
+        .rstrip(b"=")
+        .decode()
+    )
+    jwk = {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+    return SigningKey(kid, algorithm, private_key, private_key.public_key(), jwk)
+
+
+_signing_keys = None
+
+
+def get_signing_keys() -> List[SigningKey]:
+    """Keys of `JWT_SIGNING_KEY_FILES`, loaded once; empty for HS256."""
+    global _signing_keys
+    if _signing_keys is None:
+        _signing_keys = [
+            _load_signing_key(path) for path in settings.JWT_SIGNING_KEY_FILES
+        ]
+    return _signing_keys
+
+
+@receiver(setting_changed)
+def reload_signing_keys(setting, **kwargs):
+    global _signing_keys
+    if setting == "JWT_SIGNING_KEY_FILES":
+        _signing_keys = None
+
+
+def get_verifying_key(token) -> Tuple[Any, List[str]]:
+    """
+    Return the key and algorithms to pass to `jwt.decode` for `token`.
+
+    Raises:
+        jwt.InvalidTokenError: The token is malformed or its `kid` unknown
+    """
+    keys = get_signing_keys()
+    if not keys:
+        return api_settings.SIGNING_KEY, [api_settings.ALGORITHM]
+    kid = jwt.get_unverified_header(token).get("kid")
+    for key in keys:
+        if key.kid == kid:
+            return key.public_key, [key.algorithm]
+    raise jwt.InvalidSignatureError(f"Unknown signing key {kid!r}")
+
+
+def get_jwks() -> Dict[str, List[Dict[str, str]]]:
+    return {"keys": [key.jwk for key in get_signing_keys()]}
+
+
+class KeyRotatingTokenBackend(TokenBackend):
+    """`TokenBackend` signing with the first key of `get_signing_keys`."""
+
+    def encode(self, payload):
+        keys = get_signing_keys()
+        if not keys:
+            return super().encode(payload)
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+        return jwt.encode(
+            jwt_payload,
+            keys[0].private_key,
+            algorithm=keys[0].algorithm,
+            headers={"kid": keys[0].kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        if not get_signing_keys():
+            return super().decode(token, verify)
+        try:
+            key, algorithms = get_verifying_key(token)
+            return jwt.decode(
+                token,
+                key,
+                algorithms=algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+
+token_backend = KeyRotatingTokenBackend(
+    api_settings.ALGORITHM,
+    api_settings.SIGNING_KEY,
+    api_settings.VERIFYING_KEY,
+    api_settings.AUDIENCE,
+    api_settings.ISSUER,
+    api_settings.JWK_URL,
+    api_settings.LEEWAY,
+    api_settings.JSON_ENCODER,
+)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmarks import autodiscover
+
+
+class Command(BaseCommand):
+    help = "Runs the benchmarks in core.benchmarks (all of them by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Benchmarks to run")
+        parser.add_argument(
+            "--rows", type=int, default=10000, help="Rows of test data to create"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Rounds to take the best of"
+        )
+
+    def handle(self, *args, **options):
+        benchmarks = autodiscover()
+        names = options["names"] or sorted(benchmarks)
+        unknown = set(names) - set(benchmarks)
+        if unknown:
+            raise CommandError(
+                f"Unknown benchmark(s): {', '.join(sorted(unknown))}. "
+                f"Available: {', '.join(sorted(benchmarks))}"
+            )
+
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            with transaction.atomic():
+                results = benchmarks[name](**options)
+                # Leave no benchmark data behind.
+                transaction.set_rollback(True)
+            baseline = results[0][1] if results else None
+            for label, seconds in results:
+                speedup = f"  x{baseline / seconds:.1f}" if baseline else ""
+                self.stdout.write(f"  {label:<48} {seconds * 1000:10.2f} ms{speedup}")
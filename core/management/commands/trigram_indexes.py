@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.utils.trigram import (
+    create_index_sql,
+    drop_index_sql,
+    get_index_name,
+    get_index_state,
+    get_search_fields,
+    index_serves_search,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates pg_trgm GIN indexes CONCURRENTLY for the fields viewsets search "
+        "with split_term_args/non_split_term_args, and reports which searches "
+        "can use an index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to create the indexes on",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print the statements and the current index usability",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "postgresql":
+            raise CommandError("Trigram indexes need a PostgreSQL database.")
+        dry_run = options["dry_run"]
+
+        search_fields = list(get_search_fields())
+        if not search_fields:
+            self.stdout.write(
+                "No viewset declares split_term_args/non_split_term_args."
+            )
+            return
+
+        with connection.schema_editor(atomic=False, collect_sql=dry_run) as editor:
+            if not dry_run:
+                editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            # Several viewsets may search the same column.
+            columns = dict.fromkeys(
+                (field.table, field.column) for field in search_fields
+            )
+            for table, column in columns:
+                name = get_index_name(table, column)
+                state = get_index_state(connection, name)
+                if state:
+                    self.stdout.write(f"  {name}: exists")
+                    continue
+                if state is False:
+                    # Left behind by an interrupted concurrent build.
+                    self.stdout.write(f"  {name}: invalid, rebuilding")
+                    self.run(editor, drop_index_sql(editor, name), dry_run)
+                self.stdout.write(f"  {name}: creating")
+                self.run(editor, create_index_sql(editor, table, column, name), dry_run)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Index usability"))
+        for field in search_fields:
+            usable = index_serves_search(connection, field)
+            label = (
+                f"{field.viewset.__name__}.{field.path} ({field.table}.{field.column})"
+            )
+            style = self.style.SUCCESS if usable else self.style.WARNING
+            self.stdout.write(f"  {label}: {style('index' if usable else 'no index')}")
+
+    def run(self, editor, sql, dry_run):
+        if dry_run:
+            self.stdout.write(f"    {sql};")
+        else:
+            editor.execute(sql)
@@ -1,7 +1,45 @@
+import pickle
+
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 
 class SingletonManager(models.Manager):
     def get_instance(self):
         instance, created = self.get_or_create(pk=1)
         return instance
+
+
+class ExportJobManager(models.Manager):
+    def create_for_queryset(self, queryset, serializer_class, **kwargs):
+        """
+        Create an export job for `queryset`.
+
+        The queryset's SQL query is pickled so a worker can rebuild exactly the
+        same (filtered, permission-scoped) queryset later.
+        """
+        return self.create(
+            query=pickle.dumps(queryset.query),
+            serializer_class=(
+                f"{serializer_class.__module__}.{serializer_class.__qualname__}"
+            ),
+            **kwargs,
+        )
+
+
+class TombstoneManager(models.Manager):
+    def record(self, instance, soft=False):
+        """Record that `instance` was deleted, or soft deleted if `soft`."""
+        return self.update_or_create(
+            content_type=ContentType.objects.get_for_model(instance.__class__),
+            object_pk=str(instance.pk),
+            defaults={"deleted_at": timezone.now(), "soft": soft},
+        )
+
+    def clear(self, instance):
+        """Forget the tombstone of a restored `instance`."""
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(instance.__class__),
+            object_pk=str(instance.pk),
+        ).delete()
@@ -1,12 +1,50 @@
+import pickle
+import uuid
+from functools import lru_cache
+
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from core.constants import StatusChoice
+from core.constants import ExportFormatChoice, ExportStatusChoice, StatusChoice
+from core.managers import ExportJobManager, TombstoneManager
 from core.middleware import CuserMiddleware
 from core.utils.common import unique_slugify
 
+# Flag fields whose value marks a row as soft deleted.
+SOFT_DELETE_FLAGS = {"archive": True, "is_active": False, "disabled": True}
+
+
+@lru_cache(maxsize=None)
+def get_soft_delete_fields(model):
+    # Cached per model: `is_soft_deleted` runs for every row loaded.
+    names = {field.name for field in model._meta.concrete_fields}
+    return tuple(name for name in SOFT_DELETE_FLAGS if name in names)
+
+
+def is_soft_deleted(instance):
+    """
+    Whether `instance` is soft deleted, judged from the flag fields it has
+    loaded; deferred flags are not fetched.
+    """
+    return any(
+        instance.__dict__.get(name, not SOFT_DELETE_FLAGS[name])
+        == SOFT_DELETE_FLAGS[name]
+        for name in get_soft_delete_fields(instance.__class__)
+    )
+
+
+def get_soft_delete_q(model):
+    """Return a `Q` matching the soft deleted rows of `model`, or None."""
+    q = Q()
+    for name in get_soft_delete_fields(model):
+        q |= Q(**{name: SOFT_DELETE_FLAGS[name]})
+    return q or None
+
 
 class SingletonModel(models.Model):
     class Meta:
@@ -69,12 +107,21 @@ class CuserModel(UpdatedByModel):
 
 class TimeStampModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Indexed for the `(updated_at, pk)` range scans of the sync action.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ("-updated_at",)
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save can tell whether it soft deleted or restored
+        # the row, see `core.signals.track_soft_delete`.
+        instance._loaded_soft_deleted = is_soft_deleted(instance)
+        return instance
+
 
 class SlugModel(models.Model):
     slug = models.SlugField(unique=True, max_length=255, blank=True)
@@ -130,3 +177,79 @@ class ActiveModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ExportJob(CuserModel, TimeStampModel):
+    """
+    A list export rendered in the background by Celery workers.
+    """
+
+    uuid = models.UUIDField(_("UUID"), default=uuid.uuid4, editable=False, unique=True)
+    status = models.CharField(
+        max_length=20,
+        choices=ExportStatusChoice.CHOICES,
+        default=ExportStatusChoice.PENDING,
+    )
+    export_format = models.CharField(
+        max_length=10,
+        choices=ExportFormatChoice.CHOICES,
+        default=ExportFormatChoice.CSV,
+    )
+    query = models.BinaryField(editable=False)
+    serializer_class = models.CharField(max_length=255)
+    fields = models.JSONField(null=True, blank=True)
+    # See `core.exports.get_export_request_data`.
+    request_data = models.JSONField(null=True, blank=True, editable=False)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/", blank=True)
+    error = models.TextField(blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    objects = ExportJobManager()
+
+    class Meta(TimeStampModel.Meta):
+        pass
+
+    def __str__(self):
+        return f"{self.export_format} export {self.uuid} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.total_rows:
+            return 100 if self.status == ExportStatusChoice.COMPLETED else 0
+        return round(self.processed_rows * 100 / self.total_rows)
+
+    def get_queryset(self):
+        query = pickle.loads(bytes(self.query))
+        queryset = query.model._default_manager.all()
+        queryset.query = query
+        return queryset
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted (or soft deleted) `TimeStampModel` row so incremental
+    syncs can tell clients to drop it.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_pk = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now)
+    soft = models.BooleanField(default=False)
+    objects = TombstoneManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("content_type", "object_pk"), name="core_tombstone_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("content_type", "deleted_at", "id"),
+                name="core_tombstone_sync_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} {self.object_pk} deleted at {self.deleted_at}"
@@ -0,0 +1,76 @@
+"""
+Custom migration operations.
+"""
+
+from django.db import NotSupportedError
+from django.db.migrations.operations.base import Operation
+
+from core.utils.trigram import create_index_sql, drop_index_sql, get_index_name
+
+
+class CreateTrigramIndex(Operation):
+    """
+    Create a `pg_trgm` GIN index for `icontains` search on a text field,
+    `CONCURRENTLY` so it does not lock a live table.
+
+    The migration containing it must set `atomic = False`, and the `pg_trgm`
+    extension must exist (`django.contrib.postgres.operations
+    .TrigramExtension`). Does nothing on other databases and leaves the model
+    state untouched, like `RunSQL`.
+
+        operations = [
+            TrigramExtension(),
+            CreateTrigramIndex("customuser", "email"),
+        ]
+    """
+
+    reversible = True
+    atomic = False
+
+    def __init__(self, model_name, field_name, name=None):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def deconstruct(self):
+        kwargs = {"model_name": self.model_name, "field_name": self.field_name}
+        if self.name:
+            kwargs["name"] = self.name
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _get_target(self, app_label, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        column = model._meta.get_field(self.field_name).column
+        table = model._meta.db_table
+        return table, column, self.name or get_index_name(table, column)
+
+    def _check(self, schema_editor):
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                "CreateTrigramIndex cannot run inside a transaction; set "
+                "atomic = False on the migration."
+            )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        self._check(schema_editor)
+        table, column, name = self._get_target(app_label, to_state)
+        schema_editor.execute(create_index_sql(schema_editor, table, column, name))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        self._check(schema_editor)
+        _, _, name = self._get_target(app_label, from_state)
+        schema_editor.execute(drop_index_sql(schema_editor, name))
+
+    def describe(self):
+        return f"Create trigram index on {self.model_name}.{self.field_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.field_name.lower()}_trgm"
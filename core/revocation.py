@@ -0,0 +1,179 @@
+"""
+Revocation of JWTs by their `jti` claim.
+
+A revoked jti is stored in the cache until the token's `exp`, after which
+the token is rejected anyway. Checking every request against the cache
+would cost a round trip per request, so each process keeps a Bloom filter
+of the revoked jtis in front of it: a jti that is not in the filter, the
+common case, is answered locally. Only filter hits, revoked tokens and the
+rare false positive, are confirmed against the cache.
+
+With Redis, revocations are also kept in a sorted set scored by `exp` and
+published on a channel. Each process subscribes to the channel from a
+background thread, loads the sorted set when it starts listening, and
+rebuilds its filter from it every `REBUILD_INTERVAL` seconds to shed
+expired jtis. Without Redis (e.g. the locmem cache in tests) the filter only
+sees revocations made in its own process.
+
+- revoke_token: Revoke a jti until its expiry
+- is_token_revoked: Whether a jti is revoked
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from core.cache import get_cache, get_redis, set_cache
+from core.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "revoked-jtis"
+INDEX_KEY = "revoked-jtis"
+REBUILD_INTERVAL = 60 * 60
+
+
+def get_revoked_key(jti) -> str:
+    return f"revoked-jti:{jti}"
+
+
+class RevocationList:
+    """
+    Bloom filter of the revoked jtis of this process. It is loaded on first
+    use in every process, so forked workers do not share the listener.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pid = None
+        # Listeners stop once the generation they started in is over.
+        self.generation = object()
+        self.filter = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            client = get_redis()
+            if client is None:
+                self.filter = BloomFilter(settings.JWT_REVOCATION_FILTER_CAPACITY)
+                self.pid = os.getpid()
+                return
+            try:
+                pubsub = self.subscribe(client)
+            except Exception as e:
+                # Retried on the next check; the cache is likely down too.
+                logger.error(f"Error loading revoked jtis: {str(e)}", exc_info=True)
+                return
+            self.pid = os.getpid()
+            threading.Thread(
+                target=self.listen,
+                args=(client, pubsub),
+                name="jti-revocations",
+                daemon=True,
+            ).start()
+
+    def subscribe(self, client):
+        """Subscribe, then load, so no revocation falls in between."""
+        pubsub = client.pubsub()
+        pubsub.subscribe(CHANNEL)
+        # Wait for the confirmation of the subscription.
+        pubsub.get_message(timeout=5)
+        self.rebuild(client)
+        return pubsub
+
+    def rebuild(self, client):
+        now = time.time()
+        pipe = client.pipeline()
+        pipe.zremrangebyscore(INDEX_KEY, "-inf", now)
+        pipe.zrange(INDEX_KEY, 0, -1)
+        _, jtis = pipe.execute()
+        bloom = BloomFilter(max(settings.JWT_REVOCATION_FILTER_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self.filter = bloom
+        self.rebuild_at = time.monotonic() + REBUILD_INTERVAL
+
+    def listen(self, client, pubsub):
+        generation = self.generation
+        while self.generation is generation:
+            try:
+                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                if message is not None:
+                    self.filter.add(message["data"])
+                if time.monotonic() >= self.rebuild_at:
+                    self.rebuild(client)
+            except Exception as e:
+                # Messages may have been missed, so reload after reconnecting.
+                logger.error(
+                    f"Error listening for revoked jtis: {str(e)}", exc_info=True
+                )
+                time.sleep(1)
+                try:
+                    pubsub.close()
+                    pubsub = self.subscribe(client)
+                except Exception:
+                    pass
+        pubsub.close()
+
+    def add(self, jti):
+        self.ensure_started()
+        if self.filter is not None:
+            self.filter.add(jti)
+
+    def __contains__(self, jti) -> bool:
+        self.ensure_started()
+        bloom = self.filter
+        return bloom is not None and jti in bloom
+
+
+revocation_list = RevocationList()
+os.register_at_fork(after_in_child=revocation_list.reset)
+
+
+def revoke_token(jti: str, exp: float) -> bool:
+    """
+    Revoke the token with `jti` until its expiry.
+
+    Args:
+        jti: `jti` claim of the token
+        exp: `exp` claim of the token, a unix timestamp
+
+    Returns:
+        True if revoked, False if the token has already expired or the
+        revocation could not be stored
+    """
+    timeout = math.ceil(exp - time.time())
+    if timeout <= 0:
+        return False
+    if not set_cache(get_revoked_key(jti), True, timeout=timeout):
+        return False
+    client = get_redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.zadd(INDEX_KEY, {jti: exp})
+            pipe.publish(CHANNEL, jti)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error publishing revoked jti {jti}: {str(e)}", exc_info=True)
+            return False
+    revocation_list.add(jti)
+    return True
+
+
+def is_token_revoked(jti: Optional[str]) -> bool:
+    """Whether the token with `jti` is revoked; tokens without one are not."""
+    if not jti or jti not in revocation_list:
+        return False
+    return get_cache(get_revoked_key(jti)) is not None
@@ -1 +1,3 @@
 from .base import *
+from .batch import *
+from .exports import *
@@ -1,9 +1,132 @@
+import copy
+import hashlib
+from collections import defaultdict
+
+from django.apps import apps
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.utils import timezone
 from django.utils.functional import cached_property
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from core.cache import get_cache, get_many_cache, set_cache, set_many_cache
+from core.middleware import CuserMiddleware
+from core.models import CuserModel, UpdatedByModel
+from core.serializers.compiled import compile_field
+from core.signals import bump_version_on_commit
+
+_missing = object()
 
 
 class GenericForeignKeyField(serializers.Field):
+    """
+    Reads and writes a `GenericForeignKey` as
+    `{"content_type": "<model>", "id": <pk>}`; the content type may also be
+    given as `"<app_label>.<model>"`.
+
+    Content types come from Django's in-memory ContentType cache. Used in a
+    list, targets are loaded with one `in_bulk` query per content type (see
+    `GenericForeignKeyListSerializer`) instead of one query per row.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (content type id, str(object id)) -> primary key, or None if missing
+        self._resolved_targets = {}
+
+    def get_content_type(self, name):
+        """
+        Resolve a model name to its ContentType without querying once the
+        cache is warm.
+
+        Raises:
+            ContentType.DoesNotExist: Unknown or ambiguous model name
+        """
+        name = str(name).lower()
+        if "." in name:
+            app_label, model_name = name.split(".", 1)
+            return ContentType.objects.get_by_natural_key(app_label, model_name)
+        matches = [
+            model for model in apps.get_models() if model._meta.model_name == name
+        ]
+        if len(matches) != 1:
+            raise ContentType.DoesNotExist
+        return ContentType.objects.get_for_model(matches[0])
+
+    def resolve_targets(self, content_type, object_ids):
+        """
+        Look up which of `object_ids` exist with a single query and remember
+        the result for `to_internal_value`.
+        """
+        model = content_type.model_class()
+        pks = {}
+        for object_id in object_ids:
+            try:
+                pks[str(object_id)] = model._meta.pk.to_python(object_id)
+            except (DjangoValidationError, TypeError, ValueError):
+                self._resolved_targets[(content_type.id, str(object_id))] = None
+        existing = {
+            str(pk): pk
+            for pk in model._base_manager.filter(pk__in=pks.values()).values_list(
+                "pk", flat=True
+            )
+        }
+        for object_id in pks:
+            self._resolved_targets[(content_type.id, object_id)] = existing.get(
+                object_id
+            )
+
+    def prefetch_input(self, values):
+        """Resolve the targets of several input values, one query per type."""
+        groups = defaultdict(set)
+        for value in values:
+            try:
+                content_type = self.get_content_type(value["content_type"])
+                groups[content_type].add(value["id"])
+            except (ContentType.DoesNotExist, KeyError, TypeError):
+                continue
+        for content_type, object_ids in groups.items():
+            self.resolve_targets(content_type, object_ids)
+
+    def prefetch(self, instances):
+        """
+        Load the targets of `instances` with one `in_bulk` query per content
+        type and store them in each instance's GenericForeignKey cache.
+        """
+        if len(self.source_attrs) != 1:
+            return
+        groups = defaultdict(list)
+        for instance in instances:
+            try:
+                gfk = instance._meta.get_field(self.source_attrs[0])
+            except FieldDoesNotExist:
+                return
+            if not isinstance(gfk, GenericForeignKey):
+                return
+            if gfk.is_cached(instance):
+                continue
+            ct_id = getattr(instance, instance._meta.get_field(gfk.ct_field).attname)
+            object_id = getattr(instance, gfk.fk_field)
+            if ct_id is None or object_id is None:
+                gfk.set_cached_value(instance, None)
+                continue
+            groups[ct_id].append((instance, gfk, object_id))
+
+        for ct_id, targets in groups.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            to_python = model._meta.pk.to_python
+            objects = model._base_manager.in_bulk(
+                {to_python(object_id) for _, _, object_id in targets}
+            )
+            for instance, gfk, object_id in targets:
+                gfk.set_cached_value(instance, objects.get(to_python(object_id)))
+
     def to_representation(self, obj):
         """Serialize the GenericForeignKey to a dict representation."""
         if obj:
@@ -17,62 +140,236 @@ class GenericForeignKeyField(serializers.Field):
     def to_internal_value(self, data):
         """Deserialize the GenericForeignKey from the input data."""
         try:
-            content_type = ContentType.objects.get(model=data["content_type"].lower())
-            instance = content_type.get_object_for_this_type(id=data["id"])
-            return {
-                "content_type": content_type,
-                "object_id": instance.id,
-            }
-        except ContentType.DoesNotExist:
+            content_type = self.get_content_type(data["content_type"])
+            object_id = data["id"]
+        except (ContentType.DoesNotExist, KeyError, TypeError):
             raise serializers.ValidationError("Invalid content type.")
-        except content_type.model_class().DoesNotExist:
+
+        key = (content_type.id, str(object_id))
+        if key not in self._resolved_targets:
+            self.resolve_targets(content_type, [object_id])
+        pk = self._resolved_targets[key]
+        if pk is None:
             raise serializers.ValidationError("Invalid object ID.")
+        return {
+            "content_type": content_type,
+            "object_id": pk,
+        }
 
 
-class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+def get_generic_foreign_key_fields(serializer):
+    return [
+        field
+        for field in serializer.fields.values()
+        if isinstance(field, GenericForeignKeyField)
+    ]
+
+
+class GenericForeignKeyListSerializer(serializers.ListSerializer):
     """
-    A ModelSerializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
+    List serializer that resolves the child's `GenericForeignKeyField`s for
+    all items at once, grouped by content type, when rendering and when
+    validating input.
+
+    Set it as `Meta.list_serializer_class` on serializers with generic
+    relations; `DynamicFieldsModelSerializer` uses it by default.
     """
 
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        items = list(iterable)
+        self.prefetch_generic_targets(items)
+        return [self.child.to_representation(item) for item in items]
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for field in get_generic_foreign_key_fields(self.child):
+                field.prefetch_input(
+                    item[field.field_name]
+                    for item in data
+                    if isinstance(item, dict) and item.get(field.field_name)
+                )
+        return super().to_internal_value(data)
+
+    def prefetch_generic_targets(self, instances):
+        for field in get_generic_foreign_key_fields(self.child):
+            field.prefetch(instances)
+
+
+class RepresentationCacheListSerializer(GenericForeignKeyListSerializer):
+    """
+    List serializer for children with `cache_representation` enabled: all
+    cached representations are read with one multi-get, only the misses are
+    serialized, and those are stored with one multi-set.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        items = list(iterable)
+        keys = [self.child.get_representation_cache_key(item) for item in items]
+        cached = get_many_cache([key for key in keys if key is not None])
+
+        self.prefetch_generic_targets(
+            [item for item, key in zip(items, keys) if key not in cached]
+        )
+        representations, misses = [], {}
+        for item, key in zip(items, keys):
+            representation = cached.get(key) if key is not None else None
+            if representation is None:
+                representation = self.child.to_representation_uncached(item)
+                if key is not None:
+                    misses[key] = representation
+            representations.append(representation)
+
+        if misses:
+            set_many_cache(misses, timeout=self.child.representation_cache_timeout)
+        return representations
+
+
+# Serializer class -> its full field map, built once and copied per instance.
+_prepared_fields = {}
+
+
+class DynamicFieldsMixin:
+    """
+    Takes the `fields` and `exclude` arguments of the `DynamicFields*`
+    serializers.
+
+    With `cache_fields = True`, the class's full field map is built once per
+    process and kept as a prototype; each instance deep-copies only the
+    fields it keeps, instead of rebuilding and copying every field and then
+    dropping the unwanted ones. Only enable it on serializers whose
+    `get_fields()`, including any override in a subclass, depends on the
+    class alone and not on the instance or its context.
+    """
+
+    cache_fields = False
+
     def __init__(self, *args, **kwargs):
-        # Don't pass the 'fields' arg up to the superclass
+        # Don't pass the 'fields'/'exclude' args up to the superclass
         fields = kwargs.pop("fields", None)
+        exclude = kwargs.pop("exclude", None)
+        self._allowed_fields = set(fields) if fields is not None else None
+        self._excluded_fields = set(exclude or ())
 
         # Instantiate the superclass normally
         super().__init__(*args, **kwargs)
 
-        if fields is not None:
-            # Drop any fields that are not specified in the `fields` argument.
-            allowed = set(fields)
-            existing = set(self.fields)
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+    def _keep_field(self, field_name):
+        if self._allowed_fields is not None and field_name not in self._allowed_fields:
+            return False
+        return field_name not in self._excluded_fields
+
+    def get_fields(self):
+        if not self.cache_fields:
+            fields = super().get_fields()
+            return {
+                name: field for name, field in fields.items() if self._keep_field(name)
+            }
+
+        prototype = _prepared_fields.get(self.__class__)
+        if prototype is None:
+            prototype = _prepared_fields[self.__class__] = super().get_fields()
+        return {
+            name: copy.deepcopy(field)
+            for name, field in prototype.items()
+            if self._keep_field(name)
+        }
+
+
+class DynamicFieldsModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes additional `fields` and `exclude` arguments
+    that control which fields should be displayed.
+
+    Set `cache_representation = True` to cache each instance's output under
+    (model, pk, `updated_at`, field set, `representation_cache_version`).
+    Saving a row moves its `updated_at`, so stale entries are simply never
+    read again and expire. Only enable it when the output depends on the
+    row's own columns alone: changes to related rows or to the request are
+    not part of the key. Bump `representation_cache_version` whenever the
+    output format changes.
+    """
+
+    cache_representation = False
+    representation_cache_version = 1
+    representation_cache_timeout = 60 * 60 * 24
+    representation_cache_timestamp_field = "updated_at"
 
     @cached_property
     def request(self):
         return self.context.get("request")
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        meta = getattr(cls, "Meta", None)
+        if hasattr(meta, "list_serializer_class"):
+            return super().many_init(*args, **kwargs)
 
-class DynamicFieldsSerializer(serializers.Serializer):
-    """
-    A Serializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
-    """
+        # Same split of arguments as `BaseSerializer.many_init`.
+        list_kwargs = {}
+        for key in serializers.LIST_SERIALIZER_KWARGS_REMOVE:
+            value = kwargs.pop(key, None)
+            if value is not None:
+                list_kwargs[key] = value
+        list_kwargs["child"] = cls(*args, **kwargs)
+        list_kwargs.update(
+            {
+                key: value
+                for key, value in kwargs.items()
+                if key in serializers.LIST_SERIALIZER_KWARGS
+            }
+        )
+        return cls.get_list_serializer_class()(*args, **list_kwargs)
 
-    def __init__(self, *args, **kwargs):
-        # Don't pass the 'fields' arg up to the superclass
-        fields = kwargs.pop("fields", None)
+    @classmethod
+    def get_list_serializer_class(cls):
+        """List serializer used with `many=True` unless `Meta` sets one."""
+        if cls.cache_representation:
+            return RepresentationCacheListSerializer
+        return GenericForeignKeyListSerializer
 
-        # Instantiate the superclass normally
-        super().__init__(*args, **kwargs)
+    @cached_property
+    def representation_cache_prefix(self):
+        model = self.Meta.model
+        signature = [
+            f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+            self.representation_cache_version,
+            *self.fields,
+        ]
+        digest = hashlib.sha1(repr(signature).encode()).hexdigest()
+        return f"repr:{model._meta.label_lower}:{digest}"
+
+    def get_representation_cache_key(self, instance):
+        """Return the cache key of `instance`, or None if it is not cacheable."""
+        if not self.cache_representation:
+            return None
+        timestamp = getattr(instance, self.representation_cache_timestamp_field, None)
+        if instance.pk is None or timestamp is None:
+            return None
+        return (
+            f"{self.representation_cache_prefix}:{instance.pk}:{timestamp.isoformat()}"
+        )
+
+    def to_representation_uncached(self, instance):
+        return super().to_representation(instance)
+
+    def to_representation(self, instance):
+        key = self.get_representation_cache_key(instance)
+        if key is None:
+            return self.to_representation_uncached(instance)
+        representation = get_cache(key)
+        if representation is None:
+            representation = self.to_representation_uncached(instance)
+            set_cache(key, representation, timeout=self.representation_cache_timeout)
+        return representation
 
-        if fields is not None:
-            # Drop any fields that are not specified in the `fields` argument.
-            allowed = set(fields)
-            existing = set(self.fields.keys())
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+
+class DynamicFieldsSerializer(DynamicFieldsMixin, serializers.Serializer):
+    """
+    A Serializer that takes additional `fields` and `exclude` arguments
+    that control which fields should be displayed.
+    """
 
     def update(self, instance, validated_data):
         pass
@@ -81,11 +378,94 @@ class DynamicFieldsSerializer(serializers.Serializer):
         pass
 
 
+class ValuesListSerializer(GenericForeignKeyListSerializer):
+    """
+    List serializer for `DynamicFieldsReadOnlyModelSerializer`.
+
+    An unevaluated queryset whose fields all compile is read with
+    `values_list()` and converted column by column, without building model
+    instances or running DRF fields. Anything else (a page of instances, a
+    serializer with fields that do not compile) goes through the child's
+    `to_representation`, which still uses the compiled fields it has.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        compiled = self.child.compiled_fields
+        if (
+            isinstance(data, models.QuerySet)
+            and data._result_cache is None
+            and None not in compiled.values()
+        ):
+            return self.values_representation(data, list(compiled.values()))
+        return super().to_representation(data)
+
+    def values_representation(self, queryset, compiled):
+        lookups = list(dict.fromkeys(field.lookup for field in compiled))
+        columns = [
+            (field.name, lookups.index(field.lookup), field.convert)
+            for field in compiled
+        ]
+        rows = queryset.prefetch_related(None).values_list(*lookups)
+        return [
+            {
+                name: None if row[index] is None else convert(row[index])
+                for name, index, convert in columns
+            }
+            for row in rows
+        ]
+
+
 class DynamicFieldsReadOnlyModelSerializer(DynamicFieldsModelSerializer):
     """
     Use this serializer for Public serializers, where the data is limited and read only.  # noqa: E501
+
+    Plain column fields are compiled once per serializer into a column lookup
+    and a converter (see `core.serializers.compiled`), and lists of a
+    queryset are read with `values_list()`; output is the same as DRF's.
     """
 
+    @classmethod
+    def get_list_serializer_class(cls):
+        if cls.cache_representation:
+            return super().get_list_serializer_class()
+        return ValuesListSerializer
+
+    @cached_property
+    def compiled_fields(self):
+        """Map of readable field name to its compiled form, or None."""
+        model = self.Meta.model
+        return {
+            field.field_name: compile_field(model, field)
+            for field in self._readable_fields
+        }
+
+    def to_representation_uncached(self, instance):
+        ret = {}
+        for field in self._readable_fields:
+            compiled = self.compiled_fields[field.field_name]
+            if compiled is not None:
+                value = instance.__dict__.get(compiled.lookup, _missing)
+                if value is not _missing:
+                    ret[field.field_name] = (
+                        None if value is None else compiled.convert(value)
+                    )
+                    continue
+            # Not compiled, or a deferred column: DRF's own path.
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = (
+                attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            )
+            if check_for_none is None:
+                ret[field.field_name] = None
+            else:
+                ret[field.field_name] = field.to_representation(attribute)
+        return ret
+
     def create(self, validated_data):
         raise serializers.ValidationError(
             "Read-only serializer does not have write access"
@@ -107,3 +487,207 @@ class DummySerializer(serializers.Serializer):
 
     def create(self, validated_data):
         pass
+
+
+class BulkListSerializer(GenericForeignKeyListSerializer):
+    """
+    A ListSerializer that writes all of its items with `bulk_create` /
+    `bulk_update` in batches of `batch_size` instead of one save per item.
+
+    For updates, pass the instances being changed as `instance`; every item
+    in `data` must carry the `lookup_field` of the row it updates, at most
+    once. Items repeating the unique values of an earlier item are rejected
+    too, as they would abort the whole batch with an IntegrityError.
+
+    Bulk writes skip `Model.save()` and the child's `create()` / `update()`,
+    so models overriding `save()` (e.g. `SlugModel`, `SingletonModel`) and
+    child serializers overriding `create()` / `update()` are saved one item
+    at a time through the child instead, see `can_bulk_write`.
+    """
+
+    batch_size = 500
+    lookup_field = "id"
+    # Classes whose `save()` the bulk writes reproduce (`_stamp_user`), or
+    # whose `save()` only acts after `set_password()`.
+    bulk_save_classes = (models.Model, UpdatedByModel, CuserModel, AbstractBaseUser)
+
+    def __init__(self, *args, **kwargs):
+        self.batch_size = kwargs.pop("batch_size", self.batch_size)
+        self.lookup_field = kwargs.pop("lookup_field", self.lookup_field)
+        super().__init__(*args, **kwargs)
+        self._instance_map = {}
+        if self.instance is not None:
+            self._instance_map = {
+                str(getattr(instance, self.lookup_field)): instance
+                for instance in self.instance
+            }
+        self._validated_instances = []
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    @cached_property
+    def can_bulk_write(self):
+        child = type(self.child)
+        if (
+            child.create is not serializers.ModelSerializer.create
+            or child.update is not serializers.ModelSerializer.update
+        ):
+            return False
+        return all(
+            "save" not in vars(klass) or klass in self.bulk_save_classes
+            for klass in self.model.__mro__
+        )
+
+    @cached_property
+    def unique_field_sets(self):
+        """Field names whose values must be unique together, per constraint."""
+        opts = self.model._meta
+        field_sets = [
+            (field.name,)
+            for field in opts.concrete_fields
+            if field.unique and not field.primary_key
+        ]
+        field_sets += [tuple(names) for names in opts.unique_together]
+        field_sets += [
+            tuple(constraint.fields) for constraint in opts.total_unique_constraints
+        ]
+        return field_sets
+
+    def to_internal_value(self, data):
+        self._validated_instances = []
+        self._seen_lookups = set()
+        self._seen_unique = defaultdict(set)
+        return super().to_internal_value(data)
+
+    def check_unique_in_payload(self, attrs, instance=None):
+        """
+        Raise if an earlier item of the payload has the same values for
+        one of `unique_field_sets`; the database checks only see the rows
+        that are already saved.
+        """
+        seen = []
+        for names in self.unique_field_sets:
+            values = tuple(
+                attrs[name] if name in attrs else getattr(instance, name, None)
+                for name in names
+            )
+            # NULLs never collide.
+            if any(value is None for value in values):
+                continue
+            if values in self._seen_unique[names]:
+                key = names[0] if len(names) == 1 else "non_field_errors"
+                raise serializers.ValidationError(
+                    {key: [f"Another item has the same {', '.join(names)}."]}
+                )
+            seen.append((names, values))
+        for names, values in seen:
+            self._seen_unique[names].add(values)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            validated = super().run_child_validation(data)
+            self.check_unique_in_payload(validated)
+            return validated
+
+        lookup = data.get(self.lookup_field) if isinstance(data, dict) else None
+        if lookup is None:
+            raise serializers.ValidationError(
+                {self.lookup_field: ["This field is required."]}
+            )
+        if str(lookup) in self._seen_lookups:
+            raise serializers.ValidationError(
+                {self.lookup_field: ["Another item updates the same row."]}
+            )
+        self._seen_lookups.add(str(lookup))
+        instance = self._instance_map.get(str(lookup))
+        if instance is None:
+            raise serializers.ValidationError({self.lookup_field: ["Not found."]})
+
+        self.child.instance = instance
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        self.check_unique_in_payload(validated, instance)
+        self._validated_instances.append(instance)
+        return validated
+
+    def _split_many_to_many(self, attrs):
+        many_to_many = {}
+        for field in self.model._meta.many_to_many:
+            if field.name in attrs:
+                many_to_many[field.name] = attrs.pop(field.name)
+        return many_to_many
+
+    def _stamp_user(self, instance, adding):
+        user = CuserMiddleware.get_user()
+        if not (user and user.is_authenticated):
+            return []
+        stamped = []
+        if isinstance(instance, UpdatedByModel):
+            instance.updated_by = user
+            stamped.append("updated_by")
+        if adding and isinstance(instance, CuserModel):
+            instance.created_by = user
+            stamped.append("created_by")
+        return stamped
+
+    def create(self, validated_data):
+        if not self.can_bulk_write:
+            return [self.child.create(attrs) for attrs in validated_data]
+
+        instances, many_to_many = [], []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            many_to_many.append(self._split_many_to_many(attrs))
+            instance = self.model(**attrs)
+            self._stamp_user(instance, adding=True)
+            instances.append(instance)
+
+        instances = self.model._default_manager.bulk_create(
+            instances, batch_size=self.batch_size
+        )
+        for instance, relations in zip(instances, many_to_many):
+            for name, value in relations.items():
+                getattr(instance, name).set(value)
+        # `bulk_create` sends no post_save signals.
+        bump_version_on_commit(self.model)
+        return instances
+
+    def update(self, instances, validated_data):
+        if not self.can_bulk_write:
+            return [
+                self.child.update(instance, attrs)
+                for instance, attrs in zip(self._validated_instances, validated_data)
+            ]
+
+        # `bulk_update` skips `save()`, so `auto_now` fields and the
+        # `updated_by` stamp have to be applied here.
+        auto_now_fields = [
+            field.name
+            for field in self.model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        now = timezone.now()
+        update_fields = set(auto_now_fields)
+        updated = []
+        for instance, attrs in zip(self._validated_instances, validated_data):
+            attrs = dict(attrs)
+            relations = self._split_many_to_many(attrs)
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+                update_fields.add(name)
+            for name in auto_now_fields:
+                setattr(instance, name, now)
+            update_fields.update(self._stamp_user(instance, adding=False))
+            for name, value in relations.items():
+                getattr(instance, name).set(value)
+            updated.append(instance)
+
+        if update_fields:
+            self.model._default_manager.bulk_update(
+                updated, list(update_fields), batch_size=self.batch_size
+            )
+        # `bulk_update` sends no post_save signals.
+        bump_version_on_commit(self.model)
+        return updated
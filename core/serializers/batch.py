@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=["GET", "POST", "PUT", "PATCH", "DELETE"], default="GET"
+    )
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_method(self, value):
+        return value.upper()
+
+    def validate_path(self, value):
+        if not value.startswith("/"):
+            raise serializers.ValidationError("Path must start with '/'.")
+        return value
+
+
+class BatchResponseItemSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    body = serializers.JSONField()
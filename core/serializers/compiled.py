@@ -0,0 +1,82 @@
+"""
+Compilation of simple serializer fields into plain `(lookup, convert)` pairs.
+
+A field compiles when its output is a pure function of one of the model's
+own columns: `lookup` is the column to read (usable with `values()`) and
+`convert` turns a non-null column value into the field's output, exactly as
+the field's `to_representation` would. Anything else (method fields, nested
+serializers, dotted or `*` sources, properties, files, hyperlinks) does not
+compile and keeps DRF's normal path.
+"""
+
+from typing import Any, Callable, NamedTuple, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+# Fields whose `to_representation` only looks at the value itself.
+SIMPLE_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.DurationField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.JSONField,
+    serializers.ReadOnlyField,
+    serializers.TimeField,
+    serializers.UUIDField,
+)
+
+# Same result as the field's own `to_representation`, without the method call.
+TRIVIAL_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.SlugField: str,
+    serializers.URLField: str,
+    serializers.IntegerField: int,
+}
+
+
+class CompiledField(NamedTuple):
+    name: str
+    lookup: str
+    convert: Callable[[Any], Any]
+
+
+def _identity(value):
+    return value
+
+
+def compile_field(model, field) -> Optional[CompiledField]:
+    """
+    Compile a bound serializer `field` of a serializer for `model`.
+
+    Returns:
+        The compiled field, or None when it must go through DRF
+    """
+    if field.write_only or field.source == "*" or len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete:
+        return None
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if not (model_field.many_to_one or model_field.one_to_one):
+            return None
+        # The `<fk>_id` column is what DRF renders through `PKOnlyObject`.
+        convert = field.pk_field.to_representation if field.pk_field else _identity
+        return CompiledField(field.field_name, model_field.attname, convert)
+
+    if model_field.is_relation or not isinstance(field, SIMPLE_FIELDS):
+        return None
+    convert = TRIVIAL_CONVERTERS.get(type(field), field.to_representation)
+    if isinstance(field, serializers.ReadOnlyField):
+        convert = _identity
+    return CompiledField(field.field_name, model_field.attname, convert)
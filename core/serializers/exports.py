@@ -0,0 +1,32 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from core.models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "uuid",
+            "status",
+            "export_format",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "error",
+            "created_at",
+            "completed_at",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if not obj.file:
+            return None
+        request = self.context.get("request")
+        url = reverse("export-job-download", kwargs={"uuid": obj.uuid})
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,109 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from core.authentication import invalidate_cached_user
+from core.cache import bump_model_version
+from core.models import TimeStampModel, Tombstone, is_soft_deleted
+
+# Models whose writes bump their version token, see `register_versioned_models`
+versioned_models = set()
+
+
+def bump_version_on_commit(model):
+    if model not in versioned_models:
+        return
+    # Bump after commit, otherwise a read between the bump and the commit
+    # would cache the old rows under the new version.
+    transaction.on_commit(lambda: bump_model_version(model))
+
+
+def bump_version_on_write(sender, **kwargs):
+    if kwargs.get("raw"):
+        return
+    bump_version_on_commit(sender)
+
+
+def register_versioned_models(*models):
+    """
+    Bump the version token of `models` whenever one of their rows is written.
+
+    Only models something is cached against (e.g. a list cache, see
+    `ListViewSetMixin.list_cache_timeout`) need this, writes to the others
+    cost no cache round trip. `VERSIONED_MODELS` is registered when the app
+    loads, so web and worker processes alike bump it.
+
+    Args:
+        models: Model classes or "app_label.ModelName" labels
+    """
+    for model in models:
+        if isinstance(model, str):
+            model = apps.get_model(model)
+        if model in versioned_models:
+            continue
+        versioned_models.add(model)
+        label = model._meta.label_lower
+        post_save.connect(
+            bump_version_on_write,
+            sender=model,
+            dispatch_uid=f"core_bump_version_on_save:{label}",
+        )
+        post_delete.connect(
+            bump_version_on_write,
+            sender=model,
+            dispatch_uid=f"core_bump_version_on_delete:{label}",
+        )
+
+
+@receiver(m2m_changed, dispatch_uid="core_bump_version_on_m2m_change")
+def bump_version_on_m2m_change(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        bump_version_on_commit(instance.__class__)
+        if kwargs.get("model") is not None:
+            bump_version_on_commit(kwargs["model"])
+
+
+@receiver(
+    post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid="core_invalidate_user_save"
+)
+@receiver(
+    post_delete,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="core_invalidate_user_delete",
+)
+def invalidate_user_on_write(sender, instance, **kwargs):
+    """
+    Drop everything cached against a user (authentication, `/auth/me`) when
+    it is saved, which includes deactivating or archiving it, or deleted.
+    """
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_delete, dispatch_uid="core_tombstone_on_delete")
+def record_tombstone(sender, instance, **kwargs):
+    if issubclass(sender, TimeStampModel):
+        Tombstone.objects.record(instance)
+
+
+@receiver(post_save, dispatch_uid="core_track_soft_delete")
+def track_soft_delete(sender, instance, created, **kwargs):
+    """
+    Record a tombstone when a save soft deletes a `TimeStampModel` row and
+    drop it when the row is restored. Only flips are written, judged against
+    the state the row was loaded with; `QuerySet.update()` and
+    `bulk_update()` send no signals and are not tracked.
+    """
+    if kwargs.get("raw") or not issubclass(sender, TimeStampModel):
+        return
+    soft_deleted = is_soft_deleted(instance)
+    if soft_deleted == getattr(instance, "_loaded_soft_deleted", False):
+        return
+    if soft_deleted:
+        Tombstone.objects.record(instance, soft=True)
+    elif not created:
+        Tombstone.objects.clear(instance)
+    instance._loaded_soft_deleted = soft_deleted
@@ -0,0 +1,148 @@
+import csv
+import logging
+import os
+import shutil
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from celery import chord, shared_task
+from core.constants import ExportFormatChoice, ExportStatusChoice
+from core.exports import (
+    build_export_request,
+    filter_export_range,
+    get_export_fields,
+    get_export_header,
+    get_export_ranges,
+    iter_export_rows,
+    read_part,
+    write_part,
+    write_xlsx,
+)
+from core.models import ExportJob
+from core.sync import prune_tombstones as prune
+from core.utils.queryset import get_related_plan
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = "exports"
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 10000)
+
+
+def _get_export_serializer(job):
+    context = {}
+    if job.request_data:
+        context["request"] = build_export_request(job.request_data, job.created_by)
+    serializer = import_string(job.serializer_class)(context=context)
+    header = get_export_header(get_export_fields(serializer, job.fields))
+    return serializer, header
+
+
+def _get_parts_dir(job):
+    return os.path.join(settings.MEDIA_ROOT, EXPORT_DIR, str(job.uuid))
+
+
+def _fail_export(job_id, exc):
+    logger.error(f"Export job {job_id} failed: {exc}", exc_info=True)
+    ExportJob.objects.filter(id=job_id).update(
+        status=ExportStatusChoice.FAILED, error=str(exc)
+    )
+
+
+@shared_task
+def start_export(job_id):
+    """
+    Split the job's queryset into keyset ranges and render them in parallel.
+
+    Each range is rendered by `export_chunk` on whichever worker picks it up;
+    `merge_export_chunks` runs once all of them have finished.
+    """
+    try:
+        job = ExportJob.objects.get(id=job_id)
+        ranges = get_export_ranges(job.get_queryset(), EXPORT_CHUNK_SIZE)
+        total_rows = job.get_queryset().count()
+        ExportJob.objects.filter(id=job_id).update(
+            status=ExportStatusChoice.RUNNING, total_rows=total_rows
+        )
+    except Exception as e:
+        _fail_export(job_id, e)
+        raise
+
+    chunks = [
+        export_chunk.s(job_id, index, lower, upper)
+        for index, (lower, upper) in enumerate(ranges)
+    ]
+    if not chunks:
+        return merge_export_chunks.delay([], job_id)
+    return chord(chunks)(merge_export_chunks.s(job_id))
+
+
+@shared_task
+def export_chunk(job_id, index, lower, upper):
+    """Render one keyset range of the job to a JSON lines part file."""
+    try:
+        job = ExportJob.objects.get(id=job_id)
+        serializer, _ = _get_export_serializer(job)
+        queryset = filter_export_range(job.get_queryset(), lower, upper)
+        # Prefetch lookups are not part of the pickled query, plan them again.
+        select, prefetch = get_related_plan(queryset.model, serializer)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        parts_dir = _get_parts_dir(job)
+        os.makedirs(parts_dir, exist_ok=True)
+        path = os.path.join(parts_dir, f"part-{index:05d}.jsonl")
+        with open(path, "w") as file:
+            count = write_part(iter_export_rows(queryset, serializer), file)
+        ExportJob.objects.filter(id=job_id).update(
+            processed_rows=F("processed_rows") + count
+        )
+        return path
+    except Exception as e:
+        _fail_export(job_id, e)
+        raise
+
+
+@shared_task
+def merge_export_chunks(part_paths, job_id):
+    """Merge the rendered parts, in range order, into the final export file."""
+    try:
+        job = ExportJob.objects.get(id=job_id)
+        _, header = _get_export_serializer(job)
+        name = os.path.join(EXPORT_DIR, f"{job.uuid}.{job.export_format}")
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def rows():
+            for part_path in sorted(part_paths):
+                with open(part_path) as part:
+                    yield from read_part(part)
+
+        if job.export_format == ExportFormatChoice.XLSX:
+            with open(path, "wb") as file:
+                write_xlsx(header, rows(), file)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(rows())
+
+        shutil.rmtree(_get_parts_dir(job), ignore_errors=True)
+        ExportJob.objects.filter(id=job_id).update(
+            status=ExportStatusChoice.COMPLETED,
+            file=name,
+            completed_at=timezone.now(),
+        )
+    except Exception as e:
+        _fail_export(job_id, e)
+        raise
+
+
+@shared_task(ignore_result=True)
+def prune_tombstones():
+    """Delete the tombstones incremental syncs no longer need."""
+    deleted = prune()
+    logger.info(f"Pruned {deleted} tombstones")
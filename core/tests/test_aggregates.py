@@ -0,0 +1,235 @@
+import unittest
+
+from django.db import NotSupportedError, connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.db.models import OuterRef, Q
+from django.test import SimpleTestCase, TestCase
+
+from core.models import ExportJob
+from core.utils.aggregates import (
+    ArrayAgg,
+    JSONObjectAgg,
+    StringAgg,
+    subquery_array,
+    subquery_count,
+    subquery_json_array,
+    subquery_string,
+    supports_aggregate_order_by,
+)
+from core.utils.common import GroupConcat
+from users.models import CustomUser
+
+postgres = DatabaseWrapper({}, alias="postgres")
+# Compiled without a server; some expressions depend on its version.
+postgres.pg_version = 140000
+
+
+def compile_sql(queryset):
+    return queryset.query.get_compiler(connection=postgres).as_sql()
+
+
+class AggregateTest(TestCase):
+    def setUp(self):
+        self.ram = CustomUser.objects.create(email="ram@example.com", first_name="Ram")
+        self.sita = CustomUser.objects.create(email="sita@example.com")
+        for status, fields in [("pending", ["a"]), ("failed", None), ("pending", [])]:
+            ExportJob.objects.create(
+                query=b"",
+                serializer_class="",
+                status=status,
+                fields=fields,
+                created_by=self.ram,
+            )
+        self.jobs = ExportJob.objects.filter(created_by=OuterRef("pk"))
+
+    def annotate(self, **annotations):
+        return list(CustomUser.objects.order_by("id").values("email", **annotations))
+
+    def test_group_by_aggregates(self):
+        row = (
+            ExportJob.objects.values("created_by")
+            .annotate(
+                statuses=StringAgg("status", "; ", distinct=True),
+                ids=ArrayAgg("id"),
+                by_id=JSONObjectAgg("id", "fields"),
+                legacy=GroupConcat("status"),
+            )
+            .get()
+        )
+        self.assertEqual(sorted(row["statuses"].split("; ")), ["failed", "pending"])
+        ids = sorted(ExportJob.objects.values_list("id", flat=True))
+        self.assertEqual(sorted(row["ids"]), ids)
+        self.assertEqual(
+            row["by_id"], {str(ids[0]): ["a"], str(ids[1]): None, str(ids[2]): []}
+        )
+        self.assertEqual(sorted(row["legacy"].split(", ")), ["failed", "pending"])
+
+    def test_no_rows(self):
+        self.assertEqual(
+            ExportJob.objects.none().aggregate(
+                ids=ArrayAgg("id"), statuses=StringAgg("status")
+            ),
+            {"ids": None, "statuses": None},
+        )
+        self.assertEqual(
+            ExportJob.objects.filter(status="done").aggregate(
+                ids=ArrayAgg("id"),
+                statuses=StringAgg("status", distinct=True),
+                by_id=JSONObjectAgg("id", "status"),
+            ),
+            {"ids": None, "statuses": None, "by_id": None},
+        )
+
+    def test_filter(self):
+        pending = Q(status="pending")
+        result = ExportJob.objects.aggregate(
+            ids=ArrayAgg("id", filter=~pending),
+            statuses=StringAgg("status", "/", distinct=True, filter=pending),
+        )
+        self.assertEqual(result["ids"], [ExportJob.objects.get(status="failed").id])
+        self.assertEqual(result["statuses"], "pending")
+
+    def test_subqueries(self):
+        rows = self.annotate(
+            count=subquery_count(self.jobs),
+            statuses=subquery_string(self.jobs, "status", distinct=True),
+            ids=subquery_array(self.jobs, "id"),
+            jobs=subquery_json_array(self.jobs, "status", "fields"),
+        )
+        self.assertEqual(
+            [(row["count"], row["statuses"], row["ids"]) for row in rows[1:]],
+            [(0, "", [])],
+        )
+        self.assertEqual(rows[0]["count"], 3)
+        # DISTINCT gives no order without `order_by`.
+        self.assertEqual(sorted(rows[0]["statuses"].split(", ")), ["failed", "pending"])
+        self.assertEqual(len(rows[0]["ids"]), 3)
+        self.assertCountEqual(
+            rows[0]["jobs"],
+            [
+                {"status": "pending", "fields": []},
+                {"status": "pending", "fields": ["a"]},
+                {"status": "failed", "fields": None},
+            ],
+        )
+        self.assertEqual(rows[1]["jobs"], [])
+
+    def test_nested_subqueries(self):
+        users = CustomUser.objects.filter(pk=OuterRef("created_by"))
+        jobs = ExportJob.objects.filter(status="failed").values(
+            "status",
+            user=subquery_json_array(users, "email", count=subquery_count(self.jobs)),
+        )
+        self.assertEqual(
+            list(jobs),
+            [{"status": "failed", "user": [{"email": "ram@example.com", "count": 3}]}],
+        )
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.annotate(jobs=subquery_json_array(self.jobs, "id", "status"))
+
+    @unittest.skipIf(
+        supports_aggregate_order_by(connection), "Aggregate ORDER BY is supported."
+    )
+    def test_order_by_not_supported(self):
+        with self.assertRaises(NotSupportedError):
+            self.annotate(ids=subquery_array(self.jobs.order_by("id"), "id"))
+
+    @unittest.skipUnless(
+        supports_aggregate_order_by(connection), "Aggregate ORDER BY is unsupported."
+    )
+    def test_order_by(self):
+        rows = self.annotate(
+            ids=subquery_array(self.jobs.order_by("-id"), "id"),
+            statuses=subquery_string(self.jobs.order_by("status"), "status"),
+        )
+        ids = list(ExportJob.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(rows[0]["ids"], ids)
+        self.assertEqual(rows[0]["statuses"], "failed, pending, pending")
+
+
+class PostgresAggregateTest(SimpleTestCase):
+    def test_string_agg(self):
+        sql, params = compile_sql(
+            ExportJob.objects.values("created_by").annotate(
+                statuses=StringAgg(
+                    "status", "; ", distinct=True, order_by="status", filter=Q(id=1)
+                ),
+                ids=StringAgg("id"),
+            )
+        )
+        self.assertIn(
+            'STRING_AGG(DISTINCT "core_exportjob"."status", %s ORDER BY '
+            '"core_exportjob"."status") FILTER (WHERE "core_exportjob"."id" = %s)',
+            sql,
+        )
+        self.assertIn('STRING_AGG(("core_exportjob"."id")::text, %s)', sql)
+        self.assertEqual(params[:3], ("; ", 1, ", "))
+
+    def test_distinct_order_by_follows_cast(self):
+        sql, _ = compile_sql(
+            ExportJob.objects.values("created_by").annotate(
+                ids=StringAgg("id", distinct=True, order_by="-id"),
+                grouped=GroupConcat("id", ordering="id"),
+            )
+        )
+        self.assertIn(
+            'STRING_AGG(DISTINCT ("core_exportjob"."id")::text, %s ORDER BY '
+            '("core_exportjob"."id")::text DESC)',
+            sql,
+        )
+        self.assertIn(
+            'STRING_AGG(DISTINCT ("core_exportjob"."id")::text, %s ORDER BY '
+            '("core_exportjob"."id")::text)',
+            sql,
+        )
+
+    def test_distinct_order_by_other_expression(self):
+        for aggregate in [
+            StringAgg("status", distinct=True, order_by="id"),
+            ArrayAgg("status", distinct=True, order_by="-id"),
+        ]:
+            with self.subTest(aggregate=aggregate), self.assertRaises(ValueError):
+                compile_sql(
+                    ExportJob.objects.values("created_by").annotate(value=aggregate)
+                )
+
+    def test_distinct_subquery_orders_by_value(self):
+        jobs = ExportJob.objects.filter(created_by=OuterRef("pk"))
+        sql, _ = compile_sql(
+            CustomUser.objects.annotate(
+                statuses=subquery_string(jobs.order_by("-id"), "status", distinct=True),
+                ids=subquery_array(jobs.order_by("-id"), "id", distinct=True),
+            )
+        )
+        self.assertIn('STRING_AGG(DISTINCT U0."status", %s ORDER BY U0."status")', sql)
+        self.assertIn('JSONB_AGG(DISTINCT U0."id" ORDER BY U0."id" DESC)', sql)
+
+    def test_json_aggregates(self):
+        sql, _ = compile_sql(
+            ExportJob.objects.values("created_by").annotate(
+                ids=ArrayAgg("id", order_by="-id"),
+                by_id=JSONObjectAgg("id", "fields"),
+            )
+        )
+        self.assertIn(
+            'JSONB_AGG("core_exportjob"."id" ORDER BY "core_exportjob"."id" DESC)', sql
+        )
+        self.assertIn(
+            'JSONB_OBJECT_AGG(("core_exportjob"."id")::text, '
+            '"core_exportjob"."fields")',
+            sql,
+        )
+
+    def test_subquery(self):
+        jobs = ExportJob.objects.filter(created_by=OuterRef("pk"))
+        sql, _ = compile_sql(
+            CustomUser.objects.annotate(
+                count=subquery_count(jobs),
+                jobs=subquery_json_array(jobs.order_by("id"), "id"),
+            )
+        )
+        self.assertNotIn("GROUP BY", sql)
+        self.assertIn("JSONB_BUILD_OBJECT", sql)
+        self.assertIn('ORDER BY U0."id")', sql)
@@ -0,0 +1,106 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from rest_framework import serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.async_viewsets import (
+    AsyncCreateViewSetMixin,
+    AsyncListAutoCompleteViewSetMixin,
+    AsyncUpdateViewSetMixin,
+)
+from core.constants import ExportStatusChoice
+from core.models import ExportJob
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+
+class AsyncUserViewSet(
+    AsyncListAutoCompleteViewSetMixin, AsyncCreateViewSetMixin, AsyncUpdateViewSetMixin
+):
+    queryset = CustomUser.objects.order_by("id")
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+    autocomplete_fields = ["id", "email"]
+    rename_dict = {"email": "name"}
+
+
+class ExportJobCreatorSerializer(serializers.ModelSerializer):
+    created_by = CustomUserSerializer(read_only=True)
+
+    class Meta:
+        model = ExportJob
+        fields = ["id", "status", "created_by"]
+
+
+class AsyncExportJobViewSet(AsyncUpdateViewSetMixin):
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobCreatorSerializer
+    permission_classes = (AllowAny,)
+
+
+class AsyncViewSetTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        CustomUser.objects.bulk_create(
+            [CustomUser(email=f"user{i}@example.com") for i in range(3)]
+        )
+
+    def call(self, actions, request, **kwargs):
+        view = AsyncUserViewSet.as_view(actions)
+        self.assertTrue(iscoroutinefunction(view))
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_list_paginated(self):
+        response = self.call({"get": "list"}, self.factory.get("/", {"limit": 2}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Fetched successfully")
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["data"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_list_without_pagination(self):
+        request = self.factory.get("/", {"no_pagination": "true"})
+        response = self.call({"get": "list"}, request)
+        self.assertEqual(len(response.data["data"]), 3)
+
+    def test_create(self):
+        request = self.factory.post("/", {"email": "async@example.com"}, format="json")
+        response = self.call({"post": "create"}, request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(CustomUser.objects.filter(email="async@example.com").exists())
+
+    def test_partial_update(self):
+        user = CustomUser.objects.get(email="user0@example.com")
+        request = self.factory.patch("/", {"first_name": "Async"}, format="json")
+        response = self.call({"patch": "partial_update"}, request, pk=user.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["first_name"], "Async")
+
+    def test_update_with_nested_foreign_key(self):
+        user = CustomUser.objects.get(email="user0@example.com")
+        job = ExportJob.objects.create_for_queryset(
+            CustomUser.objects.all(), CustomUserSerializer, created_by=user
+        )
+        request = self.factory.patch(
+            "/", {"status": ExportStatusChoice.FAILED}, format="json"
+        )
+        view = AsyncExportJobViewSet.as_view({"patch": "partial_update"})
+        response = async_to_sync(view)(request, pk=job.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["status"], ExportStatusChoice.FAILED)
+        self.assertEqual(
+            response.data["data"]["created_by"]["email"], "user0@example.com"
+        )
+
+    def test_update_missing_object(self):
+        request = self.factory.patch("/", {"first_name": "Async"}, format="json")
+        response = self.call({"patch": "partial_update"}, request, pk=0)
+        self.assertEqual(response.status_code, 404)
+
+    def test_autocomplete(self):
+        response = self.call({"get": "autocomplete"}, self.factory.get("/"))
+        self.assertEqual(response.data["results"][0]["name"], "user0@example.com")
+
+    def test_sync_action_runs_in_thread(self):
+        response = self.call({"get": "export"}, self.factory.get("/export/"))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,154 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+
+from core import authentication
+from core.authentication import (
+    CachedJWTAuthentication,
+    TokenUserAuthentication,
+    invalidate_cached_user,
+)
+from core.cache import get_versioned_cache
+from core.models import ExportJob
+from users.api.v1.serializers.auth import CustomTokenObtainPairSerializer
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+
+class WhoAmIView(APIView):
+    authentication_classes = (CachedJWTAuthentication,)
+
+    def get(self, request):
+        return Response({"pk": request.user.pk, "email": request.user.email})
+
+
+class TokenUserView(APIView):
+    authentication_classes = (TokenUserAuthentication,)
+
+    def get(self, request):
+        return Response({"pk": request.user.pk, "is_admin": request.user.is_admin})
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        authentication._local_users.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(authentication._local_users.clear)
+        self.user = CustomUser.objects.create_user("ram@example.com", "password")
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user)
+
+    def get(self, view=WhoAmIView, token=None):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+        return view.as_view()(request)
+
+    def test_user_is_cached(self):
+        self.assertEqual(self.get().data["pk"], self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+
+        # Other processes read the shared cache.
+        authentication._local_users.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().data["email"], "ram@example.com")
+
+    def test_local_entries_expire(self):
+        self.get()
+        with mock.patch.object(
+            authentication.time, "monotonic", return_value=10**9
+        ), self.assertNumQueries(0):
+            # Expired locally, still in the shared cache.
+            self.get()
+        with self.settings(AUTH_USER_LOCAL_CACHE_TTL=0):
+            authentication._local_users.clear()
+            self.get()
+            self.assertEqual(authentication._local_users, {})
+
+    def test_deactivation_and_archive_invalidate(self):
+        self.get()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+        self.user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.soft_delete(archive=True)
+        with self.assertNumQueries(1):
+            self.get()
+
+    def test_archived_user_is_rejected(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(archive=True)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_password_is_not_cached(self):
+        self.get()
+        _, cached = get_versioned_cache(
+            authentication.get_user_cache_key(self.user.uuid),
+            CustomUser,
+            str(self.user.uuid),
+        )
+        self.assertNotIn("password", cached.__dict__)
+        self.assertTrue(cached.check_password("password"))
+
+    @mock.patch.object(authentication.api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_password_change_revokes_tokens(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(token=token).status_code, 200)
+        self.user.set_password("changed")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get(token=token).status_code, 401)
+
+    def test_deleted_user(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_user_read_before_an_invalidation_is_not_served(self):
+        authentication._local_users.clear()
+        queryset_filter = CustomUser.objects.filter
+
+        def filter_while_user_changes(**kwargs):
+            invalidate_cached_user(self.user.uuid)
+            return queryset_filter(**kwargs)
+
+        with mock.patch.object(
+            CustomUser.objects, "filter", side_effect=filter_while_user_changes
+        ):
+            self.get()
+        authentication._local_users.clear()
+        with self.assertNumQueries(1):
+            self.get()
+
+    def test_requests_get_their_own_instance(self):
+        first = authentication.get_cached_user(self.user.uuid)
+        first.first_name = "Changed"
+        self.assertIsNone(authentication.get_cached_user(self.user.uuid).first_name)
+
+    def test_token_user(self):
+        with self.assertNumQueries(0):
+            response = self.get(TokenUserView)
+        self.assertEqual(response.data, {"pk": self.user.pk, "is_admin": False})
+
+    def test_export_jobs_use_the_token_user(self):
+        job = ExportJob.objects.create_for_queryset(
+            CustomUser.objects.all(),
+            CustomUserSerializer,
+            fields=["id", "email"],
+            created_by=self.user,
+        )
+        url = reverse("export-job-detail", kwargs={"uuid": job.uuid})
+        response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,56 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import ExportJob
+from users.models import CustomUser
+
+
+@override_settings(BATCH_MAX_WORKERS=1)
+class BatchViewTest(APITestCase):
+    def setUp(self):
+        self.url = reverse("batch")
+        self.user = CustomUser.objects.create_user(
+            email="batch@example.com", password="testpassword123"
+        )
+        self.job = ExportJob.objects.create(
+            query=b"", serializer_class="", created_by=self.user
+        )
+
+    def test_requires_authentication(self):
+        response = self.client.post(self.url, [], format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_sub_requests_share_authentication(self):
+        self.client.force_authenticate(self.user)
+        payload = [
+            {"method": "GET", "path": f"/api/v1/exports/{self.job.uuid}/"},
+            {"path": "/api/v1/exports/00000000-0000-0000-0000-000000000000/"},
+            {"method": "POST", "path": "/api/v1/users/auth/me/", "body": {}},
+            {"path": "/does-not-exist/"},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        results = response.data["data"]
+        self.assertEqual([result["status"] for result in results], [200, 404, 400, 404])
+        self.assertEqual(results[0]["body"]["data"]["uuid"], str(self.job.uuid))
+        self.assertEqual(results[2]["body"]["message"], "No token Provided")
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_cap_on_sub_requests(self):
+        self.client.force_authenticate(self.user)
+        payload = [{"path": "/api/v1/"}] * 3
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_api_views_are_rejected(self):
+        self.client.force_authenticate(self.user)
+        payload = [{"path": "/admin/"}]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.data["data"][0]["status"], 400)
+
+    def test_nested_batches_are_rejected(self):
+        self.client.force_authenticate(self.user)
+        payload = [{"method": "POST", "path": "/api/v1/batch/", "body": []}]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.data["data"][0]["status"], 400)
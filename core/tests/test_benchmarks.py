@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.benchmarks import autodiscover
+from users.models import CustomUser
+
+
+class BenchmarkCommandTest(TestCase):
+    def test_runs_every_benchmark_and_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark", rows=5, repeat=1, stdout=out)
+        for name in autodiscover():
+            self.assertIn(name, out.getvalue())
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_unknown_benchmark(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "missing", stdout=StringIO())
@@ -0,0 +1,146 @@
+import csv
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from core.constants import ExportStatusChoice
+from core.exports import filter_export_range, get_export_ranges
+from core.models import ExportJob
+from core.tasks import export_chunk, merge_export_chunks
+from core.viewsets import ListViewSetMixin
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+
+class RequestUserSerializer(serializers.ModelSerializer):
+    exported_by = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CustomUser
+        fields = ["email", "exported_by", "url"]
+
+    def get_exported_by(self, obj):
+        return self.context["request"].user.email
+
+    def get_url(self, obj):
+        return self.context["request"].build_absolute_uri(f"/users/{obj.pk}/")
+
+
+class UserExportViewSet(ListViewSetMixin):
+    queryset = CustomUser.objects.filter(email__startswith="user").order_by("id")
+    serializer_class = RequestUserSerializer
+
+
+class ExportRangesTest(TestCase):
+    def setUp(self):
+        CustomUser.objects.bulk_create(
+            [CustomUser(email=f"user{i}@example.com") for i in range(7)]
+        )
+
+    def test_ranges_cover_queryset_once(self):
+        queryset = CustomUser.objects.all()
+        ranges = get_export_ranges(queryset, chunk_size=3)
+        self.assertEqual(len(ranges), 3)
+        self.assertIsNone(ranges[0][0])
+
+        exported = []
+        for lower, upper in ranges:
+            exported += list(
+                filter_export_range(queryset, lower, upper).values_list("pk", flat=True)
+            )
+        self.assertEqual(
+            exported, list(queryset.order_by("pk").values_list("pk", flat=True))
+        )
+
+    def test_empty_queryset(self):
+        self.assertEqual(get_export_ranges(CustomUser.objects.none()), [])
+
+
+class ExportJobTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = CustomUser.objects.create_user(
+            email="owner@example.com", password="testpassword123"
+        )
+        CustomUser.objects.bulk_create(
+            [CustomUser(email=f"user{i}@example.com") for i in range(5)]
+        )
+        self.job = ExportJob.objects.create_for_queryset(
+            CustomUser.objects.filter(email__startswith="user"),
+            CustomUserSerializer,
+            fields=["id", "email"],
+            created_by=self.user,
+        )
+
+    def test_chunks_are_merged_into_one_file(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            ranges = get_export_ranges(self.job.get_queryset(), chunk_size=2)
+            parts = [
+                export_chunk(self.job.id, index, lower, upper)
+                for index, (lower, upper) in enumerate(ranges)
+            ]
+            merge_export_chunks(parts, self.job.id)
+
+            self.job.refresh_from_db()
+            self.assertEqual(self.job.status, ExportStatusChoice.COMPLETED)
+            self.assertEqual(self.job.processed_rows, 5)
+            with self.job.file.open("r") as file:
+                rows = list(csv.reader(file))
+        self.assertEqual(rows[0], ["ID", "Email Address"])
+        self.assertEqual(len(rows), 6)
+
+    def test_status_endpoint_is_scoped_to_owner(self):
+        url = reverse("export-job-detail", kwargs={"uuid": self.job.uuid})
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["status"], ExportStatusChoice.PENDING)
+
+        other = CustomUser.objects.get(email="user0@example.com")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_download_before_completion(self):
+        url = reverse("export-job-download", kwargs={"uuid": self.job.uuid})
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, 409)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+    def test_export_job_end_to_end(self):
+        request = APIRequestFactory().post("/api/users/export/jobs/")
+        force_authenticate(request, user=self.user)
+        view = UserExportViewSet.as_view({"post": "export_job"})
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = view(request)
+            self.assertEqual(response.status_code, 202)
+            uuid = response.data["data"]["uuid"]
+            self.assertEqual(ExportJob.objects.get(uuid=uuid).created_by, self.user)
+
+            self.client.force_authenticate(self.user)
+            response = self.client.get(
+                reverse("export-job-detail", kwargs={"uuid": uuid})
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.data["data"]["status"], ExportStatusChoice.COMPLETED
+            )
+
+            response = self.client.get(
+                reverse("export-job-download", kwargs={"uuid": uuid})
+            )
+            self.assertEqual(response.status_code, 200)
+            content = b"".join(response.streaming_content).decode()
+            response.close()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(len(rows), 6)
+        user = CustomUser.objects.get(email=rows[1][0])
+        self.assertEqual(
+            rows[1][1:], ["owner@example.com", f"http://testserver/users/{user.pk}/"]
+        )
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from core.authentication import CachedJWTAuthentication
+from core.jwt_keys import get_signing_keys
+from users.api.v1.serializers.auth import CustomTokenObtainPairSerializer
+from users.models import CustomUser
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+except ImportError:  # pragma: no cover
+    serialization = None
+
+
+@unittest.skipIf(serialization is None, "cryptography is not installed")
+class JWTKeysTest(APITestCase):
+    def setUp(self):
+        self.key_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.key_dir, ignore_errors=True)
+        self.ed25519 = self.write_key("ed25519", ed25519.Ed25519PrivateKey.generate())
+        self.rsa = self.write_key(
+            "rsa", rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        )
+        self.user = CustomUser.objects.create_user("ram@example.com", "password")
+
+    def write_key(self, name, private_key):
+        path = os.path.join(self.key_dir, f"{name}.pem")
+        with open(path, "wb") as f:
+            f.write(
+                private_key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+        return path
+
+    def get_token(self):
+        return CustomTokenObtainPairSerializer.get_token(self.user)
+
+    def is_valid(self, token):
+        try:
+            CachedJWTAuthentication().get_validated_token(token.encode())
+        except InvalidToken:
+            return False
+        return True
+
+    def test_tokens_verify_locally_with_the_jwks(self):
+        with self.settings(JWT_SIGNING_KEY_FILES=[self.ed25519, self.rsa]):
+            token = self.get_token()
+            response = self.client.get(reverse("jwks"))
+            keys = response.json()["keys"]
+
+            header = jwt.get_unverified_header(token)
+            self.assertEqual(header["alg"], "EdDSA")
+            self.assertEqual([key["kid"] for key in keys][0], header["kid"])
+            self.assertEqual([key["alg"] for key in keys], ["EdDSA", "RS256"])
+            self.assertIn("max-age=3600", response["Cache-Control"])
+            self.assertNotIn("d", keys[0])
+
+            # What a peer service does with the published keys.
+            public_key = jwt.PyJWK(keys[0]).key
+            payload = jwt.decode(token, public_key, algorithms=["EdDSA"])
+            self.assertEqual(payload["user_uuid"], str(self.user.uuid))
+
+            response = self.client.post(reverse("get_user"), {"token": token})
+            self.assertEqual(response.status_code, 200)
+
+    def test_hs256_tokens_are_rejected_once_keys_are_set(self):
+        token = jwt.encode(
+            {
+                "user_uuid": str(self.user.uuid),
+                "exp": datetime.now() + timedelta(1),
+                "token_type": "access",
+            },
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        self.assertEqual(
+            self.client.post(reverse("get_user"), {"token": token}).status_code, 200
+        )
+        with self.settings(JWT_SIGNING_KEY_FILES=[self.rsa]):
+            response = self.client.post(reverse("get_user"), {"token": token})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(self.is_valid(token))
+
+    def test_rotation(self):
+        with self.settings(JWT_SIGNING_KEY_FILES=[self.rsa]):
+            old_token = self.get_token()
+        with self.settings(JWT_SIGNING_KEY_FILES=[self.ed25519, self.rsa]):
+            self.assertTrue(self.is_valid(old_token))
+            new_token = self.get_token()
+        with self.settings(JWT_SIGNING_KEY_FILES=[self.ed25519]):
+            self.assertTrue(self.is_valid(new_token))
+            self.assertTrue(self.is_valid(self.get_token()))
+            self.assertFalse(self.is_valid(old_token))
+            response = self.client.post(reverse("get_user"), {"token": old_token})
+            self.assertEqual(response.status_code, 400)
+
+    def test_jwks_is_empty_without_keys(self):
+        self.assertEqual(self.client.get(reverse("jwks")).json(), {"keys": []})
+
+    def test_unsupported_key_type(self):
+        path = self.write_key("ec", ec.generate_private_key(ec.SECP256R1()))
+        with self.settings(JWT_SIGNING_KEY_FILES=[path]):
+            with self.assertRaises(ImproperlyConfigured):
+                get_signing_keys()
@@ -0,0 +1,75 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+
+from core.parsers import JSONParser
+from core.renderers import JSONRenderer
+
+
+class JSONRendererTest(SimpleTestCase):
+    data = {
+        "decimal": decimal.Decimal("1.50"),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "date": datetime.date(2024, 1, 2),
+        "time": datetime.time(10, 30),
+        "duration": datetime.timedelta(minutes=1),
+        "lazy": _("Fetched successfully"),
+        "text": "नमस्ते",
+        "errors": {0: ["This field is required."]},
+        "rows": ({"id": 1}, {"id": 2}),
+    }
+
+    def test_matches_drf_renderer(self):
+        self.assertEqual(
+            JSONRenderer().render(self.data),
+            renderers.JSONRenderer().render(self.data),
+        )
+
+    def test_datetimes_match_drf_renderer(self):
+        data = {
+            "utc": datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+            "naive": datetime.datetime(2024, 1, 1, 10, 30, 0, 500),
+        }
+        with timezone.override("Asia/Kathmandu"):
+            rendered = JSONRenderer().render(data)
+        self.assertEqual(rendered, renderers.JSONRenderer().render(data))
+        self.assertIn(b'"2024-01-01T00:00:00Z"', rendered)
+
+    def test_non_finite_floats(self):
+        # orjson renders them as null, see `core.renderers`.
+        self.assertEqual(
+            JSONRenderer().render({"value": float("nan")}), b'{"value":null}'
+        )
+        with mock.patch("core.renderers.orjson", None):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"value": float("inf")})
+
+    def test_without_orjson(self):
+        with mock.patch("core.renderers.orjson", None):
+            rendered = JSONRenderer().render(self.data)
+        self.assertEqual(rendered, renderers.JSONRenderer().render(self.data))
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            JSONRenderer().render({"value": object()})
+
+    def test_none(self):
+        self.assertEqual(JSONRenderer().render(None), b"")
+
+
+class JSONParserTest(SimpleTestCase):
+    def test_parse(self):
+        stream = io.BytesIO('{"name": "नमस्ते", "ids": [1, 2]}'.encode())
+        self.assertEqual(JSONParser().parse(stream), {"name": "नमस्ते", "ids": [1, 2]})
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            JSONParser().parse(io.BytesIO(b"{invalid"))
@@ -0,0 +1,93 @@
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core import revocation
+from core.revocation import RevocationList, is_token_revoked, revoke_token
+from core.utils.bloom import BloomFilter
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+def new_jti():
+    return uuid.uuid4().hex
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        added = [new_jti() for _ in range(1000)]
+        for item in added:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in added))
+        false_positives = sum(new_jti() in bloom for _ in range(10_000))
+        self.assertLess(false_positives, 300)
+        self.assertEqual(len(bloom), 1000)
+
+
+class RevocationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.exp = time.time() + 60
+
+    def test_revoke(self):
+        jti = new_jti()
+        self.assertFalse(is_token_revoked(jti))
+        self.assertTrue(revoke_token(jti, self.exp))
+        self.assertTrue(is_token_revoked(jti))
+        self.assertFalse(is_token_revoked(None))
+
+    def test_filter_misses_skip_the_cache(self):
+        revoke_token(new_jti(), self.exp)
+        with mock.patch.object(revocation, "get_cache") as get_cache:
+            self.assertFalse(is_token_revoked(new_jti()))
+        get_cache.assert_not_called()
+
+    def test_false_positives_are_confirmed(self):
+        jti = new_jti()
+        revocation.revocation_list.add(jti)
+        self.assertFalse(is_token_revoked(jti))
+
+    def test_expired_tokens_are_not_stored(self):
+        self.assertFalse(revoke_token(new_jti(), time.time() - 1))
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisRevocationTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(revocation, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # `revoke_token` starts the process-wide list against fakeredis.
+        self.addCleanup(revocation.revocation_list.reset)
+        self.exp = time.time() + 60
+
+    def start(self):
+        revocation_list = RevocationList()
+        revocation_list.ensure_started()
+        self.addCleanup(revocation_list.reset)
+        return revocation_list
+
+    def test_workers_load_and_receive_revocations(self):
+        revoked = new_jti()
+        expired = new_jti()
+        self.redis.zadd(revocation.INDEX_KEY, {revoked: self.exp, expired: 1})
+        worker = self.start()
+        self.assertIn(revoked, worker)
+        self.assertEqual(self.redis.zcard(revocation.INDEX_KEY), 1)
+
+        jti = new_jti()
+        revoke_token(jti, self.exp)
+        deadline = time.monotonic() + 5
+        while jti not in worker and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(jti, worker)
@@ -0,0 +1,162 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+from django.urls import include, path
+from rest_framework.permissions import AllowAny
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.models import ExportJob
+from core.operations import CreateTrigramIndex
+from core.serializers import ExportJobSerializer
+from core.utils.common import index_search
+from core.utils.search import get_search_index, search_rank
+from core.utils.trigram import create_index_sql, get_index_name, get_search_fields
+from core.viewsets import ListViewSetMixin
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+# Compiles PostgreSQL SQL without connecting to a server.
+postgres = DatabaseWrapper(
+    {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "search",
+        "USER": "",
+        "PASSWORD": "",
+        "HOST": "",
+        "PORT": "",
+        "OPTIONS": {},
+        "TIME_ZONE": None,
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": False,
+        "AUTOCOMMIT": True,
+        "ATOMIC_REQUESTS": False,
+        "TEST": {},
+    },
+    alias="postgres",
+)
+
+
+def compile_sql(queryset):
+    return queryset.query.get_compiler(connection=postgres).as_sql()
+
+
+class IndexSearchTest(SimpleTestCase):
+    fields = {"split_term_args": ["first_name", "last_name"]}
+
+    def test_icontains_by_default(self):
+        sql, params = compile_sql(
+            CustomUser.objects.filter(index_search("jo smi", **self.fields))
+        )
+        self.assertIn("LIKE", sql)
+        self.assertIn("%jo%", params)
+
+    @override_settings(INDEX_SEARCH_BACKEND="postgres")
+    def test_full_text_search_with_prefixes(self):
+        queryset = CustomUser.objects.filter(
+            index_search("jo smi!", non_split_term_args=["email"], **self.fields)
+        )
+        sql, params = compile_sql(queryset)
+        self.assertNotIn("LIKE", sql)
+        self.assertIn("@@ (websearch_to_tsquery(", sql)
+        self.assertIn("jo smi!", params)
+        self.assertIn("jo:* & smi:*", params)
+
+    @override_settings(INDEX_SEARCH_BACKEND="postgres")
+    def test_empty_search(self):
+        self.assertEqual(str(index_search("", **self.fields)), str(index_search()))
+        self.assertEqual(str(index_search("!!", **self.fields)), "(AND: )")
+
+    def test_rank_and_index_share_the_vector(self):
+        rank = search_rank("jo", **self.fields)
+        queryset = CustomUser.objects.annotate(rank=rank).order_by("-rank")
+        sql, _ = compile_sql(queryset)
+        self.assertIn("ts_rank(to_tsvector(", sql)
+
+        index = get_search_index(["first_name", "last_name"], name="user_search_idx")
+        self.assertEqual(index.expressions[0], rank.source_expressions[0])
+
+
+class SearchUserViewSet(ListViewSetMixin):
+    queryset = CustomUser.objects.order_by("id")
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+    split_term_args = ["first_name", "last_name", "first_name"]
+    non_split_term_args = ["email"]
+
+
+class ExportJobSearchViewSet(ListViewSetMixin):
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    non_split_term_args = ["created_by__email", "created_by__is_admin", "missing"]
+
+
+router = DefaultRouter()
+router.register("users", SearchUserViewSet, basename="search-user")
+router.register("jobs", ExportJobSearchViewSet, basename="search-job")
+urlpatterns = [path("api/", include(router.urls))]
+
+
+class IndexSearchViewSetTest(APITestCase):
+    def test_search_param(self):
+        CustomUser.objects.create(email="ram@example.com", first_name="Ram")
+        CustomUser.objects.create(email="sita@example.com", first_name="Sita")
+        view = SearchUserViewSet.as_view({"get": "list"})
+        response = view(APIRequestFactory().get("/", {"search": "sit"}))
+        self.assertEqual(
+            [user["email"] for user in response.data["data"]], ["sita@example.com"]
+        )
+
+
+class TrigramIndexTest(SimpleTestCase):
+    def test_search_fields_from_urlconf(self):
+        fields = list(get_search_fields(__name__))
+        self.assertEqual(
+            [
+                (field.viewset, field.path, field.table, field.column)
+                for field in fields
+            ],
+            [
+                (SearchUserViewSet, "first_name", "users_customuser", "first_name"),
+                (SearchUserViewSet, "last_name", "users_customuser", "last_name"),
+                (SearchUserViewSet, "email", "users_customuser", "email"),
+                (
+                    ExportJobSearchViewSet,
+                    "created_by__email",
+                    "users_customuser",
+                    "email",
+                ),
+            ],
+        )
+
+    def test_index_sql(self):
+        editor = postgres.SchemaEditorClass(postgres, collect_sql=True)
+        name = get_index_name("users_customuser", "email")
+        self.assertEqual(
+            create_index_sql(editor, "users_customuser", "email", name),
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "users_customuser_email_trgm" '
+            'ON "users_customuser" USING gin ((UPPER("email"::text)) gin_trgm_ops)',
+        )
+        self.assertEqual(len(get_index_name("t" * 60, "column")), 63)
+
+    def test_index_matches_icontains_expression(self):
+        sql, _ = compile_sql(CustomUser.objects.filter(email__icontains="ram"))
+        self.assertIn('UPPER("users_customuser"."email"::text) LIKE UPPER(', sql)
+
+    def test_operation(self):
+        operation = CreateTrigramIndex("customuser", "email")
+        self.assertEqual(
+            operation.deconstruct(),
+            (
+                "CreateTrigramIndex",
+                [],
+                {"model_name": "customuser", "field_name": "email"},
+            ),
+        )
+        self.assertEqual(operation.migration_name_fragment, "customuser_email_trgm")
+
+    def test_command_needs_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command("trigram_indexes", stdout=StringIO())
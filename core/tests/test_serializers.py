@@ -0,0 +1,234 @@
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from core.models import ExportJob
+from core.serializers import (
+    DynamicFieldsModelSerializer,
+    DynamicFieldsReadOnlyModelSerializer,
+    GenericForeignKeyField,
+    GenericForeignKeyListSerializer,
+)
+from users.models import CustomUser
+
+
+class CachedExportJobSerializer(DynamicFieldsModelSerializer):
+    cache_representation = True
+
+    class Meta:
+        model = ExportJob
+        fields = ["id", "status", "error", "updated_at"]
+
+
+class RepresentationCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.jobs = [
+            ExportJob.objects.create(query=b"", serializer_class="") for _ in range(3)
+        ]
+
+    def serialize(self, **kwargs):
+        queryset = ExportJob.objects.order_by("id")
+        return CachedExportJobSerializer(queryset, many=True, **kwargs).data
+
+    def count_misses(self, **kwargs):
+        with mock.patch.object(
+            CachedExportJobSerializer,
+            "to_representation_uncached",
+            autospec=True,
+            side_effect=DynamicFieldsModelSerializer.to_representation_uncached,
+        ) as uncached:
+            data = self.serialize(**kwargs)
+        return data, uncached.call_count
+
+    def test_list_reads_cached_representations(self):
+        first, misses = self.count_misses()
+        self.assertEqual(misses, 3)
+        second, misses = self.count_misses()
+        self.assertEqual(misses, 0)
+        self.assertEqual(first, second)
+
+    def test_save_makes_entry_unreachable(self):
+        self.serialize()
+        self.jobs[1].error = "changed"
+        self.jobs[1].save()
+        data, misses = self.count_misses()
+        self.assertEqual(misses, 1)
+        self.assertEqual(data[1]["error"], "changed")
+
+    def test_field_set_is_part_of_key(self):
+        self.serialize()
+        data, misses = self.count_misses(fields=["id"])
+        self.assertEqual(misses, 3)
+        self.assertEqual(list(data[0]), ["id"])
+
+    def test_single_instance(self):
+        CachedExportJobSerializer(self.jobs[0]).data
+        with mock.patch.object(
+            CachedExportJobSerializer, "to_representation_uncached"
+        ) as uncached:
+            data = CachedExportJobSerializer(self.jobs[0]).data
+        uncached.assert_not_called()
+        self.assertEqual(data["id"], self.jobs[0].id)
+
+
+class GenericTargetSerializer(serializers.Serializer):
+    target = GenericForeignKeyField()
+
+    class Meta:
+        list_serializer_class = GenericForeignKeyListSerializer
+
+
+class GenericForeignKeyFieldTest(APITestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create(email=f"user{i}@example.com") for i in range(5)
+        ]
+        # Warm the ContentType cache.
+        ContentType.objects.get_for_model(CustomUser)
+
+    def test_content_type_from_cache(self):
+        field = GenericForeignKeyField()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                field.get_content_type("CustomUser"),
+                field.get_content_type("users.customuser"),
+            )
+
+    def test_list_input_validated_with_one_query(self):
+        data = [
+            {"target": {"content_type": "customuser", "id": user.id}}
+            for user in self.users
+        ]
+        serializer = GenericTargetSerializer(data=data, many=True)
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(
+            [item["target"]["object_id"] for item in serializer.validated_data],
+            [user.id for user in self.users],
+        )
+
+    def test_invalid_targets(self):
+        data = [
+            {"target": {"content_type": "customuser", "id": 0}},
+            {"target": {"content_type": "unknown", "id": 1}},
+        ]
+        serializer = GenericTargetSerializer(data=data, many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            [str(error["target"][0]) for error in serializer.errors],
+            ["Invalid object ID.", "Invalid content type."],
+        )
+
+
+class ReadOnlyExportJobSerializer(DynamicFieldsReadOnlyModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "uuid",
+            "status",
+            "export_format",
+            "fields",
+            "total_rows",
+            "created_by",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class PlainExportJobSerializer(serializers.ModelSerializer):
+    class Meta(ReadOnlyExportJobSerializer.Meta):
+        pass
+
+
+class ReadOnlyFastPathTest(APITestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(email="owner@example.com")
+        ExportJob.objects.create(
+            query=b"", serializer_class="", created_by=user, fields=["a", "b"]
+        )
+        ExportJob.objects.create(query=b"", serializer_class="")
+        self.queryset = ExportJob.objects.order_by("id")
+        self.expected = PlainExportJobSerializer(self.queryset, many=True).data
+
+    def test_queryset_uses_values(self):
+        serializer = ReadOnlyExportJobSerializer(self.queryset.all(), many=True)
+        self.assertNotIn(None, serializer.child.compiled_fields.values())
+        with mock.patch.object(
+            ReadOnlyExportJobSerializer, "to_representation"
+        ) as to_representation, self.assertNumQueries(1):
+            data = serializer.data
+        to_representation.assert_not_called()
+        self.assertEqual(data, self.expected)
+
+    def test_instances_use_compiled_fields(self):
+        data = ReadOnlyExportJobSerializer(list(self.queryset), many=True).data
+        self.assertEqual(data, self.expected)
+
+    def test_deferred_columns(self):
+        queryset = self.queryset.only("id", "uuid")
+        data = ReadOnlyExportJobSerializer(list(queryset), many=True).data
+        self.assertEqual(data, self.expected)
+
+    def test_uncompiled_field_falls_back(self):
+        class MethodSerializer(ReadOnlyExportJobSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(ReadOnlyExportJobSerializer.Meta):
+                fields = ["id", "label"]
+
+            def get_label(self, obj):
+                return f"job {obj.id}"
+
+        data = MethodSerializer(self.queryset.all(), many=True).data
+        self.assertEqual(
+            data, [{"id": job.id, "label": f"job {job.id}"} for job in self.queryset]
+        )
+
+
+class PreparedFieldsTest(APITestCase):
+    def test_fields_built_once_per_class(self):
+        class UserSerializer(DynamicFieldsModelSerializer):
+            cache_fields = True
+
+            class Meta:
+                model = CustomUser
+                fields = ["id", "email", "first_name"]
+
+        with mock.patch.object(
+            serializers.ModelSerializer,
+            "get_fields",
+            autospec=True,
+            side_effect=serializers.ModelSerializer.get_fields,
+        ) as get_fields:
+            first = UserSerializer(fields=["id", "email"]).fields
+            second = UserSerializer(exclude=["email"]).fields
+            third = UserSerializer().fields
+        self.assertEqual(get_fields.call_count, 1)
+        self.assertEqual(list(first), ["id", "email"])
+        self.assertEqual(list(second), ["id", "first_name"])
+        self.assertEqual(list(third), ["id", "email", "first_name"])
+        # Each instance gets its own bound copies.
+        self.assertIsNot(first["id"], third["id"])
+        self.assertIs(first["id"].parent, first.serializer)
+
+    def test_cache_is_opt_in(self):
+        class UserSerializer(DynamicFieldsModelSerializer):
+            class Meta:
+                model = CustomUser
+                fields = ["id", "email"]
+
+        with mock.patch.object(
+            serializers.ModelSerializer,
+            "get_fields",
+            autospec=True,
+            side_effect=serializers.ModelSerializer.get_fields,
+        ) as get_fields:
+            UserSerializer().fields
+            fields = UserSerializer(fields=["email"]).fields
+        self.assertEqual(get_fields.call_count, 2)
+        self.assertEqual(list(fields), ["email"])
@@ -0,0 +1,536 @@
+import csv
+import io
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection
+from django.db.models import Prefetch
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework import serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.models import ExportJob, Tombstone, get_soft_delete_q, is_soft_deleted
+from core.serializers import DynamicFieldsModelSerializer, ExportJobSerializer
+from core.signals import register_versioned_models
+from core.sync import prune_tombstones
+from core.utils.queryset import get_related_plan
+from core.viewsets import (
+    CreateViewSetMixin,
+    ListViewSetMixin,
+    RetrieveViewSetMixin,
+    UpdateViewSetMixin,
+)
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+
+class UserViewSet(CreateViewSetMixin, UpdateViewSetMixin):
+    queryset = CustomUser.objects.all()
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+
+
+class BulkViewSetTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.create_view = UserViewSet.as_view({"post": "create"})
+        self.bulk_update_view = UserViewSet.as_view({"patch": "bulk_update"})
+
+    def test_single_create_unchanged(self):
+        request = self.factory.post(
+            "/", {"email": "single@example.com", "first_name": "One"}, format="json"
+        )
+        response = self.create_view(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["email"], "single@example.com")
+
+    def test_bulk_create(self):
+        payload = [{"email": f"user{i}@example.com"} for i in range(5)]
+        request = self.factory.post("/", payload, format="json")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_view(request)
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["data"]), 5)
+        self.assertEqual(CustomUser.objects.count(), 5)
+
+    def test_bulk_create_returns_per_item_errors(self):
+        payload = [{"email": "ok@example.com"}, {"email": "not-an-email"}]
+        request = self.factory.post("/", payload, format="json")
+        response = self.create_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.assertIn("email", response.data["errors"][0]["errors"])
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_bulk_update(self):
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(email=f"user{i}@example.com") for i in range(3)]
+        )
+        payload = [{"id": user.id, "first_name": f"Name {user.id}"} for user in users]
+        request = self.factory.patch("/bulk/", payload, format="json")
+        response = self.bulk_update_view(request)
+        self.assertEqual(response.status_code, 200)
+        for user in users:
+            user.refresh_from_db()
+            self.assertEqual(user.first_name, f"Name {user.id}")
+            self.assertTrue(user.email.startswith("user"))
+
+    def test_bulk_update_unknown_id(self):
+        user = CustomUser.objects.create(email="known@example.com")
+        payload = [{"id": user.id, "first_name": "Known"}, {"id": 0}]
+        request = self.factory.patch("/bulk/", payload, format="json")
+        response = self.bulk_update_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        user.refresh_from_db()
+        self.assertIsNone(user.first_name)
+
+    def test_bulk_create_duplicate_unique_values(self):
+        payload = [
+            {"email": "same@example.com"},
+            {"email": "other@example.com"},
+            {"email": "same@example.com"},
+        ]
+        request = self.factory.post("/", payload, format="json")
+        response = self.create_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertEqual(response.data["errors"][0]["index"], 2)
+        self.assertIn("email", response.data["errors"][0]["errors"])
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_bulk_update_duplicate_id(self):
+        user = CustomUser.objects.create(email="known@example.com")
+        payload = [{"id": user.id, "first_name": "One"}, {"id": user.id}]
+        request = self.factory.patch("/bulk/", payload, format="json")
+        response = self.bulk_update_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+
+    def test_bulk_create_conflict_with_concurrent_write(self):
+        payload = [{"email": "race@example.com"}]
+        request = self.factory.post("/", payload, format="json")
+        error = IntegrityError("UNIQUE constraint failed: users_customuser.email")
+        with mock.patch.object(UserViewSet, "perform_bulk_create", side_effect=error):
+            response = self.create_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("conflicting unique values", response.data["message"])
+
+    def test_bulk_create_other_integrity_error(self):
+        payload = [{"email": "fk@example.com"}]
+        request = self.factory.post("/", payload, format="json")
+        error = IntegrityError("FOREIGN KEY constraint failed")
+        with mock.patch.object(UserViewSet, "perform_bulk_create", side_effect=error):
+            response = self.create_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("unique", response.data["message"])
+
+    def test_bulk_max_items(self):
+        payload = [{"email": f"user{i}@example.com"} for i in range(3)]
+        request = self.factory.post("/", payload, format="json")
+        with mock.patch.object(UserViewSet, "bulk_max_items", 2):
+            response = self.create_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_custom_create_is_called_per_item(self):
+        class CountingSerializer(CustomUserSerializer):
+            def create(self, validated_data):
+                created.append(validated_data["email"])
+                return super().create(validated_data)
+
+        created = []
+        payload = [{"email": f"user{i}@example.com"} for i in range(2)]
+        request = self.factory.post("/", payload, format="json")
+        with mock.patch.object(UserViewSet, "serializer_class", CountingSerializer):
+            response = self.create_view(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(created, [item["email"] for item in payload])
+
+
+class UserListViewSet(ListViewSetMixin):
+    queryset = CustomUser.objects.order_by("id")
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+    export_fields = ["id", "email", "first_name"]
+
+
+class ExportViewSetTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = UserListViewSet.as_view({"get": "export"})
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(email=f"user{i}@example.com", first_name=f"User {i}")
+                for i in range(3)
+            ]
+        )
+
+    def test_export_csv(self):
+        response = self.view(self.factory.get("/export/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ["ID", "First Name", "Email Address"])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1:], ["User 0", "user0@example.com"])
+
+    def test_export_xlsx(self):
+        response = self.view(self.factory.get("/export/", {"export_format": "xlsx"}))
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[0], ("ID", "First Name", "Email Address"))
+        self.assertEqual(len(rows), 4)
+
+    def test_export_unsupported_format(self):
+        response = self.view(self.factory.get("/export/", {"export_format": "pdf"}))
+        self.assertEqual(response.status_code, 400)
+
+
+class UserReadViewSet(ListViewSetMixin, RetrieveViewSetMixin):
+    queryset = CustomUser.objects.order_by("id")
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.list_view = UserReadViewSet.as_view({"get": "list"})
+        self.detail_view = UserReadViewSet.as_view({"get": "retrieve"})
+        self.user = CustomUser.objects.create(
+            email="sparse@example.com", first_name="Sparse", contact="9800000000"
+        )
+
+    def test_fields_narrow_response_and_query(self):
+        request = self.factory.get("/", {"fields": "id,email"})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.list_view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["data"][0]), {"id", "email"})
+        select = next(q["sql"] for q in queries if '"email"' in q["sql"])
+        self.assertNotIn('"first_name"', select)
+        self.assertNotIn('"contact"', select)
+
+    def test_exclude(self):
+        request = self.factory.get("/", {"exclude": "contact,uuid"})
+        response = self.detail_view(request, pk=self.user.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("contact", response.data["data"])
+        self.assertNotIn("uuid", response.data["data"])
+        self.assertEqual(response.data["data"]["first_name"], "Sparse")
+
+    def test_no_params_returns_all_fields(self):
+        response = self.detail_view(self.factory.get("/"), pk=self.user.pk)
+        self.assertEqual(len(response.data["data"]), 7)
+
+
+class ExportJobWithUsersSerializer(serializers.ModelSerializer):
+    created_by = CustomUserSerializer(read_only=True)
+    updated_by_email = serializers.CharField(source="updated_by.email")
+
+    class Meta:
+        model = ExportJob
+        fields = ["id", "status", "created_by", "updated_by_email"]
+
+
+class UserWithJobsSerializer(serializers.ModelSerializer):
+    jobs = ExportJobWithUsersSerializer(source="core_exportjob_created", many=True)
+
+    class Meta:
+        model = CustomUser
+        fields = ["id", "email", "jobs"]
+
+
+class ExportJobReadViewSet(ListViewSetMixin):
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobWithUsersSerializer
+    permission_classes = (AllowAny,)
+
+
+class RelatedFieldsTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        for i in range(10):
+            user = CustomUser.objects.create(email=f"user{i}@example.com")
+            ExportJob.objects.create(
+                query=b"", serializer_class="", created_by=user, updated_by=user
+            )
+
+    def test_plan_for_forward_relations(self):
+        select, prefetch = get_related_plan(ExportJob, ExportJobWithUsersSerializer())
+        self.assertEqual(select, ["created_by", "updated_by"])
+        self.assertEqual(prefetch, [])
+
+    def test_plan_for_reverse_relations(self):
+        select, prefetch = get_related_plan(CustomUser, UserWithJobsSerializer())
+        self.assertEqual(select, [])
+        self.assertEqual(len(prefetch), 1)
+        self.assertIsInstance(prefetch[0], Prefetch)
+        self.assertEqual(prefetch[0].prefetch_to, "core_exportjob_created")
+
+    def test_list_runs_constant_queries(self):
+        view = ExportJobReadViewSet.as_view({"get": "list"})
+        request = self.factory.get("/", {"no_pagination": "true"})
+        with self.assertNumQueries(1):
+            response = view(request)
+        self.assertEqual(len(response.data["data"]), 10)
+
+    def test_explicit_override(self):
+        class OverrideViewSet(ExportJobReadViewSet):
+            select_related_fields = ["created_by"]
+
+        view = OverrideViewSet.as_view({"get": "list"})
+        request = self.factory.get("/", {"no_pagination": "true"})
+        # One query for the list plus one per row for `updated_by`.
+        with self.assertNumQueries(11):
+            view(request)
+
+    def test_combined_with_sparse_fields(self):
+        class SparseViewSet(ExportJobReadViewSet):
+            serializer_class = type(
+                "SparseExportJobSerializer",
+                (DynamicFieldsModelSerializer, ExportJobWithUsersSerializer),
+                {"Meta": ExportJobWithUsersSerializer.Meta},
+            )
+
+        view = SparseViewSet.as_view({"get": "list"})
+        request = self.factory.get(
+            "/", {"no_pagination": "true", "fields": "id,updated_by_email"}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"first_name"', queries[0]["sql"])
+        self.assertEqual(
+            response.data["data"][0]["updated_by_email"], "user9@example.com"
+        )
+
+    def test_sparse_fields_with_representation_cache(self):
+        class CachedSerializer(DynamicFieldsModelSerializer):
+            cache_representation = True
+
+            class Meta:
+                model = ExportJob
+                fields = ["id", "status", "error"]
+
+        class CachedViewSet(ExportJobReadViewSet):
+            serializer_class = CachedSerializer
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        view = CachedViewSet.as_view({"get": "list"})
+        request = self.factory.get("/", {"no_pagination": "true", "fields": "id"})
+        # The timestamp of the cache key is loaded with the rows.
+        with self.assertNumQueries(1):
+            response = view(request)
+        self.assertEqual(list(response.data["data"][0]), ["id"])
+        with self.assertNumQueries(1):
+            view(request)
+
+
+class CachedUserListViewSet(ListViewSetMixin):
+    queryset = CustomUser.objects.order_by("id")
+    serializer_class = CustomUserSerializer
+    permission_classes = (AllowAny,)
+    list_cache_timeout = 60
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ListCacheTest(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        register_versioned_models(CustomUser)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.view = CachedUserListViewSet.as_view({"get": "list"})
+        self.user = CustomUser.objects.create(email="cached@example.com")
+
+    def get(self, params=None, user=None):
+        request = self.factory.get("/", params or {})
+        if user is not None:
+            request.user = user
+        return self.view(request)
+
+    def test_hit_skips_database(self):
+        first = self.get()
+        with self.assertNumQueries(0):
+            second = self.get()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.rendered_content, second.content)
+
+    def test_query_params_are_normalized(self):
+        self.get({"limit": 5, "offset": 0})
+        with self.assertNumQueries(0):
+            self.get({"offset": 0, "limit": 5})
+
+    def test_save_invalidates(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Changed"
+            self.user.save()
+        response = self.get()
+        self.assertEqual(response.data["data"][0]["first_name"], "Changed")
+
+    def test_bulk_create_invalidates(self):
+        self.get()
+        view = UserViewSet.as_view({"post": "create"})
+        request = self.factory.post("/", [{"email": "bulk@example.com"}], format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            view(request)
+        response = self.get()
+        self.assertEqual(response.data["count"], 2)
+
+    def test_cache_errors_skip_the_cache(self):
+        with mock.patch("core.viewsets.get_model_versions", return_value=None):
+            with mock.patch("core.viewsets.set_cache") as set_cache:
+                self.get()
+            set_cache.assert_not_called()
+
+    def test_unregistered_models_are_rejected(self):
+        class UnregisteredViewSet(CachedUserListViewSet):
+            list_cache_dependencies = (ExportJob,)
+
+        with self.assertRaises(ImproperlyConfigured):
+            UnregisteredViewSet.as_view({"get": "list"})(self.factory.get("/"))
+
+    def test_scope_is_per_user(self):
+        self.get(user=self.user)
+        other = CustomUser.objects.create(email="other@example.com")
+        with CaptureQueriesContext(connection) as queries:
+            self.get(user=other)
+        self.assertTrue(queries)
+
+
+class ExportJobSyncViewSet(ListViewSetMixin):
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = (AllowAny,)
+    sync_page_size = 2
+    sync_safety_window = 0
+
+
+class SyncTest(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = ExportJobSyncViewSet.as_view({"get": "sync"})
+        self.jobs = [
+            ExportJob.objects.create(query=b"", serializer_class="") for _ in range(3)
+        ]
+
+    def sync(self, watermark=None):
+        params = {"watermark": watermark} if watermark else {}
+        return self.view(self.factory.get("/sync/", params))
+
+    def sync_all(self, watermark=None):
+        rows, deleted = [], []
+        while True:
+            response = self.sync(watermark)
+            rows += [row["uuid"] for row in response.data["data"]]
+            deleted += response.data["deleted"]
+            watermark = response.data["watermark"]
+            if not response.data["has_more"]:
+                return rows, deleted, watermark
+
+    def test_first_sync_pages_through_all_rows(self):
+        response = self.sync()
+        self.assertEqual(len(response.data["data"]), 2)
+        self.assertTrue(response.data["has_more"])
+        rows, deleted, _ = self.sync_all()
+        self.assertEqual(rows, [str(job.uuid) for job in self.jobs])
+        self.assertEqual(deleted, [])
+
+    def test_returns_only_changes(self):
+        *_, watermark = self.sync_all()
+        response = self.sync(watermark)
+        self.assertEqual(response.data["data"], [])
+        self.assertFalse(response.data["has_more"])
+
+        self.jobs[0].error = "changed"
+        self.jobs[0].save()
+        rows, _, _ = self.sync_all(watermark)
+        self.assertEqual(rows, [str(self.jobs[0].uuid)])
+
+    def test_hard_delete_sends_tombstone(self):
+        *_, watermark = self.sync_all()
+        pk = self.jobs[1].pk
+        self.jobs[1].delete()
+        rows, deleted, watermark = self.sync_all(watermark)
+        self.assertEqual((rows, deleted), ([], [str(pk)]))
+        self.assertEqual(self.sync(watermark).data["deleted"], [])
+
+    def test_first_sync_skips_old_tombstones(self):
+        self.jobs[0].delete()
+        _, deleted, _ = self.sync_all()
+        self.assertEqual(deleted, [])
+
+    def test_rejects_tampered_watermark(self):
+        response = self.sync("not-a-watermark")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=1)
+    def test_watermark_older_than_tombstones_expires(self):
+        *_, watermark = self.sync_all()
+        self.jobs[0].delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(prune_tombstones(), 1)
+        self.assertFalse(Tombstone.objects.exists())
+
+        later = time.time() + 24 * 60 * 60
+        with mock.patch("django.core.signing.time.time", return_value=later):
+            response = self.sync(watermark)
+        self.assertEqual(response.status_code, 410)
+        # A full sync starts over from the rows that are left.
+        rows, deleted, _ = self.sync_all()
+        self.assertEqual(len(rows), 2)
+
+    def test_recent_changes_wait_for_the_safety_window(self):
+        self.view = ExportJobSyncViewSet.as_view({"get": "sync"}, sync_safety_window=60)
+        now = timezone.now()
+        ExportJob.objects.filter(pk=self.jobs[0].pk).update(
+            updated_at=now - timedelta(seconds=120)
+        )
+        rows, _, watermark = self.sync_all()
+        self.assertEqual(rows, [str(self.jobs[0].uuid)])
+
+        # Rows written after the cutoff, possibly in transactions that
+        # have not committed yet, are read once they are old enough.
+        pk = self.jobs[1].pk
+        self.jobs[1].delete()
+        with mock.patch(
+            "django.utils.timezone.now", return_value=now + timedelta(seconds=61)
+        ):
+            rows, deleted, _ = self.sync_all(watermark)
+        self.assertEqual(rows, [str(self.jobs[2].uuid)])
+        self.assertEqual(deleted, [str(pk)])
+
+
+class SoftDeleteTest(APITestCase):
+    def test_soft_delete_flags(self):
+        user = CustomUser.objects.create(email="soft@example.com")
+        self.assertFalse(is_soft_deleted(user))
+        user.soft_delete(archive=True)
+        self.assertTrue(is_soft_deleted(user))
+        queryset = CustomUser.objects.filter(get_soft_delete_q(CustomUser))
+        self.assertEqual(list(queryset), [user])
+        self.assertIsNone(get_soft_delete_q(ExportJob))
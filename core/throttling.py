@@ -0,0 +1,106 @@
+"""
+Rate limiting for endpoints that are expensive to call, such as login.
+
+`SlidingWindowRateThrottle` counts the requests of the last `duration`
+seconds in a Redis sorted set. Each request is added and counted in a single
+MULTI/EXEC transaction, so concurrent workers can never let more than
+`num_requests` through. When the limit is hit the identity is also locked
+out for `backoff` seconds, doubled for every further lockout up to
+`max_backoff`. The remaining time is sent as `Retry-After`.
+
+Without Redis, or when a Redis command fails, the window is DRF's
+cache-based request history. If the cache fails too, requests are let
+through rather than failing every login while the cache is down.
+"""
+
+import logging
+import math
+import uuid
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    # Seconds of the first lockout after the limit is hit, 0 for none
+    backoff = 0
+    max_backoff = 60 * 60
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.retry_after = None
+        try:
+            locked_until = self.cache.get(f"{self.key}:lockout")
+            if locked_until is not None and locked_until > self.now:
+                self.retry_after = locked_until - self.now
+                return False
+            if self.hit_window():
+                return True
+            self.lock_out()
+        except Exception as e:
+            logger.error(f"Error throttling {self.key}: {str(e)}", exc_info=True)
+            self.retry_after = None
+            return True
+        return False
+
+    def hit_window(self) -> bool:
+        """Count the request in the window; False if it is over the limit."""
+        client = get_redis()
+        if client is None:
+            return self.hit_cache_window()
+
+        member = f"{self.now}:{uuid.uuid4().hex}"
+        try:
+            pipe = client.pipeline()
+            pipe.zremrangebyscore(self.key, "-inf", self.now - self.duration)
+            pipe.zadd(self.key, {member: self.now})
+            pipe.zcard(self.key)
+            pipe.zrange(self.key, 0, 0, withscores=True)
+            pipe.expire(self.key, math.ceil(self.duration))
+            _, _, count, oldest, _ = pipe.execute()
+            if count <= self.num_requests:
+                return True
+            # Rejected requests do not use up the window.
+            client.zrem(self.key, member)
+        except Exception as e:
+            logger.error(f"Error counting {self.key} in Redis: {str(e)}", exc_info=True)
+            return self.hit_cache_window()
+        self.retry_after = oldest[0][1] + self.duration - self.now
+        return False
+
+    def hit_cache_window(self) -> bool:
+        self.history = self.cache.get(self.key, [])
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+        if len(self.history) >= self.num_requests:
+            self.retry_after = self.duration - (self.now - self.history[-1])
+            return False
+        self.history.insert(0, self.now)
+        self.cache.set(self.key, self.history, self.duration)
+        return True
+
+    def lock_out(self):
+        if not self.backoff:
+            return
+        strikes_key = f"{self.key}:strikes"
+        self.cache.add(strikes_key, 0, self.max_backoff * 2)
+        try:
+            strikes = self.cache.incr(strikes_key)
+        except ValueError:
+            # Expired since `add`.
+            strikes = 1
+        lockout = min(self.backoff * 2 ** min(strikes - 1, 32), self.max_backoff)
+        self.cache.set(f"{self.key}:lockout", self.now + lockout, lockout)
+        self.retry_after = max(self.retry_after or 0, lockout)
+
+    def wait(self):
+        return self.retry_after
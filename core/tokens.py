@@ -0,0 +1,20 @@
+"""
+simplejwt tokens signed and verified through `core.jwt_keys.token_backend`,
+i.e. with the asymmetric keys of `JWT_SIGNING_KEY_FILES` when configured.
+"""
+
+from rest_framework_simplejwt import tokens
+
+from core.jwt_keys import token_backend
+
+
+class AccessToken(tokens.AccessToken):
+    def get_token_backend(self):
+        return token_backend
+
+
+class RefreshToken(tokens.RefreshToken):
+    access_token_class = AccessToken
+
+    def get_token_backend(self):
+        return token_backend
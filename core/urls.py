@@ -0,0 +1,13 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from core.views import BatchView, ExportJobViewSet, JWKSView
+
+router = DefaultRouter()
+router.register("exports", ExportJobViewSet, basename="export-job")
+
+urlpatterns = [
+    path("api/v1/", include(router.urls)),
+    path("api/v1/batch/", BatchView.as_view(), name="batch"),
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
+]
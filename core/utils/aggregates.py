@@ -0,0 +1,328 @@
+"""
+Aggregates that compile on PostgreSQL and SQLite, for embedding related
+collections in a single query instead of one query per row.
+
+- JSONObject: `JSONObject` nesting JSON values on SQLite as well
+- StringAgg: Values joined with a delimiter (`STRING_AGG` / `GROUP_CONCAT`)
+- ArrayAgg: Values as a list (`JSONB_AGG` / `JSON_GROUP_ARRAY`)
+- JSONObjectAgg: Key/value pairs as a dict (`JSONB_OBJECT_AGG` /
+  `JSON_GROUP_OBJECT`)
+- subquery_aggregate: Correlated scalar subquery computing one aggregate
+- subquery_count / subquery_string / subquery_array / subquery_json_array:
+  The common correlated subqueries, usable in `annotate()`
+
+All aggregates return None over no rows (use `default=` otherwise), on both
+databases. `order_by` needs PostgreSQL or SQLite 3.44+; with `distinct=True`
+it may only order by the aggregated expression, as PostgreSQL requires.
+
+Usage:
+    CustomUser.objects.annotate(
+        exports=subquery_json_array(
+            ExportJob.objects.filter(created_by=OuterRef("pk")).order_by("-id"),
+            "uuid",
+            "status",
+        )
+    )
+"""
+
+from django.db import NotSupportedError
+from django.db.models import (
+    Aggregate,
+    CharField,
+    Count,
+    F,
+    Func,
+    JSONField,
+    Subquery,
+    TextField,
+    Value,
+    functions,
+)
+from django.db.models.expressions import OrderBy, OrderByList
+from django.db.models.functions import Cast
+
+TEXT_FIELDS = (CharField, TextField)
+
+
+def supports_aggregate_order_by(connection) -> bool:
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 44)
+    return connection.vendor == "postgresql"
+
+
+def _as_sqlite_json(expression):
+    """
+    Parse JSON typed `expression` on SQLite, which otherwise stores JSON as
+    text and would aggregate it as a string.
+    """
+    if isinstance(expression._output_field_or_none, JSONField):
+        return Func(expression, function="JSON", output_field=JSONField())
+    return expression
+
+
+class JSONObject(functions.JSONObject):
+    """
+    `JSONObject` that nests JSON typed values on SQLite instead of embedding
+    them as strings.
+    """
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        clone = self.copy()
+        clone.source_expressions = [
+            _as_sqlite_json(expression) for expression in clone.source_expressions
+        ]
+        return super(JSONObject, clone).as_sql(compiler, connection, **extra_context)
+
+
+class OrderableAggregate(Aggregate):
+    """
+    Aggregate with an optional `order_by` applied to its input, e.g.
+    `StringAgg("email", order_by="-created_at")`.
+
+    A DISTINCT aggregate can only be ordered by the aggregated expression,
+    e.g. `StringAgg("email", distinct=True, order_by="-email")`; the ORDER BY
+    follows any cast the argument gets (see `StringAgg.as_postgresql`).
+    """
+
+    template = "%(function)s(%(distinct)s%(expressions)s%(order_by)s)"
+
+    def __init__(self, *expressions, order_by=(), **extra):
+        if not order_by:
+            self.order_by = None
+        elif isinstance(order_by, (list, tuple)):
+            self.order_by = OrderByList(*order_by)
+        else:
+            self.order_by = OrderByList(order_by)
+        super().__init__(*expressions, **extra)
+
+    def get_source_expressions(self):
+        return super().get_source_expressions() + [self.order_by]
+
+    def set_source_expressions(self, exprs):
+        *exprs, self.order_by = exprs
+        return super().set_source_expressions(exprs)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if self.order_by is None:
+            return super().as_sql(compiler, connection, order_by="", **extra_context)
+        if not supports_aggregate_order_by(connection):
+            raise NotSupportedError(
+                f"{self.__class__.__name__}(order_by=...) is not supported on "
+                f"this database."
+            )
+        order_by = self.get_distinct_order_by() if self.distinct else self.order_by
+        # ORDER BY sits between the arguments and the FILTER clause, so its
+        # parameters go between theirs.
+        order_by_sql, order_by_params = compiler.compile(order_by)
+        sql, params = super().as_sql(
+            compiler, connection, order_by=f" {order_by_sql}", **extra_context
+        )
+        source_count = sum(
+            len(compiler.compile(expression)[1])
+            for expression in self.source_expressions
+        )
+        return sql, (
+            *params[:source_count],
+            *order_by_params,
+            *params[source_count:],
+        )
+
+    def get_distinct_order_by(self):
+        """
+        Point `order_by` at the aggregated expression as compiled, e.g. after
+        a cast, raising ValueError if it orders by anything else.
+        """
+        argument = self.source_expressions[0]
+        # The argument may be wrapped, e.g. in a cast to text.
+        candidates = [argument]
+        while isinstance(candidates[-1], Func) and candidates[-1].source_expressions:
+            candidates.append(candidates[-1].source_expressions[0])
+        orderings = []
+        for ordering in self.order_by.get_source_expressions():
+            is_order_by = isinstance(ordering, OrderBy)
+            expression = ordering.expression if is_order_by else ordering
+            if expression not in candidates:
+                raise ValueError(
+                    f"{self.__class__.__name__}(distinct=True) can only be "
+                    f"ordered by the aggregated expression."
+                )
+            if is_order_by:
+                ordering = ordering.copy()
+                ordering.expression = argument
+            else:
+                ordering = argument
+            orderings.append(ordering)
+        return OrderByList(*orderings)
+
+
+class StringAgg(OrderableAggregate):
+    """
+    Values of `expression` joined with `delimiter`, as text.
+
+    With `distinct=True` on SQLite (whose `GROUP_CONCAT(DISTINCT ...)` only
+    takes the default `,` delimiter) the distinct values are collected with
+    `JSON_GROUP_ARRAY` and joined from there.
+    """
+
+    function = "STRING_AGG"
+    allow_distinct = True
+
+    def __init__(self, expression, delimiter=", ", **extra):
+        extra.setdefault("output_field", TextField())
+        super().__init__(expression, Value(str(delimiter)), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        expression, delimiter = self.source_expressions
+        if isinstance(expression._output_field_or_none, TEXT_FIELDS):
+            return self.as_sql(compiler, connection, **extra_context)
+        # STRING_AGG only takes text.
+        clone = self.copy()
+        clone.source_expressions = [Cast(expression, TextField()), delimiter]
+        return clone.as_sql(compiler, connection, **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        if not self.distinct:
+            return self.as_sql(
+                compiler, connection, function="GROUP_CONCAT", **extra_context
+            )
+        expression, delimiter = self.source_expressions
+        array = ArrayAgg(expression, distinct=True, filter=self.filter)
+        array.order_by = self.order_by
+        array_sql, array_params = array.as_sqlite(compiler, connection)
+        delimiter_sql, delimiter_params = compiler.compile(delimiter)
+        return (
+            f"(SELECT GROUP_CONCAT(value, {delimiter_sql}) "
+            f"FROM JSON_EACH({array_sql}))",
+            (*delimiter_params, *array_params),
+        )
+
+
+class ArrayAgg(OrderableAggregate):
+    """
+    Values of `expression` as a JSON array, loaded as a list.
+
+    Aggregating over a LEFT JOIN yields `[null]` for rows without related
+    rows; filter those out (`filter=Q(<relation>__isnull=False)`) or use a
+    subquery.
+    """
+
+    function = "JSONB_AGG"
+    allow_distinct = True
+
+    def __init__(self, expression, **extra):
+        extra.setdefault("output_field", JSONField())
+        super().__init__(expression, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        clone = self.copy()
+        clone.source_expressions = [_as_sqlite_json(clone.source_expressions[0])]
+        sql, params = clone.as_sql(
+            compiler, connection, function="JSON_GROUP_ARRAY", **extra_context
+        )
+        # JSON_GROUP_ARRAY returns `[]` over no rows where JSONB_AGG is NULL.
+        return f"NULLIF({sql}, '[]')", params
+
+
+class JSONObjectAgg(Aggregate):
+    """
+    `key: value` pairs as a JSON object, loaded as a dict. Keys are cast to
+    text; when a key repeats, the last value wins.
+    """
+
+    function = "JSONB_OBJECT_AGG"
+
+    def __init__(self, key, value, **extra):
+        extra.setdefault("output_field", JSONField())
+        super().__init__(Cast(key, TextField()), value, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        key, value = self.source_expressions
+        clone = self.copy()
+        clone.source_expressions = [key, _as_sqlite_json(value)]
+        sql, params = clone.as_sql(
+            compiler, connection, function="JSON_GROUP_OBJECT", **extra_context
+        )
+        return f"NULLIF({sql}, '{{}}')", params
+
+
+def subquery_aggregate(queryset, aggregate):
+    """
+    Return a scalar subquery computing `aggregate` over all rows of
+    `queryset`, which is usually filtered on an `OuterRef`.
+
+    Grouping by a constant leaves the GROUP BY clause out, so the subquery
+    always returns exactly one row, even when `queryset` matches none.
+    """
+    queryset = (
+        queryset.order_by()
+        .values(_aggregate_group=Value(1))
+        .annotate(_aggregate=aggregate)
+        .values("_aggregate")
+    )
+    return Subquery(queryset)
+
+
+def _get_order_by(queryset, distinct_field=None):
+    # Order the aggregate like the queryset was ordered explicitly.
+    order_by = tuple(queryset.query.order_by)
+    if distinct_field is None or not order_by:
+        return order_by
+    # A DISTINCT aggregate can only be ordered by its values.
+    if order_by[0] == f"-{distinct_field}":
+        return (order_by[0],)
+    return (distinct_field,)
+
+
+def subquery_count(queryset):
+    """Number of rows of `queryset`."""
+    return subquery_aggregate(queryset, Count("*"))
+
+
+def subquery_string(queryset, field, delimiter=", ", distinct=False):
+    """
+    Values of `field` over `queryset` joined with `delimiter`, or ''. Distinct
+    values are ordered by value, as the ordering of `queryset` cannot apply.
+    """
+    return subquery_aggregate(
+        queryset,
+        StringAgg(
+            field,
+            delimiter,
+            distinct=distinct,
+            order_by=_get_order_by(queryset, field if distinct else None),
+            default=Value(""),
+        ),
+    )
+
+
+def subquery_array(queryset, field, distinct=False):
+    """
+    Values of `field` over `queryset` as a list. Distinct values are ordered
+    by value, as the ordering of `queryset` cannot apply.
+    """
+    return subquery_aggregate(
+        queryset,
+        ArrayAgg(
+            field,
+            distinct=distinct,
+            order_by=_get_order_by(queryset, field if distinct else None),
+            default=Value([], output_field=JSONField()),
+        ),
+    )
+
+
+def subquery_json_array(queryset, *fields, **expressions):
+    """
+    Rows of `queryset` as a list of dicts with `fields` and the named
+    `expressions`, e.g. the children of each row of a list endpoint.
+    """
+    values = {field: F(field) for field in fields}
+    values.update(expressions)
+    return subquery_aggregate(
+        queryset,
+        ArrayAgg(
+            JSONObject(**values),
+            order_by=_get_order_by(queryset),
+            default=Value([], output_field=JSONField()),
+        ),
+    )
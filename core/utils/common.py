@@ -1,10 +1,14 @@
 import re
 
-from django.db.models import Aggregate, CharField, Q
+from django.conf import settings
+from django.db.models import Q
 from django.utils.text import slugify
 from rest_framework import status
 from rest_framework.response import Response
 
+from core.utils.aggregates import StringAgg
+from core.utils.search import full_text_search
+
 
 def hyperlink(name, link):
     return '=HYPERLINK("{}", "{}")'.format(link, name)
@@ -14,13 +18,22 @@ def index_search(
     search=None,
     split_term_args=None,
     non_split_term_args=None,
+    backend=None,
 ):
     """
     Split term args = Fields you'd like to filter for by splitting
     the search parameter
     Non Split term args = Fields you'd like to filter for by the
     exact search parameter
+
+    With `INDEX_SEARCH_BACKEND = "postgres"` (or `backend="postgres"`) the
+    fields are matched with PostgreSQL full-text search instead of
+    `icontains`, see `core.utils.search.full_text_search`.
     """
+    backend = backend or getattr(settings, "INDEX_SEARCH_BACKEND", "icontains")
+    if backend == "postgres":
+        return full_text_search(search, split_term_args, non_split_term_args)
+
     qset = Q()
     qobject = Q()
     if search:
@@ -127,10 +140,11 @@ def _slug_strip(value, separator=None):
     return re.sub(r"^%s+|%s+$" % (re_sep, re_sep), "", value)
 
 
-class GroupConcat(Aggregate):
-    function = "GROUP_CONCAT"
-    template = "%(function)s(%(distinct)s%(expressions)s%(ordering)s%(separator)s)"  # noqa: E501
-    allow_distinct = True
+class GroupConcat(StringAgg):
+    """
+    Kept for existing imports; use `core.utils.aggregates.StringAgg`, which
+    this now is with the former defaults (distinct values, ", ").
+    """
 
     def __init__(
         self,
@@ -141,17 +155,33 @@ class GroupConcat(Aggregate):
         separator=", ",
         **extra,
     ):
-        super(GroupConcat, self).__init__(
+        super().__init__(
             expression,
-            distinct=("DISTINCT " if distinct else ""),
-            ordering=(" ORDER BY %s" % ordering if ordering is not None else ""),
-            separator=' SEPARATOR "%s"' % separator,
-            output_field=CharField(),
+            separator,
+            distinct=distinct,
             filter=filter,
+            order_by=ordering or (),
             **extra,
         )
 
 
+def is_unique_violation(error):
+    """
+    Whether an `IntegrityError` was raised by a unique constraint, as opposed
+    to e.g. a foreign key, NOT NULL or check constraint.
+    """
+    cause = error.__cause__
+    # PostgreSQL (psycopg2 / psycopg 3) report the SQLSTATE.
+    code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    if code is not None:
+        return code == "23505"
+    # MySQL: ER_DUP_ENTRY.
+    if cause is not None and cause.args and cause.args[0] == 1062:
+        return True
+    # SQLite only reports it in the message.
+    return "UNIQUE constraint failed" in str(error)
+
+
 def response_405():
     return Response(
         {"data": "Not Implemented on REST yet."},
@@ -0,0 +1,158 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.relations import RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _get_source_paths(model, source_attrs):
+    """
+    Resolve a serializer field's `source_attrs` against `model`.
+
+    Returns the ORM paths (`fk__column`) the field reads, an empty list when
+    the field needs no column on `model` itself (reverse and many-to-many
+    relations), or None when the source is not a model field (properties,
+    methods).
+    """
+    path = []
+    current = model
+    for attr in source_attrs:
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # Anything past the first attribute needs the whole related object.
+            return ["__".join(path)] if path else None
+        if isinstance(model_field, GenericForeignKey):
+            prefix = "".join(f"{name}__" for name in path)
+            return [prefix + model_field.ct_field, prefix + model_field.fk_field]
+        if not model_field.concrete or model_field.many_to_many:
+            # Reverse relations are loaded separately and use the primary key.
+            return ["__".join(path)] if path else []
+        path.append(attr)
+        if not model_field.is_relation:
+            break
+        current = model_field.related_model
+    return ["__".join(path)]
+
+
+def get_only_fields(model, serializer, extra_sources=None):
+    """
+    Return the ORM paths `serializer` reads from `model`, for `.only()`.
+
+    Args:
+        model: Model class the serializer renders
+        serializer: Serializer instance, already narrowed to the output fields
+        extra_sources: Optional mapping of serializer field name to the model
+            paths it needs, for fields whose source cannot be introspected
+            (method fields, `source="*"`, model properties)
+
+    Returns:
+        Set of ORM paths, or None when any field's needs are unknown and the
+        queryset must not be narrowed.
+    """
+    extra_sources = extra_sources or {}
+    only = {model._meta.pk.name}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in extra_sources:
+            only.update(extra_sources[name])
+            continue
+        if field.source == "*":
+            return None
+        paths = _get_source_paths(model, field.source_attrs)
+        if paths is None:
+            return None
+        if isinstance(field, BaseSerializer):
+            # Nested serializers read the whole related object.
+            paths = [path.split("__")[0] for path in paths]
+        only.update(paths)
+    return only
+
+
+def _prefix_lookup(prefix, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f"{prefix}__{lookup.prefetch_through}", lookup.queryset)
+    return f"{prefix}__{lookup}"
+
+
+def get_related_plan(model, serializer):
+    """
+    Work out the `select_related` / `prefetch_related` lookups `serializer`
+    needs so rendering a list costs a constant number of queries.
+
+    Forward foreign keys and one-to-one relations are joined with
+    `select_related`; reverse, many-to-many and generic relations are
+    prefetched. Nested serializers are planned recursively, and nested plans
+    under a prefetched relation become a `Prefetch` queryset.
+
+    Args:
+        model: Model class the serializer renders
+        serializer: Serializer instance whose fields are inspected
+
+    Returns:
+        Tuple of (select_related lookups, prefetch_related lookups)
+    """
+    select, prefetch = set(), {}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(nested, BaseSerializer):
+            nested = None
+
+        if field.source == "*":
+            if nested is not None:
+                child_select, child_prefetch = get_related_plan(model, nested)
+                select.update(child_select)
+                for lookup in child_prefetch:
+                    prefetch[getattr(lookup, "prefetch_to", lookup)] = lookup
+            continue
+
+        if (
+            isinstance(field, RelatedField)
+            and field.use_pk_only_optimization()
+            and len(field.source_attrs) == 1
+        ):
+            # Rendered from the `<fk>_id` column, no join needed.
+            continue
+
+        path, current, prefetched = [], model, False
+        for attr in field.source_attrs:
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                current = None
+                break
+            if not model_field.is_relation:
+                current = None
+                break
+            path.append(attr)
+            if isinstance(model_field, GenericForeignKey):
+                prefetched, current = True, None
+                break
+            if not (model_field.many_to_one or model_field.one_to_one):
+                prefetched = True
+            current = model_field.related_model
+        if not path:
+            continue
+
+        lookup = "__".join(path)
+        child_select, child_prefetch = (), ()
+        if nested is not None and current is not None:
+            child_select, child_prefetch = get_related_plan(current, nested)
+
+        if not prefetched:
+            select.add(lookup)
+            select.update(f"{lookup}__{child}" for child in child_select)
+            for child in child_prefetch:
+                child = _prefix_lookup(lookup, child)
+                prefetch[getattr(child, "prefetch_to", child)] = child
+        elif child_select or child_prefetch:
+            queryset = current._default_manager.select_related(*child_select)
+            prefetch[lookup] = Prefetch(
+                lookup, queryset.prefetch_related(*child_prefetch)
+            )
+        else:
+            prefetch.setdefault(lookup, lookup)
+    return sorted(select), list(prefetch.values())
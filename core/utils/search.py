@@ -0,0 +1,116 @@
+"""
+PostgreSQL full-text search backend for `core.utils.common.index_search`.
+
+Instead of one `icontains` (`UPPER(col) LIKE '%term%'`) per term per field,
+the searched fields are matched as one `tsvector` against a query built with
+`websearch_to_tsquery` (quoted phrases, `or`, `-excluded`), OR-ed with a
+prefix query (`term:*`) so partially typed words still match.
+
+The vector is either an expression over the fields (index it with
+`get_search_index`) or a maintained `SearchVectorField` column passed as
+`vector_field`. Use `search_rank` to order results by relevance.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorExact,
+)
+from django.db.models import F, Q
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def get_search_config() -> str:
+    return getattr(settings, "INDEX_SEARCH_CONFIG", "simple")
+
+
+def _search_fields(split_term_args=None, non_split_term_args=None) -> List[str]:
+    return list(dict.fromkeys([*(split_term_args or ()), *(non_split_term_args or ())]))
+
+
+def get_search_vector(fields: Iterable[str], config: Optional[str] = None):
+    """
+    Return the `tsvector` expression over `fields`.
+
+    Indexes must be built from this exact expression (see `get_search_index`)
+    for the planner to use them.
+    """
+    return SearchVector(*fields, config=config or get_search_config())
+
+
+def get_search_index(fields: Iterable[str], name: str, config: Optional[str] = None):
+    """
+    Return a GIN index on the search vector of `fields`, for a model's
+    `Meta.indexes`.
+    """
+    return GinIndex(get_search_vector(fields, config), name=name)
+
+
+def get_search_query(search: str, config: Optional[str] = None):
+    """
+    Return `websearch_to_tsquery(search)` OR-ed with a prefix match on every
+    word, or None when `search` has no words.
+    """
+    words = WORD_RE.findall(search)
+    if not words:
+        return None
+    config = config or get_search_config()
+    # Only word characters reach the raw tsquery, so it cannot be malformed.
+    prefix = " & ".join(f"{word}:*" for word in words)
+    return SearchQuery(search, config=config, search_type="websearch") | SearchQuery(
+        prefix, config=config, search_type="raw"
+    )
+
+
+def full_text_search(
+    search=None,
+    split_term_args=None,
+    non_split_term_args=None,
+    vector_field=None,
+    config=None,
+) -> Q:
+    """
+    Full-text counterpart of `index_search`, with the same arguments.
+
+    Split and non-split fields are searched together: with full-text search
+    every word of `search` has to match somewhere in the row (or be a prefix
+    of a word that does), rather than any word in any field.
+    """
+    if not search:
+        return Q()
+    query = get_search_query(search, config)
+    if query is None:
+        return Q()
+    if vector_field:
+        return Q(**{vector_field: query})
+    fields = _search_fields(split_term_args, non_split_term_args)
+    if not fields:
+        return Q()
+    return Q(SearchVectorExact(get_search_vector(fields, config), query))
+
+
+def search_rank(
+    search,
+    split_term_args=None,
+    non_split_term_args=None,
+    vector_field=None,
+    config=None,
+):
+    """
+    Return a `ts_rank` expression for annotating and ordering the results of
+    `full_text_search`, or None when there is nothing to rank.
+    """
+    query = get_search_query(search or "", config)
+    if query is None:
+        return None
+    if vector_field:
+        return SearchRank(F(vector_field), query)
+    fields = _search_fields(split_term_args, non_split_term_args)
+    return SearchRank(get_search_vector(fields, config), query) if fields else None
@@ -0,0 +1,145 @@
+"""
+pg_trgm GIN indexes for the fields searched with `index_search`.
+
+`icontains` compiles to `UPPER("column"::text) LIKE UPPER('%term%')` on
+PostgreSQL; a GIN index on that same expression with `gin_trgm_ops` lets
+the planner answer it with a bitmap index scan instead of reading the table.
+
+- get_search_fields: Search fields declared by the viewsets in the URLconf
+- resolve_search_field: Model and text column an ORM path ends on
+- create_index_sql / drop_index_sql: `CONCURRENTLY` DDL for one column
+- get_index_state: Whether an index exists and is valid
+- index_serves_search: Whether the planner can use an index for a search
+"""
+
+import hashlib
+from typing import Iterator, NamedTuple, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.urls import URLPattern, URLResolver, get_resolver
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+
+class SearchField(NamedTuple):
+    viewset: type
+    path: str
+    model: type
+    field: models.Field
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def column(self):
+        return self.field.column
+
+
+def _iter_callbacks(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def resolve_search_field(model, path) -> Optional[models.Field]:
+    """
+    Follow an ORM `path` (`user__email`) from `model` to the text field it
+    ends on, or None when it does not end on a text column.
+    """
+    *relations, name = path.split("__")
+    try:
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+            if model is None:
+                return None
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not isinstance(field, TEXT_FIELDS) or not field.concrete:
+        return None
+    return field
+
+
+def get_search_fields(urlconf=None) -> Iterator[SearchField]:
+    """
+    Yield the text fields searched by the viewsets routed in `urlconf`,
+    once per viewset and field path.
+    """
+    seen = set()
+    for callback in _iter_callbacks(get_resolver(urlconf).url_patterns):
+        viewset = getattr(callback, "cls", None)
+        if viewset is None or viewset in seen:
+            continue
+        seen.add(viewset)
+        queryset = getattr(viewset, "queryset", None)
+        if queryset is None:
+            continue
+        paths = [
+            *(getattr(viewset, "split_term_args", None) or ()),
+            *(getattr(viewset, "non_split_term_args", None) or ()),
+        ]
+        for path in dict.fromkeys(paths):
+            field = resolve_search_field(queryset.model, path)
+            if field is not None:
+                yield SearchField(viewset, path, field.model, field)
+
+
+def get_index_name(table, column) -> str:
+    name = f"{table}_{column}_trgm"
+    if len(name) <= 63:
+        return name
+    # PostgreSQL truncates identifiers to 63 bytes; keep them unique.
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    return f"{name[:54]}_{digest}"
+
+
+def create_index_sql(schema_editor, table, column, name) -> str:
+    quote = schema_editor.quote_name
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(name)} ON {quote(table)} "
+        f"USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)"
+    )
+
+
+def drop_index_sql(schema_editor, name) -> str:
+    return f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}"
+
+
+def get_index_state(connection, name) -> Optional[bool]:
+    """
+    Return None if the index does not exist, otherwise whether it is valid.
+
+    A failed or interrupted `CREATE INDEX CONCURRENTLY` leaves an invalid
+    index behind that the planner ignores; it has to be dropped and rebuilt.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [name],
+        )
+        row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def index_serves_search(connection, search_field, term="trgm") -> bool:
+    """
+    Whether the planner can answer `icontains` on `search_field` from an
+    index condition, rather than by filtering rows. Sequential scans are
+    disabled for the check so a small table does not hide a usable index.
+    """
+    queryset = search_field.model._default_manager.filter(
+        **{f"{search_field.field.name}__icontains": term}
+    )
+    sql, params = queryset.query.sql_with_params()
+    # SET LOCAL ends with the transaction, even when EXPLAIN fails.
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {sql}", params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    return "Index Cond" in plan
@@ -1,3 +1,160 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from core.authentication import TokenUserAuthentication
+from core.batch import run_batch
+from core.constants import ExportStatusChoice
+from core.jwt_keys import get_jwks
+from core.models import ExportJob
+from core.serializers import (
+    BatchResponseItemSerializer,
+    BatchSubRequestSerializer,
+    ExportJobSerializer,
+)
+from core.viewsets import RetrieveViewSetMixin
+
+
+class ExportJobViewSet(RetrieveViewSetMixin):
+    """
+    Status and download of background exports started from a list endpoint's
+    `export/jobs/` action. Users only see the jobs they started, which only
+    needs the user id, so the user is taken from the token claims.
+    """
+
+    authentication_classes = (TokenUserAuthentication, SessionAuthentication)
+    serializer_class = ExportJobSerializer
+    lookup_field = "uuid"
+    retrieve_success_message = "Export status fetched successfully"
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(created_by_id=self.request.user.pk)
+
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ExportStatusChoice.COMPLETED or not job.file:
+            return Response(
+                {"message": "Export is not ready yet."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=f"export.{job.export_format}",
+        )
+
+
+@method_decorator(
+    name="post",
+    decorator=swagger_auto_schema(
+        tags=["Batch"],
+        operation_summary="Batch Requests",
+        operation_description=(
+            "Runs several API requests in one round trip. Takes an array of "
+            "sub-requests and returns their status and body in the same order."
+        ),
+        request_body=BatchSubRequestSerializer(many=True),
+        responses={
+            200: openapi.Response(
+                description="Batch processed",
+                schema=BatchResponseItemSerializer(many=True),
+                examples={
+                    "application/json": {
+                        "message": "Batch processed",
+                        "data": [
+                            {"status": 200, "body": {"message": "Fetched successfully"}}
+                        ],
+                    }
+                },
+            ),
+            400: openapi.Response(
+                description="Validation Error",
+                examples={
+                    "application/json": {"message": "At most 20 requests per batch."}
+                },
+            ),
+        },
+    ),
+)
+class BatchView(APIView):
+    """
+    Dispatch an array of sub-requests in-process.
+
+    The batch is authenticated once and every sub-request runs as that user;
+    independent GETs run concurrently.
+    """
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {"message": "Expected a list of requests."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_requests = getattr(settings, "BATCH_MAX_REQUESTS", 20)
+        if len(request.data) > max_requests:
+            return Response(
+                {"message": f"At most {max_requests} requests per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = BatchSubRequestSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        results = run_batch(
+            request, serializer.validated_data, excluded_views=(self.__class__,)
+        )
+        return Response({"message": "Batch processed", "data": results}, status=200)
+
+
+@method_decorator(
+    name="get",
+    decorator=swagger_auto_schema(
+        tags=["Authentication"],
+        operation_summary="JSON Web Key Set",
+        operation_description=(
+            "Public keys that verify the JWTs this service issues, matched by "
+            "the `kid` token header. Empty when tokens are HS256-signed."
+        ),
+        responses={
+            200: openapi.Response(
+                description="Key set",
+                examples={
+                    "application/json": {
+                        "keys": [
+                            {
+                                "kty": "OKP",
+                                "crv": "Ed25519",
+                                "x": "11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo",
+                                "kid": "kPrK_qmxVWaYVA9wwBF6Iuo3vVzz7TxHCTwXBygrS4k",
+                                "alg": "EdDSA",
+                                "use": "sig",
+                            }
+                        ]
+                    }
+                },
+            ),
+        },
+    ),
+)
+class JWKSView(APIView):
+    """
+    Public signing keys, so other services verify tokens without calling
+    `/auth/me`. Cacheable for `JWKS_MAX_AGE` seconds.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        response = Response(get_jwks())
+        patch_cache_control(response, public=True, max_age=settings.JWKS_MAX_AGE)
+        return response
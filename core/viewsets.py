@@ -1,11 +1,198 @@
+import hashlib
+import json
+import tempfile
+
 import pandas as pd
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.text import slugify
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from core.cache import (
+    get_many_cache,
+    get_model_version_key,
+    get_model_versions,
+    set_cache,
+)
+from core.exports import (
+    CONTENT_TYPES,
+    get_export_fields,
+    get_export_header,
+    get_export_request_data,
+    iter_export_rows,
+    stream_csv,
+    write_xlsx,
+)
+from core.models import ExportJob
+from core.serializers import (
+    BulkListSerializer,
+    DynamicFieldsModelSerializer,
+    DynamicFieldsSerializer,
+    ExportJobSerializer,
+)
+from core.signals import versioned_models
+from core.sync import (
+    WatermarkExpired,
+    decode_watermark,
+    encode_watermark,
+    get_changed_rows,
+    get_latest_tombstone_position,
+    get_sync_cutoff,
+    get_tombstone_retention,
+    get_tombstones,
+)
+from core.tasks import start_export
+from core.utils.common import index_search, is_unique_violation
+from core.utils.queryset import get_only_fields, get_related_plan
+
+
+class RelatedFieldsViewSetMixin(viewsets.GenericViewSet):
+    """
+    Applies the `select_related` / `prefetch_related` lookups the serializer
+    needs, worked out from its fields, so lists run a constant number of
+    queries instead of one per row for each relation.
+
+    Set `select_related_fields` and/or `prefetch_related_fields` (strings or
+    `Prefetch` objects) to replace the automatic plan for a viewset, or
+    `auto_related_fields = False` to turn it off.
+    """
+
+    related_fields_actions = ("list", "retrieve", "export")
+    auto_related_fields = True
+    select_related_fields = None
+    prefetch_related_fields = None
+
+    def get_related_plan(self, queryset):
+        if (
+            self.select_related_fields is not None
+            or self.prefetch_related_fields is not None
+        ):
+            return (
+                self.select_related_fields or (),
+                self.prefetch_related_fields or (),
+            )
+        if not self.auto_related_fields:
+            return (), ()
+        return get_related_plan(queryset.model, self.get_serializer())
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.related_fields_actions:
+            return queryset
+        return self.apply_related_plan(queryset)
+
+    def apply_related_plan(self, queryset):
+        select, prefetch = self.get_related_plan(queryset)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class SparseFieldsViewSetMixin(viewsets.GenericViewSet):
+    """
+    Lets clients pick the fields they need with `?fields=a,b` or
+    `?exclude=c`, and narrows the queryset with `.only()` to the columns
+    those fields read.
+
+    Works with serializers accepting `fields`/`exclude` (the core
+    `DynamicFields*` serializers). Serializer fields whose source cannot be
+    introspected disable the narrowing unless listed in
+    `sparse_field_sources`, e.g. `{"full_name": ["first_name", "last_name"]}`.
+    """
+
+    sparse_fields_actions = ("list", "retrieve")
+    sparse_field_sources = None
+
+    def get_sparse_fields(self):
+        """Return the `(fields, exclude)` requested in the query params."""
+        if self.action not in self.sparse_fields_actions:
+            return None, None
+        if not issubclass(
+            self.get_serializer_class(),
+            (DynamicFieldsModelSerializer, DynamicFieldsSerializer),
+        ):
+            return None, None
+
+        def parse(param):
+            value = self.request.query_params.get(param)
+            if value is None:
+                return None
+            return [name.strip() for name in value.split(",") if name.strip()]
+
+        return parse("fields"), parse("exclude")
+
+    def get_serializer(self, *args, **kwargs):
+        fields, exclude = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        if exclude:
+            kwargs.setdefault("exclude", exclude)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, exclude = self.get_sparse_fields()
+        if fields is None and not exclude:
+            return queryset
+
+        serializer = self.get_serializer()
+        only = get_only_fields(queryset.model, serializer, self.sparse_field_sources)
+        if only is not None:
+            if getattr(serializer, "cache_representation", False):
+                # Part of the cache key; deferred, it costs a query per row.
+                only.add(serializer.representation_cache_timestamp_field)
+            queryset = queryset.only(*only)
+        return queryset
+
+
+class IndexSearchViewSetMixin(viewsets.GenericViewSet):
+    """
+    Filters with `index_search` on the `?search=` parameter when the viewset
+    sets `split_term_args` and/or `non_split_term_args`.
+
+    The fields are also what `manage.py trigram_indexes` indexes for
+    substring search.
+    """
+
+    split_term_args = None
+    non_split_term_args = None
+    search_param = "search"
+    index_search_actions = ("list", "export", "export_job", "autocomplete")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.index_search_actions:
+            return queryset
+        if not (self.split_term_args or self.non_split_term_args):
+            return queryset
+        search = self.request.query_params.get(self.search_param)
+        if not search:
+            return queryset
+        return queryset.filter(
+            index_search(search, self.split_term_args, self.non_split_term_args)
+        )
+
 
-class ListViewSetMixin(mixins.ListModelMixin, viewsets.GenericViewSet):
+class ListViewSetMixin(
+    mixins.ListModelMixin,
+    IndexSearchViewSetMixin,
+    SparseFieldsViewSetMixin,
+    RelatedFieldsViewSetMixin,
+):
     list_success_message = "Fetched successfully"
+    list_cache_timeout = None
+    list_cache_dependencies = ()
+    export_fields = None
+    export_chunk_size = 2000
+    sync_timestamp_field = "updated_at"
+    sync_page_size = 500
+    # Seconds a change waits before it is synced, see `core.sync`
+    sync_safety_window = 5
 
     def paginate_queryset(self, queryset, view=None):
         if (
@@ -16,6 +203,11 @@ class ListViewSetMixin(mixins.ListModelMixin, viewsets.GenericViewSet):
         return self.paginator.paginate_queryset(queryset, self.request, view=self)
 
     def list(self, request, *args, **kwargs):
+        if self.list_cache_timeout:
+            cached = self.get_cached_list_response(request)
+            if cached is not None:
+                return cached
+
         response = super().list(request, *args, **kwargs)
 
         if isinstance(response.data, dict) and "results" in response.data:
@@ -38,8 +230,315 @@ class ListViewSetMixin(mixins.ListModelMixin, viewsets.GenericViewSet):
             status=response.status_code,
         )
 
+    def get_list_cache_scope(self, request):
+        """
+        Part of the cache key that separates users who may see different rows.
+
+        Defaults to one cache per user; override to share entries, e.g. return
+        a constant when the queryset does not depend on the user.
+        """
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return "anon"
+
+    def get_list_cache_models(self):
+        models = [self.get_queryset().model, *self.list_cache_dependencies]
+        unregistered = [
+            model._meta.label for model in models if model not in versioned_models
+        ]
+        if unregistered:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} caches its list against "
+                f"{', '.join(unregistered)}; add them to VERSIONED_MODELS so "
+                "writes invalidate it."
+            )
+        return models
+
+    def get_list_cache_key(self, request):
+        params = sorted(
+            (key, sorted(values)) for key, values in request.query_params.lists()
+        )
+        window = None
+        if self.paginator is not None and hasattr(self.paginator, "get_limit"):
+            window = (
+                self.paginator.get_limit(request),
+                self.paginator.get_offset(request),
+            )
+        parts = [
+            request.get_host(),
+            request.path,
+            params,
+            window,
+            self.get_list_cache_scope(request),
+            request.accepted_media_type,
+        ]
+        digest = hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+        label = self.get_queryset().model._meta.label_lower
+        return f"list-cache:{label}:{digest}"
+
+    def get_cached_list_response(self, request):
+        """
+        Return the cached rendered list, or None and remember where to store it.
+
+        The entry and the model version tokens are read in one round trip; the
+        entry is only used if it was rendered under the current versions.
+        """
+        models = self.get_list_cache_models()
+        version_keys = [get_model_version_key(model) for model in models]
+        key = self.get_list_cache_key(request)
+        values = get_many_cache([key, *version_keys])
+        versions = {
+            version_key: values.get(version_key) for version_key in version_keys
+        }
+        if None in versions.values():
+            versions = get_model_versions(models)
+            if versions is None:
+                # Without the versions a stale entry cannot be told apart.
+                return None
+
+        cached = values.get(key)
+        if cached and cached["versions"] == versions:
+            return HttpResponse(
+                cached["content"],
+                content_type=cached["content_type"],
+                status=cached["status"],
+            )
+        self._list_cache_entry = (key, versions)
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        entry = getattr(self, "_list_cache_entry", None)
+        if entry and isinstance(response, Response) and response.status_code == 200:
+            key, versions = entry
+            response.render()
+            self.cache_list_response(
+                key,
+                {
+                    "versions": versions,
+                    "content": response.content,
+                    "content_type": response["Content-Type"],
+                    "status": response.status_code,
+                },
+            )
+        return response
+
+    def cache_list_response(self, key, value):
+        set_cache(key, value, timeout=self.list_cache_timeout)
+
+    def get_export_filename(self, queryset, export_format):
+        name = slugify(queryset.model._meta.verbose_name_plural)
+        return f"{name}.{export_format}"
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request, *args, **kwargs):
+        # `format` is reserved by DRF for renderer selection.
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in CONTENT_TYPES:
+            return Response(
+                {"message": f"Unsupported export format '{export_format}'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        header = get_export_header(get_export_fields(serializer, self.export_fields))
+        rows = iter_export_rows(queryset, serializer, self.export_chunk_size)
+        filename = self.get_export_filename(queryset, export_format)
+
+        if export_format == "csv":
+            response = StreamingHttpResponse(
+                stream_csv(header, rows), content_type=CONTENT_TYPES["csv"]
+            )
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        # An xlsx file is a zip archive and cannot be sent before it is
+        # complete, so the workbook is spooled to disk and streamed from there.
+        file = tempfile.TemporaryFile()
+        write_xlsx(header, rows, file)
+        file.seek(0)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=filename,
+            content_type=CONTENT_TYPES["xlsx"],
+        )
+
+    @action(detail=False, methods=["post"], url_path="export/jobs")
+    def export_job(self, request, *args, **kwargs):
+        """
+        Start a background export of the filtered list; poll the returned job
+        for progress and download the file once it is completed.
+        """
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in CONTENT_TYPES:
+            return Response(
+                {"message": f"Unsupported export format '{export_format}'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-class UpdateViewSetMixin(mixins.UpdateModelMixin, viewsets.GenericViewSet):
+        job = ExportJob.objects.create_for_queryset(
+            self.filter_queryset(self.get_queryset()),
+            self.get_serializer_class(),
+            fields=self.export_fields,
+            export_format=export_format,
+            request_data=get_export_request_data(request),
+            # Token users cannot be assigned to the foreign key, only their id.
+            created_by_id=request.user.pk,
+        )
+        transaction.on_commit(lambda: start_export.delay(job.id))
+        return Response(
+            {
+                "message": "Export started",
+                "data": ExportJobSerializer(
+                    job, context=self.get_serializer_context()
+                ).data,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(detail=False, methods=["get"], url_path="sync")
+    def sync(self, request, *args, **kwargs):
+        """
+        Return the rows changed and the primary keys deleted since
+        `?watermark=`, or every row on a first sync without one.
+
+        Pass the returned `watermark` to the next sync; while `has_more` is
+        true, sync again right away. Rows come from `get_queryset()` without
+        the list filters, so a row only leaves a client's copy through a
+        tombstone (a delete or a soft delete). Changes are synced once they
+        are `sync_safety_window` seconds old.
+        """
+        queryset = self.get_queryset()
+        model = queryset.model
+        if self.sync_timestamp_field not in {
+            field.name for field in model._meta.concrete_fields
+        }:
+            return Response(
+                {"message": f"{model._meta.verbose_name} does not support sync."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cutoff = get_sync_cutoff(self.sync_safety_window)
+        watermark = request.query_params.get("watermark")
+        if watermark:
+            try:
+                # A client last synced when its watermark was issued, and
+                # has read the tombstones up to the safety window before.
+                max_age = (
+                    get_tombstone_retention().total_seconds() - self.sync_safety_window
+                )
+                changes, deletions = decode_watermark(watermark, max_age)
+            except WatermarkExpired as e:
+                return Response({"message": str(e)}, status=status.HTTP_410_GONE)
+            except ValueError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            changes, deletions = None, get_latest_tombstone_position(model, cutoff)
+
+        rows, more_rows = get_changed_rows(
+            self.apply_related_plan(queryset),
+            changes,
+            self.sync_page_size,
+            self.sync_timestamp_field,
+            cutoff,
+        )
+        tombstones, more_tombstones = get_tombstones(
+            model, deletions, self.sync_page_size, cutoff
+        )
+        if rows:
+            last = rows[-1]
+            changes = (getattr(last, self.sync_timestamp_field), last.pk)
+        if tombstones:
+            deletions = (tombstones[-1].deleted_at, tombstones[-1].id)
+
+        return Response(
+            {
+                "message": self.list_success_message,
+                "data": self.get_serializer(rows, many=True).data,
+                "deleted": [tombstone.object_pk for tombstone in tombstones],
+                "watermark": encode_watermark(changes, deletions),
+                "has_more": more_rows or more_tombstones,
+            }
+        )
+
+
+class RetrieveViewSetMixin(
+    mixins.RetrieveModelMixin, SparseFieldsViewSetMixin, RelatedFieldsViewSetMixin
+):
+    retrieve_success_message = "Fetched successfully"
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(
+            {"message": self.retrieve_success_message, "data": serializer.data}
+        )
+
+
+class BulkViewSetMixin(viewsets.GenericViewSet):
+    bulk_batch_size = 500
+    bulk_lookup_field = "id"
+    bulk_error_message = "Validation failed"
+    # Items accepted in one bulk request; None for no limit.
+    bulk_max_items = 1000
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        """
+        Return a `BulkListSerializer` wrapping the viewset's serializer class.
+        """
+        kwargs.setdefault("context", self.get_serializer_context())
+        child = self.get_serializer_class()(
+            context=kwargs["context"], partial=kwargs.get("partial", False)
+        )
+        return BulkListSerializer(
+            *args,
+            child=child,
+            batch_size=self.bulk_batch_size,
+            lookup_field=self.bulk_lookup_field,
+            **kwargs,
+        )
+
+    def get_bulk_payload_error(self, data):
+        if not isinstance(data, list):
+            return "Expected a list of items."
+        if self.bulk_max_items is not None and len(data) > self.bulk_max_items:
+            return f"Expected at most {self.bulk_max_items} items."
+        return None
+
+    def bulk_error_response(self, serializer):
+        # Depending on the DRF version, list errors are either a list aligned
+        # with the payload or a dict keyed by item index; report only the
+        # items that failed, with their position in the payload.
+        errors = serializer.errors
+        if isinstance(errors, list):
+            errors = dict(enumerate(errors))
+        if all(isinstance(index, int) for index in errors):
+            errors = [
+                {"index": index, "errors": detail}
+                for index, detail in sorted(errors.items())
+                if detail
+            ]
+        return Response(
+            {"message": self.bulk_error_message, "errors": errors},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def bulk_conflict_response(self, error):
+        # Validation only sees the rows saved before it ran; a concurrent
+        # write can still take a unique value before the batch is written.
+        if is_unique_violation(error):
+            reason = "conflicting unique values"
+        else:
+            reason = "the data violates a database constraint"
+        return Response(
+            {"message": f"{self.bulk_error_message}: {reason}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class UpdateViewSetMixin(mixins.UpdateModelMixin, BulkViewSetMixin):
     update_success_message = "Updated successfully"
 
     def get_request_data(self, request, *args, **kwargs):
@@ -63,6 +562,38 @@ class UpdateViewSetMixin(mixins.UpdateModelMixin, viewsets.GenericViewSet):
             {"message": self.update_success_message, "data": serializer.data}
         )
 
+    @action(detail=False, methods=["patch"], url_path="bulk")
+    def bulk_update(self, request, *args, **kwargs):
+        data = self.get_request_data(request)
+        error = self.get_bulk_payload_error(data)
+        if error:
+            return Response({"message": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        lookups = [
+            item[self.bulk_lookup_field]
+            for item in data
+            if isinstance(item, dict) and item.get(self.bulk_lookup_field) is not None
+        ]
+        instances = self.filter_queryset(self.get_queryset()).filter(
+            **{f"{self.bulk_lookup_field}__in": lookups}
+        )
+        serializer = self.get_bulk_serializer(list(instances), data=data, partial=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer)
+
+        try:
+            with transaction.atomic():
+                self.perform_bulk_update(serializer)
+        except IntegrityError as e:
+            return self.bulk_conflict_response(e)
+
+        return Response(
+            {"message": self.update_success_message, "data": serializer.data}
+        )
+
+    def perform_bulk_update(self, serializer):
+        serializer.save()
+
 
 class AutocompleteViewSetMixin(viewsets.GenericViewSet):
     autocomplete_fields = ["id", "name"]
@@ -84,10 +615,13 @@ class ListAutoCompleteViewSetMixin(ListViewSetMixin, AutocompleteViewSetMixin):
     pass
 
 
-class CreateViewSetMixin(mixins.CreateModelMixin, viewsets.GenericViewSet):
+class CreateViewSetMixin(mixins.CreateModelMixin, BulkViewSetMixin):
     create_success_message = "Created successfully"
 
     def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request, *args, **kwargs)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -97,3 +631,26 @@ class CreateViewSetMixin(mixins.CreateModelMixin, viewsets.GenericViewSet):
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
+
+    def bulk_create(self, request, *args, **kwargs):
+        error = self.get_bulk_payload_error(request.data)
+        if error:
+            return Response({"message": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_bulk_serializer(data=request.data)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer)
+
+        try:
+            with transaction.atomic():
+                self.perform_bulk_create(serializer)
+        except IntegrityError as e:
+            return self.bulk_conflict_response(e)
+
+        return Response(
+            {"message": self.create_success_message, "data": serializer.data},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def perform_bulk_create(self, serializer):
+        serializer.save()
@@ -2,7 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 import urllib.parse as urlparse
 
-from decouple import config
+from decouple import Csv, config
 
 from celery.schedules import crontab
 import os
@@ -170,23 +170,78 @@ CACHES = {
 CACHE_TTL = 60 * 60 * 24  # 1 day
 USER_AGENTS_CACHE = "default"
 
+# Models that list caches (ListViewSetMixin.list_cache_timeout) are keyed on;
+# writes to them bump their version token, see core.signals
+VERSIONED_MODELS = []
+
 REST_FRAMEWORK = {
-    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated"),
+    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_PAGINATION_CLASS": "core.pagination.CustomPagination",
     "PAGE_SIZE": 10,
+    # Reverse proxies appending to X-Forwarded-For in front of the app.
+    "NUM_PROXIES": config(
+        "NUM_PROXIES", default=None, cast=lambda v: int(v) if v else None
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": config("LOGIN_IP_THROTTLE_RATE", default="30/min"),
+        "login_email": config("LOGIN_EMAIL_THROTTLE_RATE", default="10/min"),
+    },
 }
 
+# "icontains" or "postgres" (full-text search), see core.utils.common.index_search
+INDEX_SEARCH_BACKEND = config("INDEX_SEARCH_BACKEND", default="icontains")
+INDEX_SEARCH_CONFIG = "simple"
+
+# Days deletions are kept for incremental syncs, see core.sync
+SYNC_TOMBSTONE_RETENTION_DAYS = config(
+    "SYNC_TOMBSTONE_RETENTION_DAYS", default=30, cast=int
+)
+
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Seconds between writes of the buffered `last_login` values to the database
+LAST_LOGIN_FLUSH_INTERVAL = config("LAST_LOGIN_FLUSH_INTERVAL", default=60, cast=int)
+
+# Users resolved by core.authentication.CachedJWTAuthentication. Changes reach
+# other processes within the local TTL; 0 disables the per-process cache.
+AUTH_USER_LOCAL_CACHE_TTL = config("AUTH_USER_LOCAL_CACHE_TTL", default=5, cast=int)
+AUTH_USER_CACHE_TTL = 60 * 15
+
+# Revoked jtis each process' Bloom filter holds at a 0.1% false positive rate
+# (about 180 KB), see core.revocation. It grows when more are revoked.
+JWT_REVOCATION_FILTER_CAPACITY = 100_000
+
+# PEM private keys (RSA or Ed25519, needs the jwt-asymmetric extra) to sign JWTs with
+# instead of SECRET_KEY; the first signs, all verify and are published at
+# /.well-known/jwks.json. See core.jwt_keys for rotating them.
+JWT_SIGNING_KEY_FILES = config("JWT_SIGNING_KEY_FILES", default="", cast=Csv())
+JWKS_MAX_AGE = 60 * 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
-    "ROTATE_REFRESH_TOKENS": False,
-    "BLACKLIST_AFTER_ROTATION": True,
+    "REFRESH_TOKEN_LIFETIME": timedelta(
+        days=config("REFRESH_TOKEN_LIFETIME_DAYS", default=14, cast=int)
+    ),
+    # Rotation and reuse detection are done by users.services.refresh_tokens,
+    # revoking through core.revocation instead of the blacklist app.
+    "ROTATE_REFRESH_TOKENS": True,
+    "BLACKLIST_AFTER_ROTATION": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "VERIFYING_KEY": None,
@@ -195,7 +250,7 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "USER_ID_FIELD": "uuid",
     "USER_ID_CLAIM": "user_uuid",
-    "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "AUTH_TOKEN_CLASSES": ("core.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
@@ -218,7 +273,16 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
 CELERY_TIMEZONE = "Asia/Kathmandu"
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "flush-last-logins": {
+        "task": "users.tasks.last_login.flush_last_logins",
+        "schedule": LAST_LOGIN_FLUSH_INTERVAL,
+    },
+    "prune-tombstones": {
+        "task": "core.tasks.prune_tombstones",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
 
 
 LOGGING = {
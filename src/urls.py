@@ -22,6 +22,7 @@ from src.swagger import schema_view
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("users.urls")),
+    path("", include("core.urls")),
     # API Documentation
     path(
         "",
@@ -1,19 +1,24 @@
-from django.contrib.auth.models import update_last_login
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from core.tokens import RefreshToken
 from users.api.v1.serializers.user import CustomUserSerializer
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
     @classmethod
-    def get_token(cls, user):
-        update_last_login(None, user)
+    def get_refresh_token(cls, user):
         token = super().get_token(user)
         token["id"] = user.id
         token["is_admin"] = user.is_admin
         token["is_superuser"] = user.is_superuser
-        return str(token.access_token)
+        return token
+
+    @classmethod
+    def get_token(cls, user):
+        return str(cls.get_refresh_token(user).access_token)
 
 
 class RegisterRequestSerializer(serializers.Serializer):
@@ -29,6 +34,14 @@ class LoginRequestSerializer(serializers.Serializer):
     password = serializers.CharField()
 
 
+class RefreshRequestSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
+class LogoutRequestSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+
 class UserTokenSerializer(serializers.Serializer):
     token = serializers.CharField()
 
@@ -38,7 +51,8 @@ class BaseResponseSerializer(serializers.Serializer):
 
 
 class AuthResponseSerializer(BaseResponseSerializer):
-    data = serializers.CharField()
+    data = serializers.CharField(help_text="Access token")
+    refresh = serializers.CharField(help_text="Single-use refresh token")
 
 
 class UserDataResponseSerializer(BaseResponseSerializer):
@@ -3,6 +3,8 @@ from users.models import CustomUser
 
 
 class CustomUserSerializer(DynamicFieldsModelSerializer):
+    cache_fields = True
+
     class Meta:
         model = CustomUser
         fields = [
@@ -0,0 +1,46 @@
+import hashlib
+
+from rest_framework.settings import api_settings
+
+from core.throttling import SlidingWindowRateThrottle
+
+
+class LoginIPThrottle(SlidingWindowRateThrottle):
+    """
+    Login attempts per client IP, rate `login_ip`. Behind proxies, set
+    `NUM_PROXIES` so the IP is read from `X-Forwarded-For`; otherwise the
+    header is ignored, as clients could send a new address every attempt.
+    """
+
+    scope = "login_ip"
+    backoff = 60
+
+    def get_ident(self, request):
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginEmailThrottle(SlidingWindowRateThrottle):
+    """
+    Login attempts per account, rate `login_email`, whichever IPs they come
+    from. The email is hashed so addresses do not end up in Redis.
+    """
+
+    scope = "login_email"
+    backoff = 60
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email")
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": hashlib.sha256(email.strip().lower().encode()).hexdigest(),
+        }
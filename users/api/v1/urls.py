@@ -1,7 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from users.api.v1.views.authentication import GetUserData, LoginView, RegisterView
+from users.api.v1.views.authentication import (
+    GetUserData,
+    LoginView,
+    LogoutView,
+    RefreshView,
+    RegisterView,
+)
 
 router = DefaultRouter()
 
@@ -10,4 +16,6 @@ urlpatterns = [
     path("auth/login/", LoginView.as_view(), name="login"),
     path("auth/register/", RegisterView.as_view(), name="register"),
     path("auth/me/", GetUserData.as_view(), name="get_user"),
+    path("auth/logout/", LogoutView.as_view(), name="logout"),
+    path("auth/refresh/", RefreshView.as_view(), name="token_refresh"),
 ]
@@ -1,8 +1,7 @@
 from datetime import datetime
 
 import jwt
-from django.conf import settings
-from django.db import transaction
+from django.contrib.auth.hashers import make_password
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from drf_yasg import openapi
@@ -12,18 +11,31 @@ from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from core.jwt_keys import get_verifying_key
+from core.revocation import is_token_revoked, revoke_token
 from users.api.v1.serializers.auth import (
     AuthResponseSerializer,
-    CustomTokenObtainPairSerializer,
     LoginRequestSerializer,
+    LogoutRequestSerializer,
+    RefreshRequestSerializer,
     RegisterRequestSerializer,
     UserDataResponseSerializer,
     UserTokenSerializer,
 )
 from users.api.v1.serializers.user import CustomUserSerializer
+from users.api.v1.throttling import LoginEmailThrottle, LoginIPThrottle
 from users.models import CustomUser
+from users.services.last_login import record_last_login
+from users.services.profile import get_user_profile
+from users.services.refresh_tokens import (
+    issue_tokens,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 
 
 @method_decorator(
@@ -72,7 +84,6 @@ class RegisterView(CreateAPIView):
     serializer_class = CustomUserSerializer
     permission_classes = (AllowAny,)
 
-    @transaction.atomic
     def post(self, request):
         data = request.data.copy()
         password = data.get("password")
@@ -88,13 +99,11 @@ class RegisterView(CreateAPIView):
             data=data, fields=["email", "first_name", "last_name", "contact"]
         )
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        user.last_login = datetime.now()
+        # Hash first so the user is written with a single INSERT.
+        last_login = timezone.now()
         if self.request.user.is_authenticated and self.request.user.is_admin:
-            user.last_login = None
-        user.save()
-        user.set_password(password)
-        user.save()
+            last_login = None
+        user = serializer.save(password=make_password(password), last_login=last_login)
         return Response(
             {
                 "message": "User created successfully",
@@ -109,7 +118,8 @@ class RegisterView(CreateAPIView):
     decorator=swagger_auto_schema(
         tags=["Authentication"],
         operation_summary="User Login",
-        operation_description="Authenticates user and returns JWT token.",
+        operation_description="Authenticates user and returns an access token "
+        "and a refresh token to renew it with, see User Token Refresh.",
         request_body=LoginRequestSerializer,
         responses={
             200: openapi.Response(
@@ -119,6 +129,7 @@ class RegisterView(CreateAPIView):
                     "application/json": {
                         "message": "Successfully logged in",
                         "data": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                        "refresh": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
                     }
                 },
             ),
@@ -126,11 +137,22 @@ class RegisterView(CreateAPIView):
                 description="Invalid credentials",
                 examples={"application/json": {"message": "Invalid credentials"}},
             ),
+            429: openapi.Response(
+                description="Too many login attempts, see the Retry-After header",
+                examples={
+                    "application/json": {
+                        "detail": "Request was throttled. "
+                        "Expected available in 60 seconds."
+                    }
+                },
+            ),
         },
     ),
 )
 class LoginView(TokenObtainPairView):
     permission_classes = (AllowAny,)
+    # Checked before the user lookup and password hashing.
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
 
     def post(self, request):
         email = request.data.get("email")
@@ -156,15 +178,14 @@ class LoginView(TokenObtainPairView):
                 status=401,
             )
 
-        access_token = CustomTokenObtainPairSerializer.get_token(user)
-
-        user.last_login = timezone.now()
-        user.save(update_fields=["last_login"])
+        tokens = issue_tokens(user)
+        record_last_login(user)
 
         return Response(
             {
                 "message": "Successfully logged in",
-                "data": access_token,
+                "data": tokens["access"],
+                "refresh": tokens["refresh"],
             },
             status=200,
         )
@@ -215,11 +236,9 @@ class GetUserData(APIView):
                     status=400,
                 )
             try:
-                decoded_data = jwt.decode(
-                    token,
-                    key=settings.SECRET_KEY,
-                    algorithms=["HS256"],
-                )
+                # The public keys when tokens are signed asymmetrically.
+                key, algorithms = get_verifying_key(token)
+                decoded_data = jwt.decode(token, key=key, algorithms=algorithms)
             except ExpiredSignatureError:
                 return Response(
                     {
@@ -246,14 +265,27 @@ class GetUserData(APIView):
             if "user_uuid" not in decoded_data:
                 return Response("Invalid Token!")
 
-            try:
-                user = CustomUser.objects.get(uuid=decoded_data["user_uuid"])
-            except CustomUser.DoesNotExist:
+            # Refresh tokens are signed with the same keys but are no proof
+            # of a login.
+            if decoded_data.get(api_settings.TOKEN_TYPE_CLAIM) != "access":
+                return Response(
+                    {"message": "Invalid Token, an access token is required."},
+                    status=400,
+                )
+
+            if is_token_revoked(decoded_data.get("jti")):
+                return Response(
+                    {"message": "Token has been revoked. Please login again!"},
+                    status=400,
+                )
+
+            # Cached per user, so most calls never reach the database.
+            user_data = get_user_profile(decoded_data["user_uuid"])
+            if user_data is None:
                 return Response(
                     {"message": "Invalid Token."},
                     status=400,
                 )
-            user_data = CustomUserSerializer(user).data
         except Exception as e:
             return Response(
                 {
@@ -268,3 +300,109 @@ class GetUserData(APIView):
             },
             status=200,
         )
+
+
+@method_decorator(
+    name="post",
+    decorator=swagger_auto_schema(
+        tags=["Authentication"],
+        operation_summary="User Logout",
+        operation_description="Revokes the access token the request is "
+        "authenticated with and, when given, the refresh token with every token "
+        "renewed from it.",
+        request_body=LogoutRequestSerializer,
+        responses={
+            200: openapi.Response(
+                description="Successfully logged out",
+                examples={"application/json": {"message": "Successfully logged out"}},
+            ),
+            400: openapi.Response(
+                description="Not authenticated with a token, or invalid refresh "
+                "token",
+                examples={
+                    "application/json": {"message": "No token to revoke was provided."}
+                },
+            ),
+        },
+    ),
+)
+class LogoutView(APIView):
+    def post(self, request):
+        token = request.auth
+        if token is None or "jti" not in token or "exp" not in token:
+            return Response(
+                {"message": "No token to revoke was provided."},
+                status=400,
+            )
+        refresh = request.data.get("refresh")
+        if refresh:
+            try:
+                revoke_refresh_token(refresh)
+            except TokenError as e:
+                return Response({"message": str(e)}, status=400)
+        revoke_token(token["jti"], token["exp"])
+        return Response(
+            {"message": "Successfully logged out"},
+            status=200,
+        )
+
+
+@method_decorator(
+    name="post",
+    decorator=swagger_auto_schema(
+        tags=["Authentication"],
+        operation_summary="User Token Refresh",
+        operation_description="Exchanges a refresh token for a new access token "
+        "and a new refresh token. Each refresh token works once; using one again "
+        "revokes every token renewed from the same login.",
+        request_body=RefreshRequestSerializer,
+        responses={
+            200: openapi.Response(
+                description="Successfully refreshed",
+                schema=AuthResponseSerializer,
+                examples={
+                    "application/json": {
+                        "message": "Successfully refreshed",
+                        "data": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                        "refresh": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                    }
+                },
+            ),
+            400: openapi.Response(
+                description="Validation Error",
+                examples={
+                    "application/json": {"message": "Refresh token is required."}
+                },
+            ),
+            401: openapi.Response(
+                description="Invalid, expired, revoked or reused refresh token",
+                examples={
+                    "application/json": {"message": "Token has already been used"}
+                },
+            ),
+        },
+    ),
+)
+class RefreshView(APIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if not refresh:
+            return Response(
+                {"message": "Refresh token is required."},
+                status=400,
+            )
+        try:
+            tokens = rotate_refresh_token(refresh)
+        except TokenError as e:
+            return Response({"message": str(e)}, status=401)
+        return Response(
+            {
+                "message": "Successfully refreshed",
+                "data": tokens["access"],
+                "refresh": tokens["refresh"],
+            },
+            status=200,
+        )
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.services.user_import import import_users, iter_user_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates users from a CSV or XLSX file with the columns email, "
+        "first_name, last_name, contact and password. Existing emails are "
+        "skipped, so the import can be rerun"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file to import")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Users per insert"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes hashing passwords, 0 to hash in this process",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        try:
+            rows = iter_user_rows(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if options["workers"] > 0:
+            with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+                stats = import_users(rows, options["batch_size"], executor)
+        else:
+            stats = import_users(rows, options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Created {stats['created']} users"))
+        if stats["existing"]:
+            self.stdout.write(f"Skipped {stats['existing']} existing emails")
+        if stats["duplicate"]:
+            self.stdout.write(f"Skipped {stats['duplicate']} repeated emails")
+        if stats["invalid"]:
+            lines = ", ".join(map(str, stats["invalid"]))
+            self.stderr.write(f"Skipped {len(stats['invalid'])} invalid rows: {lines}")
@@ -0,0 +1,178 @@
+"""
+Write-behind `last_login` tracking.
+
+A login records its time in a Redis hash keyed by user id instead of
+updating the user row, so any number of logins of a user between two
+flushes costs one hash field. `flush_last_logins` (run periodically by
+Celery beat) moves the hash aside and writes it to the database in bulk.
+
+- record_last_login: Record a login, coalesced per user
+- get_last_login: Current last login of a user, pending writes included
+- flush_last_logins: Write pending logins to the database
+
+Without a Redis cache backend (e.g. locmem in tests) logins are written
+straight to the database.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from redis.exceptions import ResponseError, WatchError
+
+from core.cache import get_redis
+from users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "last-login:pending"
+FLUSHING_KEY = "last-login:flushing"
+LOCK_KEY = "last-login:flush-lock"
+LOCK_TIMEOUT = 300
+FLUSH_BATCH_SIZE = getattr(settings, "LAST_LOGIN_FLUSH_BATCH_SIZE", 500)
+
+
+def _to_datetime(value) -> datetime:
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+
+
+def _write_last_logins(last_logins: Dict[int, datetime]) -> int:
+    """
+    Write `{user_id: last_login}` in one UPDATE per batch. A value never
+    moves a user's `last_login` back, so replaying a flush is harmless.
+    """
+    updated = 0
+    user_ids = list(last_logins)
+    for start in range(0, len(user_ids), FLUSH_BATCH_SIZE):
+        end = start + FLUSH_BATCH_SIZE
+        batch = user_ids[start:end]
+        value = Case(
+            *(When(pk=user_id, then=Value(last_logins[user_id])) for user_id in batch),
+            output_field=DateTimeField(),
+        )
+        updated += CustomUser.objects.filter(pk__in=batch).update(
+            last_login=Greatest(Coalesce("last_login", value), value)
+        )
+    return updated
+
+
+def record_last_login(user, when: Optional[datetime] = None, client=None) -> None:
+    """
+    Record that `user` logged in at `when` (now by default).
+
+    Args:
+        user: User that logged in; its `last_login` is updated in memory
+        when: Login time
+        client: Redis client, the default cache's by default
+    """
+    when = when or timezone.now()
+    user.last_login = when
+    client = get_redis() if client is None else client
+    if client is not None:
+        try:
+            client.hset(PENDING_KEY, user.pk, when.timestamp())
+            return
+        except Exception as e:
+            logger.error(
+                f"Error recording last login for user {user.pk}: {str(e)}",
+                exc_info=True,
+            )
+    _write_last_logins({user.pk: when})
+
+
+def get_last_login(user, client=None) -> Optional[datetime]:
+    """
+    Return the latest login of `user`, whether it is still pending in Redis
+    or already written to the database.
+
+    Redis is read first: a flush writes the database before it drops the
+    hash, so a value is always in one of the two reads.
+    """
+    client = get_redis() if client is None else client
+    pending = []
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.hget(PENDING_KEY, user.pk)
+            pipe.hget(FLUSHING_KEY, user.pk)
+            pending = [_to_datetime(value) for value in pipe.execute() if value]
+        except Exception as e:
+            logger.error(
+                f"Error reading last login for user {user.pk}: {str(e)}",
+                exc_info=True,
+            )
+    last_login = (
+        CustomUser.objects.filter(pk=user.pk)
+        .values_list("last_login", flat=True)
+        .first()
+    )
+    if last_login is not None:
+        pending.append(last_login)
+    return max(pending, default=None)
+
+
+def _flush_hash(client) -> int:
+    last_logins = {
+        int(user_id): _to_datetime(value)
+        for user_id, value in client.hgetall(FLUSHING_KEY).items()
+    }
+    updated = _write_last_logins(last_logins)
+    client.delete(FLUSHING_KEY)
+    return updated
+
+
+def _release_lock(client, token) -> None:
+    """
+    Delete the flush lock if it still holds `token`. A flush outliving
+    LOCK_TIMEOUT must not drop the lock a later flush has taken since.
+    """
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(LOCK_KEY)
+            if pipe.get(LOCK_KEY) not in (token, token.encode()):
+                logger.warning("Last login flush lock expired before the flush ended")
+                return
+            pipe.multi()
+            pipe.delete(LOCK_KEY)
+            pipe.execute()
+        except WatchError:
+            # Expired and taken by another flush between GET and DEL.
+            logger.warning("Last login flush lock expired before the flush ended")
+
+
+def flush_last_logins(client=None) -> int:
+    """
+    Write the pending logins to the database.
+
+    RENAME swaps the pending hash out atomically, so logins recorded meanwhile
+    start a new one. A flush that died half way leaves its hash behind under
+    FLUSHING_KEY and the next flush writes it first.
+
+    Returns:
+        Number of users updated
+    """
+    client = get_redis() if client is None else client
+    if client is None:
+        return 0
+    token = uuid.uuid4().hex
+    if not client.set(LOCK_KEY, token, nx=True, ex=LOCK_TIMEOUT):
+        logger.debug("Last login flush already running")
+        return 0
+    try:
+        updated = 0
+        if client.exists(FLUSHING_KEY):
+            updated += _flush_hash(client)
+        try:
+            client.rename(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # No logins since the last flush.
+            return updated
+        return updated + _flush_hash(client)
+    finally:
+        _release_lock(client, token)
@@ -0,0 +1,47 @@
+"""
+Cached user payloads for `/auth/me`.
+
+The serialized user is cached per `user_uuid` against the version token of
+that user (see `core.cache.get_versioned_cache`), and both are read in one
+round trip. Every save or delete of a user gives it a new token (see
+`core.signals`), so a payload read from the database just before the user
+changed and cached just after can never be served.
+
+- get_user_profile: Serialized user, from the cache when possible
+- invalidate_user_profile: Drop the cached payload of a user
+"""
+
+from typing import Optional
+
+from django.conf import settings
+
+from core.cache import bump_object_version, get_versioned_cache, set_versioned_cache
+from users.api.v1.serializers.user import CustomUserSerializer
+from users.models import CustomUser
+
+
+def get_profile_cache_key(user_uuid) -> str:
+    return f"user-profile:{user_uuid}"
+
+
+def get_user_profile(user_uuid) -> Optional[dict]:
+    """
+    Return `CustomUserSerializer` data of the user with `user_uuid`, or None
+    when there is no such user.
+    """
+    key = get_profile_cache_key(user_uuid)
+    version, data = get_versioned_cache(key, CustomUser, user_uuid)
+    if data is not None:
+        return data
+
+    user = CustomUser.objects.filter(uuid=user_uuid).first()
+    if user is None:
+        return None
+    data = dict(CustomUserSerializer(user).data)
+    set_versioned_cache(key, version, data, timeout=settings.CACHE_TTL)
+    return data
+
+
+def invalidate_user_profile(user_uuid) -> bool:
+    """Give the user a new version token, so its cached payload is unused."""
+    return bump_object_version(CustomUser, user_uuid)
@@ -0,0 +1,127 @@
+"""
+Refresh token rotation with reuse detection.
+
+Every login starts a token family. A refresh token can be used once: it is
+exchanged for a new access token and a new refresh token of the same
+family. A refresh token used a second time has leaked, so the whole family
+is revoked: none of its refresh tokens work any more and the last access
+token it issued is revoked too (see `core.revocation`).
+
+Renewing a session this way costs a signature check and a few cache
+operations instead of the password hash of a login.
+
+- issue_tokens: Access and refresh token for a login
+- rotate_refresh_token: New tokens in exchange for a refresh token
+- revoke_refresh_token: Revoke the family of a refresh token, e.g. on logout
+"""
+
+import logging
+import math
+import time
+from typing import Dict
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from core.authentication import get_cached_user
+from core.cache import get_cache, set_cache
+from core.revocation import is_token_revoked, revoke_token
+from core.tokens import RefreshToken
+from users.api.v1.serializers.auth import CustomTokenObtainPairSerializer
+
+logger = logging.getLogger(__name__)
+
+FAMILY_CLAIM = "family"
+
+
+def get_family_key(family) -> str:
+    return f"refresh-family:{family}"
+
+
+def get_revoked_family_key(family) -> str:
+    return f"refresh-family-revoked:{family}"
+
+
+def get_used_key(jti) -> str:
+    return f"refresh-used:{jti}"
+
+
+def _family_timeout() -> int:
+    # Every refresh token of a family expires within this time of the last
+    # one being issued.
+    return math.ceil(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def _issue(user, family=None):
+    refresh = CustomTokenObtainPairSerializer.get_refresh_token(user)
+    refresh[FAMILY_CLAIM] = family or refresh[api_settings.JTI_CLAIM]
+    access = refresh.access_token
+    # The latest access token, revoked with the family.
+    set_cache(
+        get_family_key(refresh[FAMILY_CLAIM]),
+        {"jti": access[api_settings.JTI_CLAIM], "exp": access["exp"]},
+        timeout=_family_timeout(),
+    )
+    return refresh, access
+
+
+def _revoke_family(family):
+    set_cache(get_revoked_family_key(family), True, timeout=_family_timeout())
+    latest = get_cache(get_family_key(family))
+    if latest is not None:
+        revoke_token(latest["jti"], latest["exp"])
+
+
+def issue_tokens(user) -> Dict[str, str]:
+    """Return the `access` and `refresh` token of a new login of `user`."""
+    refresh, access = _issue(user)
+    return {"access": str(access), "refresh": str(refresh)}
+
+
+def rotate_refresh_token(raw_token: str) -> Dict[str, str]:
+    """
+    Exchange a refresh token for a new `access` and `refresh` token.
+
+    Raises:
+        TokenError: The token is invalid, expired, revoked or was already
+            used, or its user is gone or inactive
+    """
+    token = RefreshToken(raw_token)
+    jti = token[api_settings.JTI_CLAIM]
+    family = token.get(FAMILY_CLAIM, jti)
+    if is_token_revoked(jti) or get_cache(get_revoked_family_key(family)):
+        raise TokenError(_("Token has been revoked"))
+
+    # `add` is atomic, so of concurrent uses of a token only one gets in.
+    used_timeout = max(math.ceil(token["exp"] - time.time()), 1)
+    if not cache.add(get_used_key(jti), True, timeout=used_timeout):
+        logger.warning(f"Refresh token reuse detected, revoking token family {family}")
+        _revoke_family(family)
+        raise TokenError(_("Token has already been used"))
+
+    user = get_cached_user(token[api_settings.USER_ID_CLAIM])
+    if user is None or not user.is_active:
+        raise TokenError(_("User not found or inactive"))
+
+    refresh, access = _issue(user, family)
+    # A reuse may have revoked the family meanwhile; it revoked whatever
+    # access token it found, so check again after storing ours.
+    if get_cache(get_revoked_family_key(family)):
+        revoke_token(access[api_settings.JTI_CLAIM], access["exp"])
+        raise TokenError(_("Token has been revoked"))
+    return {"access": str(access), "refresh": str(refresh)}
+
+
+def revoke_refresh_token(raw_token: str):
+    """
+    Revoke a refresh token with all tokens of its family.
+
+    Raises:
+        TokenError: The token is invalid or expired
+    """
+    token = RefreshToken(raw_token)
+    jti = token[api_settings.JTI_CLAIM]
+    _revoke_family(token.get(FAMILY_CLAIM, jti))
+    revoke_token(jti, token["exp"])
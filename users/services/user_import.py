@@ -0,0 +1,190 @@
+"""
+Bulk import of users from CSV or XLSX files, e.g. when onboarding a tenant.
+
+Rows are streamed from the file and handled in batches: each batch drops
+invalid rows (checked against the model fields, e.g. their `max_length`) and
+emails already seen in the file or present in the database (one
+`email__in` query per batch), hashes the remaining passwords in a process
+pool and inserts the users with one `bulk_create`. Emails that already exist
+are skipped, so an interrupted import can simply be rerun. Users signing up
+while a batch is hashed are skipped as existing too. Every committed batch
+bumps the `CustomUser` version, invalidating cached user lists.
+
+- iter_user_rows: Stream the rows of a CSV/XLSX file as dicts
+- hash_passwords: Hash passwords, in parallel when given an executor
+- import_users: Create the users of a file
+"""
+
+import csv
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from openpyxl import load_workbook
+
+from core.signals import bump_version_on_commit
+from users.models import CustomUser
+
+IMPORT_FIELDS = ("email", "first_name", "last_name", "contact")
+
+
+def _normalize_header(header) -> str:
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _iter_xlsx_rows(path) -> Iterator[Dict[str, str]]:
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(cell) for cell in next(rows, ())]
+        for row in rows:
+            yield {
+                key: "" if value is None else str(value)
+                for key, value in zip(header, row)
+            }
+    finally:
+        workbook.close()
+
+
+def _iter_csv_rows(path) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [_normalize_header(cell) for cell in next(reader, ())]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def iter_user_rows(path) -> Iterator[Dict[str, str]]:
+    """
+    Stream the rows of a `.csv` or `.xlsx` file as dicts keyed by the
+    lowercased header (`First Name` -> `first_name`).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _iter_csv_rows(path)
+    if extension == ".xlsx":
+        return _iter_xlsx_rows(path)
+    raise ValueError(f"Unsupported file type {extension!r}, expected .csv or .xlsx")
+
+
+def hash_passwords(passwords: List[Optional[str]], executor=None) -> List[str]:
+    """
+    Hash `passwords` with the default hasher; empty ones get an unusable
+    password. With a `concurrent.futures` executor the hashing is spread
+    over its workers.
+    """
+    hashed = [None if password else make_password(None) for password in passwords]
+    indexes = [i for i, password in enumerate(passwords) if password]
+    to_hash = [passwords[i] for i in indexes]
+    # A hash takes far longer than shipping it to a worker, so no chunking.
+    results = (executor.map if executor else map)(make_password, to_hash)
+    for i, password in zip(indexes, results):
+        hashed[i] = password
+    return hashed
+
+
+def _clean_row(row) -> Dict[str, Optional[str]]:
+    """
+    Return the `IMPORT_FIELDS` of `row`, empty values as None.
+
+    Raises:
+        ValidationError: A value is invalid for its model field
+    """
+    cleaned = {field: row.get(field) or None for field in IMPORT_FIELDS}
+    cleaned["email"] = CustomUser.objects.normalize_email(
+        (cleaned["email"] or "").strip()
+    )
+    for field in IMPORT_FIELDS:
+        model_field = CustomUser._meta.get_field(field)
+        if cleaned[field] is None and model_field.null:
+            continue
+        model_field.clean(cleaned[field], None)
+    return cleaned
+
+
+def _clean_batch(batch, seen, stats) -> List[Dict[str, str]]:
+    rows = []
+    for line, row in batch:
+        try:
+            cleaned = _clean_row(row)
+        except ValidationError:
+            stats["invalid"].append(line)
+            continue
+        email = cleaned["email"]
+        if email in seen:
+            stats["duplicate"] += 1
+            continue
+        seen.add(email)
+        rows.append({**cleaned, "password": row.get("password")})
+
+    existing = set(
+        CustomUser.objects.filter(email__in=[row["email"] for row in rows]).values_list(
+            "email", flat=True
+        )
+    )
+    stats["existing"] += len(existing)
+    return [row for row in rows if row["email"] not in existing]
+
+
+def _create_batch(users, batch_size, stats):
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=batch_size)
+    except IntegrityError:
+        # Someone signed up with one of the emails since the batch was
+        # checked; skip them as existing instead of aborting the import.
+        existing = set(
+            CustomUser.objects.filter(
+                email__in=[user.email for user in users]
+            ).values_list("email", flat=True)
+        )
+        stats["existing"] += len(existing)
+        users = [user for user in users if user.email not in existing]
+        # Signups racing this retry are ignored rather than retried again.
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(
+                users, batch_size=batch_size, ignore_conflicts=True
+            )
+    stats["created"] += len(users)
+    # `bulk_create` sends no post_save signals.
+    bump_version_on_commit(CustomUser)
+
+
+def import_users(
+    rows: Iterable[Dict[str, str]], batch_size: int = 1000, executor=None
+) -> Dict:
+    """
+    Create users from `rows` (see `iter_user_rows`) in batches.
+
+    Args:
+        rows: Dicts with `email` and optionally `first_name`, `last_name`,
+            `contact` and `password`
+        batch_size: Rows per batch, i.e. per `bulk_create`
+        executor: `concurrent.futures` executor to hash passwords with
+
+    Returns:
+        Counts of `created`, `duplicate` (repeated in the file) and
+        `existing` rows, and the file lines of the `invalid` ones
+    """
+    stats = {"created": 0, "duplicate": 0, "existing": 0, "invalid": []}
+    seen = set()
+    # Data starts on line 2, after the header.
+    numbered = enumerate(rows, start=2)
+    while batch := list(islice(numbered, batch_size)):
+        rows_to_create = _clean_batch(batch, seen, stats)
+        if not rows_to_create:
+            continue
+        passwords = hash_passwords(
+            [row.get("password") for row in rows_to_create], executor
+        )
+        users = [
+            CustomUser(
+                password=password, **{field: row[field] for field in IMPORT_FIELDS}
+            )
+            for row, password in zip(rows_to_create, passwords)
+        ]
+        _create_batch(users, batch_size, stats)
+    return stats
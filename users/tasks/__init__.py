@@ -0,0 +1 @@
+from users.tasks.last_login import *
@@ -0,0 +1,13 @@
+import logging
+
+from celery import shared_task
+from users.services.last_login import flush_last_logins as flush
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def flush_last_logins():
+    """Write the `last_login` values buffered in Redis to the database."""
+    updated = flush()
+    logger.info(f"Flushed last login of {updated} users")
@@ -0,0 +1,130 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from openpyxl import Workbook
+
+from users.models import CustomUser
+from users.services import user_import
+
+HEADER = ["Email", "First Name", "Last Name", "Contact", "Password"]
+
+
+class ImportUsersTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        CustomUser.objects.create_user("existing@example.com", "password")
+
+    def write_csv(self, rows):
+        path = os.path.join(self.tmpdir.name, "users.csv")
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerows([HEADER, *rows])
+        return path
+
+    def call(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        path = self.write_csv(
+            [
+                ["ram@example.com", "Ram", "Thapa", "9800000000", "secret-1"],
+                ["sita@EXAMPLE.com", "Sita", "", "", ""],
+                ["ram@example.com", "Ram", "Again", "", "secret-2"],
+                ["existing@example.com", "", "", "", "secret-3"],
+                ["not-an-email", "", "", "", "secret-4"],
+                ["hari@example.com", "Hari", "", "", "secret-5"],
+            ]
+        )
+        # Per batch of 2: one lookup of existing emails, and one bulk insert
+        # (in a savepoint) unless every row was skipped.
+        with self.assertNumQueries(9):
+            out, err = self.call(path, batch_size=2, workers=0)
+        self.assertIn("Created 3 users", out)
+        self.assertIn("Skipped 1 existing emails", out)
+        self.assertIn("Skipped 1 repeated emails", out)
+        self.assertIn("Skipped 1 invalid rows: 6", err)
+
+        ram = CustomUser.objects.get(email="ram@example.com")
+        self.assertEqual((ram.first_name, ram.contact), ("Ram", "9800000000"))
+        self.assertTrue(ram.check_password("secret-1"))
+        sita = CustomUser.objects.get(email="sita@example.com")
+        self.assertIsNone(sita.last_name)
+        self.assertFalse(sita.has_usable_password())
+
+        # Rerunning creates nothing new.
+        out, _ = self.call(path, workers=0)
+        self.assertIn("Created 0 users", out)
+
+    def test_rows_too_long_for_the_model_are_invalid(self):
+        path = self.write_csv(
+            [
+                ["ram@example.com", "R" * 51, "", "", ""],
+                ["sita@example.com", "", "T" * 51, "", ""],
+                ["hari@example.com", "", "", "9" * 16, ""],
+                ["gita@example.com", "G" * 50, "", "9" * 15, ""],
+            ]
+        )
+        out, err = self.call(path, workers=0)
+        self.assertIn("Created 1 users", out)
+        self.assertIn("Skipped 3 invalid rows: 2, 3, 4", err)
+        self.assertTrue(CustomUser.objects.filter(email="gita@example.com").exists())
+
+    def test_each_batch_bumps_the_user_version(self):
+        path = self.write_csv(
+            [[f"user{i}@example.com", "", "", "", ""] for i in range(3)]
+        )
+        with mock.patch.object(user_import, "bump_version_on_commit") as bump:
+            self.call(path, batch_size=2, workers=0)
+        self.assertEqual(bump.call_args_list, [mock.call(CustomUser)] * 2)
+
+    def test_signup_during_import_is_skipped(self):
+        path = self.write_csv(
+            [
+                ["ram@example.com", "Ram", "", "", "secret-1"],
+                ["sita@example.com", "Sita", "", "", "secret-2"],
+            ]
+        )
+        hash_passwords = user_import.hash_passwords
+
+        def signup_then_hash(*args, **kwargs):
+            CustomUser.objects.create_user("sita@example.com", "own-password")
+            return hash_passwords(*args, **kwargs)
+
+        with mock.patch.object(
+            user_import, "hash_passwords", side_effect=signup_then_hash
+        ):
+            out, _ = self.call(path, workers=0)
+        self.assertIn("Created 1 users", out)
+        self.assertIn("Skipped 1 existing emails", out)
+        self.assertTrue(CustomUser.objects.filter(email="ram@example.com").exists())
+        sita = CustomUser.objects.get(email="sita@example.com")
+        self.assertTrue(sita.check_password("own-password"))
+
+    def test_xlsx_with_process_pool(self):
+        path = os.path.join(self.tmpdir.name, "users.xlsx")
+        workbook = Workbook()
+        workbook.active.append(HEADER)
+        for i in range(5):
+            workbook.active.append([f"user{i}@example.com", f"User {i}", None, i, "pw"])
+        workbook.save(path)
+
+        out, _ = self.call(path, workers=2)
+        self.assertIn("Created 5 users", out)
+        user = CustomUser.objects.get(email="user3@example.com")
+        self.assertEqual(user.contact, "3")
+        self.assertTrue(user.check_password("pw"))
+
+    def test_unsupported_file(self):
+        path = os.path.join(self.tmpdir.name, "users.json")
+        open(path, "w").close()
+        with self.assertRaises(CommandError):
+            self.call(path)
+        with self.assertRaises(CommandError):
+            self.call(os.path.join(self.tmpdir.name, "missing.csv"))
@@ -0,0 +1,112 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase
+
+from users.models import CustomUser
+from users.services import last_login
+from users.services.last_login import (
+    FLUSHING_KEY,
+    PENDING_KEY,
+    flush_last_logins,
+    get_last_login,
+    record_last_login,
+)
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+class LastLoginTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("ram@example.com", "password")
+        self.when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def test_written_through_without_redis(self):
+        with self.assertNumQueries(1):
+            record_last_login(self.user, self.when)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, self.when)
+        self.assertEqual(get_last_login(self.user), self.when)
+        self.assertEqual(flush_last_logins(), 0)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class WriteBehindLastLoginTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.users = [
+            CustomUser.objects.create_user(f"user{i}@example.com", "password")
+            for i in range(3)
+        ]
+        self.when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def get_last_logins(self):
+        return list(
+            CustomUser.objects.order_by("id").values_list("last_login", flat=True)
+        )
+
+    def test_record_is_coalesced_and_flushed_in_bulk(self):
+        user = self.users[0]
+        with self.assertNumQueries(0):
+            for minutes in range(5):
+                when = self.when + timedelta(minutes=minutes)
+                record_last_login(user, when, client=self.redis)
+            record_last_login(self.users[1], self.when, client=self.redis)
+        self.assertEqual(user.last_login, self.when + timedelta(minutes=4))
+        # Nothing reaches the database before the flush.
+        self.assertEqual(self.get_last_logins(), [None, None, None])
+        self.assertEqual(self.redis.hlen(PENDING_KEY), 2)
+        self.assertEqual(
+            get_last_login(user, client=self.redis), self.when + timedelta(minutes=4)
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_last_logins(client=self.redis), 2)
+        self.assertEqual(
+            self.get_last_logins(),
+            [self.when + timedelta(minutes=4), self.when, None],
+        )
+        self.assertFalse(self.redis.exists(PENDING_KEY, FLUSHING_KEY))
+        self.assertEqual(flush_last_logins(client=self.redis), 0)
+
+    def test_flush_never_moves_last_login_back(self):
+        user = self.users[0]
+        record_last_login(user, self.when)
+        record_last_login(user, self.when - timedelta(days=1), client=self.redis)
+        flush_last_logins(client=self.redis)
+        self.assertEqual(self.get_last_logins()[0], self.when)
+        self.assertEqual(get_last_login(user, client=self.redis), self.when)
+
+    def test_interrupted_flush_is_written_first(self):
+        record_last_login(self.users[0], self.when, client=self.redis)
+        self.redis.rename(PENDING_KEY, FLUSHING_KEY)
+        record_last_login(self.users[1], self.when, client=self.redis)
+        # Pending writes are visible in either hash.
+        self.assertEqual(get_last_login(self.users[0], client=self.redis), self.when)
+        self.assertEqual(flush_last_logins(client=self.redis), 2)
+        self.assertEqual(self.get_last_logins(), [self.when, self.when, None])
+
+    def test_concurrent_flush_is_skipped(self):
+        record_last_login(self.users[0], self.when, client=self.redis)
+        self.redis.set("last-login:flush-lock", 1)
+        self.assertEqual(flush_last_logins(client=self.redis), 0)
+        self.assertTrue(self.redis.exists(PENDING_KEY))
+
+    def test_flush_keeps_a_lock_it_does_not_own(self):
+        record_last_login(self.users[0], self.when, client=self.redis)
+        write = last_login._write_last_logins
+
+        def expire_lock_then_write(*args):
+            # The lock timed out and another flush took it.
+            self.redis.set("last-login:flush-lock", "other")
+            return write(*args)
+
+        with mock.patch.object(
+            last_login, "_write_last_logins", side_effect=expire_lock_then_write
+        ):
+            self.assertEqual(flush_last_logins(client=self.redis), 1)
+        self.assertEqual(self.redis.get("last-login:flush-lock"), b"other")
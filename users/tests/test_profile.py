@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from users.models import CustomUser
+from users.services import profile
+from users.services.profile import get_user_profile, invalidate_user_profile
+
+
+class UserProfileCacheTest(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            "ram@example.com", "password", first_name="Ram"
+        )
+        self.token = jwt.encode(
+            {
+                "user_uuid": str(self.user.uuid),
+                "exp": datetime.now() + timedelta(days=1),
+                "token_type": "access",
+            },
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+
+    def me(self, token=None):
+        return self.client.post(reverse("get_user"), {"token": token or self.token})
+
+    def test_cached_after_first_call(self):
+        self.assertEqual(self.me().data["data"]["first_name"], "Ram")
+        with self.assertNumQueries(0):
+            response = self.me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["email"], "ram@example.com")
+
+    def test_signature_is_still_checked(self):
+        self.me()
+        token = jwt.encode(
+            {
+                "user_uuid": str(self.user.uuid),
+                "exp": datetime.now() + timedelta(1),
+                "token_type": "access",
+            },
+            "another-secret-key-another-secret-key",
+            algorithm="HS256",
+        )
+        self.assertEqual(self.me(token).status_code, 400)
+
+    def test_invalidated_on_save(self):
+        self.me()
+        self.user.first_name = "Hari"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.me().data["data"]["first_name"], "Hari")
+
+    def test_invalidated_on_soft_delete_and_delete(self):
+        self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.soft_delete(archive=True)
+        with self.assertNumQueries(1):
+            self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.me().status_code, 400)
+
+    def test_payload_read_before_an_invalidation_is_not_served(self):
+        serializer_class = profile.CustomUserSerializer
+
+        def serialize_while_user_changes(user):
+            invalidate_user_profile(user.uuid)
+            return serializer_class(user)
+
+        with mock.patch.object(
+            profile, "CustomUserSerializer", side_effect=serialize_while_user_changes
+        ):
+            get_user_profile(self.user.uuid)
+        with self.assertNumQueries(1):
+            get_user_profile(self.user.uuid)
+
+    def test_unknown_user(self):
+        self.assertIsNone(get_user_profile("00000000-0000-0000-0000-000000000000"))
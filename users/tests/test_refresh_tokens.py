@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from users.models import CustomUser
+
+
+class RefreshTokenTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.refresh_url = reverse("token_refresh")
+        self.user = CustomUser.objects.create_user("ram@example.com", "password")
+        response = self.client.post(
+            reverse("login"), {"email": "ram@example.com", "password": "password"}
+        )
+        self.access = response.data["data"]
+        self.refresh = response.data["refresh"]
+
+    def rotate(self, refresh):
+        return self.client.post(self.refresh_url, {"refresh": refresh})
+
+    def is_valid(self, access):
+        response = self.client.post(reverse("get_user"), {"token": access})
+        return response.status_code == 200
+
+    def test_rotation(self):
+        response = self.rotate(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Successfully refreshed")
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        self.assertTrue(self.is_valid(response.data["data"]))
+
+        # Renewals need no password hash and, with the user cached, no query.
+        with self.assertNumQueries(0):
+            response = self.rotate(response.data["refresh"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_reuse_revokes_the_family(self):
+        first = self.rotate(self.refresh).data
+        second = self.rotate(first["refresh"]).data
+
+        response = self.rotate(first["refresh"])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["message"], "Token has already been used")
+        self.assertEqual(self.rotate(second["refresh"]).status_code, 401)
+        self.assertFalse(self.is_valid(second["data"]))
+
+        # Other logins are unaffected.
+        response = self.client.post(
+            reverse("login"), {"email": "ram@example.com", "password": "password"}
+        )
+        self.assertEqual(self.rotate(response.data["refresh"]).status_code, 200)
+
+    def test_logout_revokes_the_refresh_token(self):
+        response = self.client.post(
+            reverse("logout"),
+            {"refresh": self.refresh},
+            HTTP_AUTHORIZATION=f"Bearer {self.access}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rotate(self.refresh).status_code, 401)
+
+    def test_refresh_tokens_are_not_access_tokens(self):
+        # Neither an unused one nor one that was already rotated.
+        self.assertFalse(self.is_valid(self.refresh))
+        self.rotate(self.refresh)
+        response = self.client.post(reverse("get_user"), {"token": self.refresh})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_tokens(self):
+        self.assertEqual(self.client.post(self.refresh_url, {}).status_code, 400)
+        self.assertEqual(self.rotate("invalid-token").status_code, 401)
+        # Access tokens cannot be used to refresh.
+        self.assertEqual(self.rotate(self.access).status_code, 401)
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.rotate(self.refresh).status_code, 401)
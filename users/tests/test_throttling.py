@@ -0,0 +1,165 @@
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.throttling import SlidingWindowRateThrottle
+from users.api.v1.throttling import LoginEmailThrottle, LoginIPThrottle
+from users.models import CustomUser
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+class LoginThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.login_url = reverse("login")
+        self.user = CustomUser.objects.create_user("ram@example.com", "password")
+        self.now = 1_000_000.0
+        timer = mock.patch.object(
+            SlidingWindowRateThrottle, "timer", side_effect=lambda: self.now
+        )
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def login(self, email="ram@example.com", password="wrong", ip="10.0.0.1", **extra):
+        return self.client.post(
+            self.login_url,
+            {"email": email, "password": password},
+            REMOTE_ADDR=ip,
+            **extra,
+        )
+
+    def test_email_limit_rejects_before_user_lookup(self):
+        for _ in range(10):
+            self.assertEqual(self.login().status_code, 401)
+        with self.assertNumQueries(0):
+            response = self.login(password="password", ip="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+        # Other accounts are unaffected.
+        self.assertEqual(self.login(email="sita@example.com").status_code, 401)
+
+    def test_ip_limit(self):
+        for i in range(30):
+            self.login(email=f"user{i}@example.com")
+        self.assertEqual(self.login(email="new@example.com").status_code, 429)
+        self.assertEqual(self.login(ip="10.0.0.2").status_code, 401)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for i in range(30):
+            self.login(email=f"user{i}@example.com", HTTP_X_FORWARDED_FOR=f"1.2.3.{i}")
+        response = self.login(email="new@example.com", HTTP_X_FORWARDED_FOR="1.2.4.0")
+        self.assertEqual(response.status_code, 429)
+
+    def test_forwarded_for_behind_proxy(self):
+        rest_framework = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for i in range(30):
+                # The proxy appends the address the request came from.
+                self.login(
+                    email=f"user{i}@example.com",
+                    HTTP_X_FORWARDED_FOR=f"1.2.3.{i}, 10.0.0.9",
+                )
+            response = self.login(
+                email="new@example.com", HTTP_X_FORWARDED_FOR="1.2.3.0, 10.0.0.9"
+            )
+            self.assertEqual(response.status_code, 429)
+            response = self.login(
+                email="new@example.com", HTTP_X_FORWARDED_FOR="10.0.0.8"
+            )
+            self.assertEqual(response.status_code, 401)
+
+    def test_redis_errors_fall_back_to_cache(self):
+        client = mock.Mock()
+        client.pipeline.return_value.execute.side_effect = ConnectionError("down")
+        with mock.patch("core.throttling.get_redis", return_value=client):
+            for i in range(30):
+                response = self.login(email=f"user{i}@example.com")
+                self.assertEqual(response.status_code, 401)
+            self.assertEqual(self.login(email="new@example.com").status_code, 429)
+
+    def test_cache_errors_let_requests_through(self):
+        with mock.patch.object(
+            LoginIPThrottle, "cache", mock.Mock(get=mock.Mock(side_effect=OSError))
+        ):
+            self.assertEqual(self.login().status_code, 401)
+
+    def test_progressive_backoff(self):
+        for _ in range(10):
+            self.login()
+        self.assertEqual(self.login()["Retry-After"], "60")
+
+        # Locked out even though the window has room again.
+        self.now += 59
+        self.assertEqual(self.login().status_code, 429)
+        self.now += 2
+        self.assertEqual(self.login(password="password").status_code, 200)
+
+        # The next lockout is twice as long.
+        self.now += 60
+        for _ in range(10):
+            self.login()
+        self.assertEqual(self.login()["Retry-After"], "120")
+        self.now += 61
+        self.assertEqual(self.login().status_code, 429)
+
+    def test_no_email(self):
+        for _ in range(11):
+            response = self.client.post(self.login_url, {"password": "wrong"})
+            self.assertEqual(response.status_code, 400)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisSlidingWindowTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("core.throttling.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 1_000_000.0
+
+    def allow(self, throttle_class=LoginIPThrottle):
+        throttle = throttle_class()
+        throttle.timer = lambda: self.now
+        request = Request(
+            APIRequestFactory().post(
+                "/",
+                {"email": "Ram@Example.com "},
+                format="json",
+                REMOTE_ADDR="10.0.0.1",
+            ),
+            parsers=[JSONParser()],
+        )
+        return throttle.allow_request(request, None), throttle.wait()
+
+    def test_window_slides(self):
+        for _ in range(30):
+            self.now += 1
+            self.assertEqual(self.allow(), (True, None))
+        allowed, wait = self.allow()
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 60)
+        # Rejected requests are not counted.
+        self.assertEqual(self.redis.zcard("throttle_login_ip_10.0.0.1"), 30)
+
+        # The lockout ends once the oldest requests leave the window.
+        self.now += 60
+        self.assertTrue(self.allow()[0])
+
+    def test_email_key_is_normalized_and_hashed(self):
+        self.allow(LoginEmailThrottle)
+        (key,) = self.redis.keys("throttle_login_email_*")
+        self.assertNotIn(b"ram", key)
@@ -2,6 +2,8 @@ from datetime import datetime, timedelta
 
 import jwt
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 
@@ -38,6 +40,27 @@ class ViewsTest(APITestCase):
         self.assertEqual(response.data["message"], "User created successfully")
         self.assertTrue(CustomUser.objects.filter(email=data["email"]).exists())
 
+    def test_register_view_single_insert(self):
+        data = {
+            "email": "newuser@example.com",
+            "first_name": "New",
+            "last_name": "User",
+            "contact": "0987654321",
+            "password": "newpassword123",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.register_url, data)
+        self.assertEqual(response.status_code, 201)
+        writes = [
+            query["sql"].split()[0]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(writes, ["INSERT"])
+        user = CustomUser.objects.get(email=data["email"])
+        self.assertTrue(user.check_password(data["password"]))
+        self.assertIsNotNone(user.last_login)
+
     def test_register_view_missing_password(self):
         data = {
             "email": "nopass@example.com",
@@ -59,6 +82,18 @@ class ViewsTest(APITestCase):
         self.assertEqual(response.data["message"], "Successfully logged in")
         self.assertIn("data", response.data)
 
+    def test_login_view_writes_last_login_once(self):
+        data = {
+            "email": self.user_data["email"],
+            "password": self.user_data["password"],
+        }
+        # The user lookup and a single last_login write (no Redis in tests).
+        with self.assertNumQueries(2):
+            response = self.client.post(self.login_url, data)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
     def test_login_view_invalid_credentials(self):
         data = {"email": self.user_data["email"], "password": "wrongpassword"}
         response = self.client.post(self.login_url, data)
@@ -69,6 +104,7 @@ class ViewsTest(APITestCase):
         payload = {
             "user_uuid": str(self.user.uuid),
             "exp": datetime.now() + timedelta(days=1),
+            "token_type": "access",
         }
         token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
 
@@ -87,3 +123,22 @@ class ViewsTest(APITestCase):
         self.assertEqual(response.status_code, 400)
         # The jwt library returns "Not enough segments" or "not enough segments"
         self.assertIn("enough", response.data["message"].lower())
+
+    def test_logout_view_revokes_token(self):
+        data = {
+            "email": self.user_data["email"],
+            "password": self.user_data["password"],
+        }
+        token = self.client.post(self.login_url, data).data["data"]
+        logout_url = reverse("logout")
+        self.assertEqual(self.client.post(logout_url).status_code, 401)
+
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        response = self.client.post(logout_url, **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Successfully logged out")
+
+        self.assertEqual(self.client.post(logout_url, **auth).status_code, 401)
+        response = self.client.post(self.get_user_url, {"token": token})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("revoked", response.data["message"])